@@ -0,0 +1,198 @@
+"""pc_app/ai/cache.py
+Perceptual-hash cache of AI answers, so a dwell on an unchanged screen does
+not send the same picture again.
+
+Keys are (prompt, gaze cell, 256-bit DCT pHash of the captured image). A
+lookup matches the closest stored hash for the same prompt and gaze cell
+within AI_CACHE_MAX_DISTANCE bits (Hamming distance), so re-renders or a
+blinking cursor still hit. The gaze cell is the gaze point inside the image,
+quantized (the answer is about what the user looks at, and crops clamped at
+a screen edge look the same for different gaze points); the prompt must be
+the fixed part of the request, not the exact gaze coordinates.
+
+Eviction: least recently used beyond AI_CACHE_SIZE entries, and anything
+older than AI_CACHE_TTL_SEC (wall clock, so it also applies to entries
+loaded from disk). With a `path` (AI_CACHE_FILE, off by default: answers
+describe screen contents), entries are persisted as JSON, written by a
+short-lived background thread after every change.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import config
+
+HASH_SIZE = 16  # low-frequency DCT block side: HASH_SIZE**2 bits
+
+
+def image_phash(image: Image.Image) -> int:
+    """Perceptual hash: sign of the low-frequency DCT block against its median.
+
+    16x16 coefficients of a 64x64 thumbnail rather than the classic 8x8 of
+    32x32: screens of text with the same layout are too alike at 64 bits.
+    """
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    small = cv2.resize(gray, (4 * HASH_SIZE, 4 * HASH_SIZE), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])  # the DC term would dominate the median
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class _Entry:
+    prompt: str
+    cell: Tuple[int, int]  # quantized gaze point in the image
+    phash: int
+    text: str
+    created: float  # time.time()
+
+
+class ResponseCache:
+    """LRU + TTL cache of answers keyed by (prompt, gaze cell, image pHash) with near-duplicate matching."""
+
+    def __init__(
+        self,
+        capacity: int = config.AI_CACHE_SIZE,
+        ttl: float = config.AI_CACHE_TTL_SEC,
+        max_distance: int = config.AI_CACHE_MAX_DISTANCE,
+        path: str = config.AI_CACHE_FILE,
+    ) -> None:
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.path = path
+        self._entries: "OrderedDict[Tuple[str, Tuple[int, int], int], _Entry]" = OrderedDict()  # oldest use first
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_seq = 0   # snapshots taken (under _lock, so in order)
+        self._saved_seq = 0  # newest snapshot on disk (under _save_lock)
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        return (
+            f"[AI cache] hits {self.hits}/{self.hits + self.misses} ({self.hit_rate:.0%}), "
+            f"{len(self._entries)} entries"
+        )
+
+    def get(self, prompt: str, cell: Tuple[int, int], phash: int) -> Optional[Tuple[str, int]]:
+        """(answer, Hamming distance) of the closest live entry, or None (counted as a miss)."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            best: Optional[_Entry] = None
+            best_d = self.max_distance + 1
+            for entry in self._entries.values():
+                if entry.prompt == prompt and entry.cell == cell:
+                    d = hamming(entry.phash, phash)
+                    if d < best_d:
+                        best, best_d = entry, d
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((best.prompt, best.cell, best.phash))
+            self.hits += 1
+            return best.text, best_d
+
+    def put(self, prompt: str, cell: Tuple[int, int], phash: int, text: str) -> None:
+        with self._lock:
+            key = (prompt, cell, phash)
+            self._entries[key] = _Entry(prompt, cell, phash, text, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        if self.path:
+            self.save(background=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _expire(self, now: float) -> None:
+        if self.ttl <= 0:
+            return
+        for key in [k for k, e in self._entries.items() if now - e.created > self.ttl]:
+            del self._entries[key]
+
+    # ---------------- Persistence ----------------
+    def save(self, background: bool = False) -> None:
+        digits = HASH_SIZE * HASH_SIZE // 4
+        with self._lock:
+            data = [
+                {
+                    "prompt": e.prompt,
+                    "cell": list(e.cell),
+                    "phash": f"{e.phash:0{digits}x}",
+                    "text": e.text,
+                    "created": e.created,
+                }
+                for e in self._entries.values()
+            ]
+            self._save_seq += 1
+            seq = self._save_seq
+        if background:
+            threading.Thread(target=self._write, args=(data, seq), name="ai-cache-save", daemon=True).start()
+        else:
+            self._write(data, seq)
+
+    def _write(self, data: list, seq: int) -> None:
+        tmp = self.path + ".tmp"
+        with self._save_lock:  # background saves may overlap, and reach the lock in any order
+            if seq < self._saved_seq:
+                return  # a newer snapshot is already on disk
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                self._saved_seq = seq
+            except OSError as e:
+                print(f"[AI cache] Could not save {self.path}: {e}")
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                for item in data:
+                    cx, cy = item["cell"]
+                    entry = _Entry(
+                        str(item["prompt"]),
+                        (int(cx), int(cy)),
+                        int(item["phash"], 16),
+                        str(item["text"]),
+                        float(item["created"]),
+                    )
+                    self._entries[(entry.prompt, entry.cell, entry.phash)] = entry
+                self._expire(time.time())
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+            print(f"[AI cache] Loaded {len(self._entries)} entries from {self.path}.")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[AI cache] Could not load {self.path}: {e}")
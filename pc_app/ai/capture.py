@@ -0,0 +1,104 @@
+"""pc_app/ai/capture.py
+Gaze-centred screenshot capture and size-budgeted encoding for AI requests.
+
+Only the region around the fixation (AI_CONTEXT_MARGIN_PX on each side,
+shifted to stay on screen) is grabbed. It is then downscaled so its longer
+side is at most AI_MAX_IMAGE_SIDE and encoded as JPEG or WebP, lowering the
+quality (and, as a last resort, the size) until it fits AI_IMAGE_MAX_BYTES.
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from PIL import Image, ImageGrab
+
+import config
+
+_MIN_QUALITY = 40
+_QUALITY_STEP = 10
+_SHRINK = 0.75  # per retry once quality is at _MIN_QUALITY
+
+
+@dataclass(frozen=True)
+class GazeCapture:
+    """A screenshot region and where the gaze falls inside it."""
+
+    image: Image.Image
+    box: Tuple[int, int, int, int]  # (left, top, right, bottom) on screen, pixels
+    gaze: Tuple[int, int]           # gaze point inside `image`, pixels
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    data: bytes
+    mime_type: str
+    size: Tuple[int, int]  # (w, h) after downscaling
+    quality: int
+    scale: float           # encoded / captured pixel ratio
+
+    def describe(self) -> str:
+        fmt = self.mime_type.split("/")[-1]
+        return f"{len(self.data) / 1024:.0f} KB {fmt} q{self.quality} {self.size[0]}x{self.size[1]}"
+
+
+def gaze_crop_box(
+    gaze: Tuple[float, float], screen: Tuple[int, int], margin: int = config.AI_CONTEXT_MARGIN_PX
+) -> Tuple[int, int, int, int]:
+    """(left, top, right, bottom) of a 2*margin square around the normalized gaze point.
+
+    The box is shifted (not shrunk) to stay on screen; margin <= 0 means the full screen.
+    """
+    sw, sh = screen
+    if margin <= 0:
+        return 0, 0, sw, sh
+    w, h = min(sw, 2 * margin), min(sh, 2 * margin)
+    cx, cy = int(gaze[0] * sw), int(gaze[1] * sh)
+    left = max(0, min(sw - w, cx - w // 2))
+    top = max(0, min(sh - h, cy - h // 2))
+    return left, top, left + w, top + h
+
+
+def capture_around(gaze: Optional[Tuple[float, float]], screen: Tuple[int, int]) -> GazeCapture:
+    """Grab the screen region around `gaze` (the full screen without a gaze point)."""
+    box = gaze_crop_box(gaze, screen) if gaze is not None else (0, 0, screen[0], screen[1])
+    image = ImageGrab.grab(bbox=box)
+    if gaze is None:
+        local = (image.width // 2, image.height // 2)
+    else:
+        # Scale by the grabbed size: on scaled displays ImageGrab may return physical pixels.
+        fx, fy = image.width / max(1, box[2] - box[0]), image.height / max(1, box[3] - box[1])
+        local = (int((gaze[0] * screen[0] - box[0]) * fx), int((gaze[1] * screen[1] - box[1]) * fy))
+    return GazeCapture(image, box, local)
+
+
+def encode_to_budget(
+    image: Image.Image,
+    max_side: int = config.AI_MAX_IMAGE_SIDE,
+    max_bytes: int = config.AI_IMAGE_MAX_BYTES,
+    fmt: str = config.AI_IMAGE_FORMAT,
+    quality: int = config.AI_IMAGE_QUALITY,
+) -> EncodedImage:
+    """Downscale to `max_side` and encode within `max_bytes` (best effort at the minimum size)."""
+    fmt = fmt.upper()
+    if fmt not in ("JPEG", "WEBP"):
+        fmt = "JPEG"
+    src_w = image.width
+    img = image.convert("RGB")
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.BILINEAR)
+
+    q = quality
+    while True:
+        buf = io.BytesIO()
+        img.save(buf, format=fmt, quality=q)
+        data = buf.getvalue()
+        if len(data) <= max_bytes or max(img.size) <= 64:
+            break
+        if q > _MIN_QUALITY:
+            q = max(_MIN_QUALITY, q - _QUALITY_STEP)
+        else:
+            img = img.resize((max(1, int(img.width * _SHRINK)), max(1, int(img.height * _SHRINK))), Image.BILINEAR)
+    return EncodedImage(data, f"image/{fmt.lower()}", img.size, q, img.width / max(1, src_w))
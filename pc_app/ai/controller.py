@@ -1,43 +1,243 @@
 """pc_app/ai/controller.py
-Background AI task runner (threaded) with UI-safe callbacks.
+Background AI task runner (one worker thread) with UI-safe callbacks.
 
 Usage:
     ai = AIController(root)
-    ai.trigger_screenshot_analysis(on_result)
+    ai.trigger_screenshot_analysis(on_result, gaze=(x_norm, y_norm))
+    ai.cancel()  # the user looked elsewhere: drop pending and in-flight work
+
+A request captures only the screen region around the gaze point, encodes
+it within the size budget (see capture.py) and tells the model where in
+the image the user is looking. A capture whose perceptual hash matches a
+recent one (see cache.py) is answered from the cache without encoding or
+sending it.
+
+Requests run one at a time on a single worker. At most one more waits
+behind it: a new trigger replaces the waiting one (latest wins). Every
+trigger or `cancel()` bumps a generation counter; the worker checks it
+between phases and gives up on a superseded request, and a result is
+delivered (on the Tk thread) only if its generation is still current. A
+Gemini call already sent cannot be aborted, but its answer is discarded.
+
+Per-phase times (queue wait, capture, hash, encode, request, total from
+trigger to result) go into histograms; `timing_report()` and `stats()`
+summarize them together with the queue depth and request counters.
 """
 
 from __future__ import annotations
 import threading
-from typing import Callable
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
 
-from PIL import ImageGrab
 import tkinter as tk
 
-from .gemini_agent import GeminiAgent
+import config
+from pc_app.backend.latency import LatencyHistogram
+
+from .cache import ResponseCache, image_phash
+from .capture import capture_around, encode_to_budget
+from .gemini_agent import ANALYSIS_FAILED, NOT_CONFIGURED, GeminiAgent
+
+PHASES = ("queue", "capture", "hash", "encode", "request", "total")
+
+# Fixed part of the request: the cache key, together with the quantized gaze cell (see _gaze_cell).
+BASE_PROMPT = (
+    "This is a screenshot of the region the user is staring at. "
+    "Identify what the user is looking at (code/video/article/etc.) "
+    "and give one short helpful suggestion."
+)
+
+
+def _gaze_cell(gaze: Tuple[int, int], size: Tuple[int, int]) -> Tuple[int, int]:
+    """Gaze point in (nominally) downscaled image pixels, quantized to AI_CACHE_GAZE_CELL_PX."""
+    scale = min(1.0, config.AI_MAX_IMAGE_SIDE / max(1, *size))
+    q = max(1, config.AI_CACHE_GAZE_CELL_PX)
+    return int(gaze[0] * scale) // q, int(gaze[1] * scale) // q
+
+
+@dataclass(frozen=True)
+class _Request:
+    generation: int
+    on_result: Callable[[str], None]
+    gaze: Optional[Tuple[float, float]]
+    submitted: float  # perf_counter()
 
 
 class AIController:
     def __init__(self, tk_root: tk.Tk) -> None:
         self._root = tk_root
         self._agent = GeminiAgent()
+        # Read on the UI thread: Tk must not be called from the worker.
+        self._screen = (tk_root.winfo_screenwidth(), tk_root.winfo_screenheight())
+        self._timing_lock = threading.Lock()
+        self._timings: Dict[str, LatencyHistogram] = {p: LatencyHistogram() for p in PHASES}
+        self.cache: Optional[ResponseCache] = ResponseCache() if config.AI_CACHE else None
+
+        # Single-slot queue (latest wins) and the generation that may still deliver.
+        self._cond = threading.Condition()
+        self._pending: Optional[_Request] = None
+        self._in_flight = False
+        self._generation = 0
+        self.submitted = 0
+        self.coalesced = 0   # waiting requests replaced by a newer trigger
+        self.cancelled = 0   # superseded before or while running
+        self.delivered = 0
+        self._thread = threading.Thread(target=self._run, name="ai-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting or running (0-2)."""
+        with self._cond:
+            return int(self._pending is not None) + int(self._in_flight)
+
+    @property
+    def busy(self) -> bool:
+        return self.queue_depth > 0
+
+    def trigger_screenshot_analysis(
+        self, on_result: Callable[[str], None], gaze: Optional[Tuple[float, float]] = None
+    ) -> None:
+        """Queue analysis of the region around `gaze` (normalized screen coords); supersedes earlier requests."""
+        with self._cond:
+            self._generation += 1
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = _Request(self._generation, on_result, gaze, time.perf_counter())
+            self.submitted += 1
+            self._cond.notify()
 
-    def trigger_screenshot_analysis(self, on_result: Callable[[str], None]) -> None:
-        """Capture screenshot and analyze in a daemon thread."""
-        threading.Thread(
-            target=self._worker,
-            args=(on_result,),
-            daemon=True,
-        ).start()
+    def cancel(self) -> None:
+        """Drop the waiting request and discard the running one's result.
 
-    def _worker(self, on_result: Callable[[str], None]) -> None:
+        Always bumps the generation: a finished result may already be queued
+        on the Tk thread (after `_in_flight` is cleared), and it must not
+        reach its callback either.
+        """
+        with self._cond:
+            self._generation += 1
+            if self._pending is not None:
+                self._pending = None
+                self.cancelled += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, request counters and per-phase p50/p95 (ms)."""
+        with self._cond:
+            out = {
+                "queue_depth": float(int(self._pending is not None) + int(self._in_flight)),
+                "submitted": float(self.submitted),
+                "coalesced": float(self.coalesced),
+                "cancelled": float(self.cancelled),
+                "delivered": float(self.delivered),
+            }
+        with self._timing_lock:
+            for phase, h in self._timings.items():
+                out[f"{phase}_p50_ms"] = h.percentile(50)
+                out[f"{phase}_p95_ms"] = h.percentile(95)
+        return out
+
+    def timing_report(self) -> str:
+        with self._timing_lock:
+            parts = [
+                f"{p} {h.percentile(50):.0f}/{h.percentile(95):.0f}" for p, h in self._timings.items() if h.count
+            ]
+        report = "[AI] p50/p95 ms: " + (", ".join(parts) or "no requests yet")
+        with self._cond:
+            report += (
+                f"\n[AI] requests {self.submitted}: delivered {self.delivered}, "
+                f"coalesced {self.coalesced}, cancelled {self.cancelled}"
+            )
+        if self.cache is not None:
+            report += "\n" + self.cache.report()
+        return report
+
+    # ---------------- Worker ----------------
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                req, self._pending = self._pending, None
+                self._in_flight = True
+            try:
+                self._record(queue=time.perf_counter() - req.submitted)
+                text = self._process(req)
+                if text is not None:
+                    self._deliver(req, text)
+            finally:
+                with self._cond:
+                    self._in_flight = False
+
+    def _current(self, req: _Request) -> bool:
+        """Whether `req` is still the latest request (counts it as cancelled if not)."""
+        with self._cond:
+            if req.generation == self._generation:
+                return True
+            self.cancelled += 1
+            return False
+
+    def _deliver(self, req: _Request, text: str) -> None:
+        """Hand `text` to the Tk thread, which re-checks the generation right before the callback."""
+
+        def deliver() -> None:
+            if not self._current(req):
+                return
+            with self._cond:
+                self.delivered += 1
+            self._record(total=time.perf_counter() - req.submitted)
+            req.on_result(text)
+
+        self._root.after(0, deliver)
+
+    def _process(self, req: _Request) -> Optional[str]:
+        """The answer for `req`, or None once it has been superseded."""
         try:
-            screenshot = ImageGrab.grab()
+            t0 = time.perf_counter()
+            shot = capture_around(req.gaze, self._screen)
+            t1 = time.perf_counter()
+            self._record(capture=t1 - t0)
+            if not self._current(req):
+                return None
+
+            phash, cell = 0, _gaze_cell(shot.gaze, shot.image.size)
+            if self.cache is not None:
+                phash = image_phash(shot.image)
+                cached = self.cache.get(BASE_PROMPT, cell, phash)
+                t_hash = time.perf_counter()
+                self._record(hash=t_hash - t1)
+                if cached is not None:
+                    text, distance = cached
+                    print(f"[AI] Cache hit (distance {distance}) in {(t_hash - t0) * 1000:.0f} ms")
+                    return text
+
+            t_enc = time.perf_counter()
+            encoded = encode_to_budget(shot.image)
+            t2 = time.perf_counter()
+            self._record(encode=t2 - t_enc)
+            if not self._current(req):
+                return None
+
+            gx, gy = (int(shot.gaze[0] * encoded.scale), int(shot.gaze[1] * encoded.scale))
             prompt = (
-                "This is a screenshot the user is staring at. "
-                "Identify what the user is looking at (code/video/article/etc.) "
-                "and give one short helpful suggestion."
+                f"{BASE_PROMPT} The user's gaze is at pixel ({gx}, {gy}) "
+                f"of this {encoded.size[0]}x{encoded.size[1]} image."
+            )
+            text = self._agent.analyze(encoded.data, prompt=prompt, mime_type=encoded.mime_type)
+            t3 = time.perf_counter()
+            self._record(request=t3 - t2)
+            # Cached even if superseded meanwhile: the answer is still right for that screen.
+            if self.cache is not None and text and text not in (NOT_CONFIGURED, ANALYSIS_FAILED):
+                self.cache.put(BASE_PROMPT, cell, phash, text)
+            print(
+                f"[AI] capture {(t1 - t0) * 1000:.0f} ms ({shot.image.width}x{shot.image.height}) | "
+                f"encode {(t2 - t_enc) * 1000:.0f} ms ({encoded.describe()}) | request {(t3 - t2) * 1000:.0f} ms"
             )
-            text = self._agent.analyze(screenshot, prompt=prompt)
-            self._root.after(0, lambda: on_result(text))
+            return text
         except Exception as e:
-            self._root.after(0, lambda: on_result(f"Error: {e}"))
+            return f"Error: {e}"
+
+    def _record(self, **seconds: float) -> None:
+        with self._timing_lock:
+            for phase, s in seconds.items():
+                self._timings[phase].record(s * 1000.0)
@@ -18,6 +18,9 @@ try:
 except Exception:  # pragma: no cover
     genai = None
 
+NOT_CONFIGURED = "Error: AI is not configured."
+ANALYSIS_FAILED = "Analysis failed."
+
 
 class GeminiAgent:
     def __init__(self) -> None:
@@ -37,17 +40,21 @@ class GeminiAgent:
 
     def analyze(
         self,
-        image_input: Union[Image.Image, np.ndarray],
+        image_input: Union[Image.Image, np.ndarray, bytes],
         prompt: str = "Describe what you see briefly and what the user might be doing.",
+        mime_type: str = "image/jpeg",
     ) -> str:
+        """`image_input` may be already-encoded bytes (`mime_type`), sent as is."""
         if not self._model:
-            return "Error: AI is not configured."
+            return NOT_CONFIGURED
 
         try:
             img = image_input
             if isinstance(image_input, np.ndarray):
                 rgb = cv2.cvtColor(image_input, cv2.COLOR_BGR2RGB)
                 img = Image.fromarray(rgb)
+            elif isinstance(image_input, (bytes, bytearray)):
+                img = {"mime_type": mime_type, "data": bytes(image_input)}
 
             print("[AI] Sending request to Gemini...")
             response = self._model.generate_content([prompt, img])
@@ -55,4 +62,4 @@ class GeminiAgent:
             return getattr(response, "text", "") or ""
         except Exception as e:
             print(f"[AI] Error: {e}")
-            return "Analysis failed."
+            return ANALYSIS_FAILED
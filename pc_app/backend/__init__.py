@@ -1,5 +1,7 @@
 from .state import SharedState
+from .inference import InferenceService
 from .pi_receiver import run_pi_receiver
 from .pc_camera import run_pc_camera
+from .recording import run_replay_receiver
 
-__all__ = ["SharedState", "run_pi_receiver", "run_pc_camera"]
+__all__ = ["SharedState", "InferenceService", "run_pi_receiver", "run_pc_camera", "run_replay_receiver"]
@@ -2,6 +2,34 @@
 pc_app/backend/eye_processor.py
 MediaPipe Face Landmarker (Tasks API) based iris tracking and normalization.
 
+Streaming mode (config.EYE_RUNNING_MODE = "video"):
+- Each stream gets its own landmarker in VIDEO running mode, fed monotonic
+  timestamps, so MediaPipe tracks landmarks between frames instead of
+  running the face detector on every frame.
+- With config.EYE_ROI_TRACKING the previous frame's face box (plus margin)
+  is cropped and downscaled before inference. The crop only moves when the
+  face nears its edge, and a miss falls back to full-frame detection.
+  A stream's VIDEO landmarker only ever sees one crop geometry (its
+  tracking prior is in crop coordinates): full-frame detection goes to a
+  shared IMAGE-mode landmarker, and the stream's landmarker is recreated
+  when the crop moves.
+
+Hybrid mode (config.EYE_HYBRID_TRACKING): the landmarker only runs on
+keyframes; in between, the eye points are tracked with optical flow
+(see hybrid_tracker.py). The output contract is unchanged.
+
+Motion gate (config.EYE_MOTION_GATE): before any tracking work, the eye
+region is compared with the last processed frame (see motion_gate.py). A
+static frame reuses the previous result; `skip_ratio(stream)` reports how
+often that happens.
+
+Gaze feature (config.EYE_GAZE_FEATURE): landmarks are converted once per
+keyframe into a (478, 2) array. With "eye", both irises are measured in
+their own eye's frame (corner-to-corner axis, lid opening) and averaged, so
+head translation and roll do not move the output; with EYE_HEAD_POSE the
+facial transformation matrix adds head yaw/pitch back in as gaze. "iris"
+is the legacy iris position in the camera frame against fixed ranges.
+
 This module does NOT:
 - manage sockets
 - manage cameras
@@ -10,7 +38,8 @@ This module does NOT:
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional, Tuple
+import time
+from typing import Dict, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -19,6 +48,16 @@ from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 
 import config
+from .hybrid_tracker import EYE_POINTS, HybridTracker
+from .motion_gate import MotionGate
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1 in full-frame pixels
+
+_EYE_IDX = np.asarray(EYE_POINTS, dtype=np.intp)
+# Rows of the EYE_POINTS array as (part, eye) for eye_feature: iris, the two corners
+# in image x order (33/133 right eye, 362/263 left eye), upper lid, lower lid.
+_EYE_PARTS = np.array([[0, 1], [2, 4], [3, 5], [6, 8], [7, 9]], dtype=np.intp)
+_MIN_OPENING = 0.15  # lid opening floor, fraction of eye width (blinks)
 
 
 @dataclass(frozen=True)
@@ -29,6 +68,68 @@ class NormalizeRange:
     y_max: float
 
 
+@dataclass
+class _FaceTrack:
+    """Per-stream tracking state (streams must not share VIDEO-mode timestamps)."""
+
+    roi: Optional[Box] = None
+    last_ts_ms: int = -1
+    video_box: Optional[Box] = None  # crop the stream's VIDEO landmarker has been fed
+    hybrid: Optional[HybridTracker] = None
+    gate: Optional[MotionGate] = None
+    last_pts: Optional[np.ndarray] = None  # result of the last processed frame
+    has_result: bool = False
+    iris: Optional[Tuple[float, float]] = None  # latest iris centre (px), for debug markers
+    head: Tuple[float, float] = (0.0, 0.0)      # (yaw, pitch) in radians from the last keyframe
+
+
+def draw_debug_marker(
+    frame_bgr: np.ndarray, iris: Optional[Tuple[float, float]], roi: Optional[Box], *, copy: bool = True
+) -> np.ndarray:
+    """Frame with the iris marker and landmarker ROI drawn on it (on a copy unless `copy=False`)."""
+    debug_frame = frame_bgr.copy() if copy else frame_bgr
+    if iris is not None:
+        cv2.circle(debug_frame, (int(iris[0]), int(iris[1])), 4, (0, 255, 0), -1)
+        if roi is not None:
+            rx0, ry0, rx1, ry1 = roi
+            cv2.rectangle(debug_frame, (rx0, ry0), (rx1, ry1), (255, 128, 0), 1)
+    return debug_frame
+
+
+def landmarks_array(landmarks) -> np.ndarray:
+    """MediaPipe landmark list -> (N, 2) float32 array of (x, y), in one pass."""
+    flat = np.fromiter((v for p in landmarks for v in (p.x, p.y)), dtype=np.float32, count=2 * len(landmarks))
+    return flat.reshape(-1, 2)
+
+
+def eye_feature(pts_px: np.ndarray) -> Tuple[float, float]:
+    """Both irises in their own eye's frame, averaged: (0.5, 0.5) = looking straight at the camera.
+
+    x: iris position along the corner-to-corner axis (0 = first corner in
+    image x order, 1 = second). y: offset from the corner line, across it,
+    in units of the lid opening. Translation, scale and in-plane roll of
+    the head cancel out.
+    """
+    iris, a, b, up, low = pts_px[_EYE_PARTS].astype(np.float64)  # each (2 eyes, xy)
+    ax, ay = (b - a).T
+    ox, oy = (iris - (a + b) * 0.5).T
+    lx, ly = (low - up).T
+    width2 = np.maximum(ax * ax + ay * ay, 1.0)  # degenerate (sub-pixel) eyes read as centred
+    width = np.sqrt(width2)
+    opening = np.maximum(np.sqrt(lx * lx + ly * ly), _MIN_OPENING * width)
+    u = (ox * ax + oy * ay) / width2
+    v = (oy * ax - ox * ay) / (width * opening)  # across the corner line, image-down
+    return 0.5 + 0.5 * float(u[0] + u[1]), 0.5 + 0.5 * float(v[0] + v[1])
+
+
+def head_angles(matrix: np.ndarray) -> Tuple[float, float]:
+    """(yaw, pitch) in radians from a 4x4 facial transformation matrix."""
+    r = matrix[:3, :3]
+    yaw = float(np.arctan2(r[0, 2], r[2, 2]))
+    pitch = float(np.arcsin(np.clip(-r[1, 2], -1.0, 1.0)))
+    return yaw, pitch
+
+
 class EyeProcessor:
     """
     EyeProcessor encapsulates MediaPipe Face Landmarker and
@@ -37,19 +138,14 @@ class EyeProcessor:
 
     def __init__(self) -> None:
         # ---- MediaPipe Tasks Face Landmarker ----
-        base_options = python.BaseOptions(
-            model_asset_path=None  # use default bundled model
-        )
-
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=vision.RunningMode.IMAGE,
-            num_faces=1,
-            output_face_blendshapes=False,
-            output_facial_transformation_matrixes=False,
-        )
-
-        self._detector = vision.FaceLandmarker.create_from_options(options)
+        self._video = config.EYE_RUNNING_MODE == "video"
+        self._roi_tracking = self._video and config.EYE_ROI_TRACKING
+        self._detectors: Dict[str, vision.FaceLandmarker] = {}
+        self._tracks: Dict[str, _FaceTrack] = {}
+        self._feature = config.EYE_GAZE_FEATURE
+        self._head_pose = self._feature == "eye" and config.EYE_HEAD_POSE
+        # IMAGE mode: every frame. VIDEO mode with ROI tracking: full-frame (re)detection only.
+        self._image_detector = None if self._video else self._create_detector(video=False)
 
         # ---- Normalization ranges ----
         self._range_pi = NormalizeRange(
@@ -64,12 +160,58 @@ class EyeProcessor:
             config.PC_Y_MIN,
             config.PC_Y_MAX,
         )
+        self._range_feature = NormalizeRange(
+            config.EYE_FEATURE_X_MIN,
+            config.EYE_FEATURE_X_MAX,
+            config.EYE_FEATURE_Y_MIN,
+            config.EYE_FEATURE_Y_MAX,
+        )
+
+    def _create_detector(self, video: bool) -> vision.FaceLandmarker:
+        base_options = python.BaseOptions(
+            model_asset_path=None  # use default bundled model
+        )
+
+        options = vision.FaceLandmarkerOptions(
+            base_options=base_options,
+            running_mode=vision.RunningMode.VIDEO if video else vision.RunningMode.IMAGE,
+            num_faces=1,
+            min_face_detection_confidence=config.CONFIDENCE,
+            min_face_presence_confidence=config.CONFIDENCE,
+            min_tracking_confidence=config.CONFIDENCE,
+            output_face_blendshapes=False,
+            output_facial_transformation_matrixes=self._head_pose,
+        )
+
+        return vision.FaceLandmarker.create_from_options(options)
+
+    def forget(self, stream: str) -> None:
+        """Release the landmarker and tracking state of a stream that has gone away."""
+        self._tracks.pop(stream, None)
+        detector = self._detectors.pop(stream, None)
+        if detector is not None:
+            detector.close()
+
+    def skip_ratio(self, stream: str) -> float:
+        """Fraction of this stream's frames answered by the motion gate."""
+        track = self._tracks.get(stream)
+        if track is None or track.gate is None:
+            return 0.0
+        return track.gate.skip_ratio
+
+    def debug_marker(self, stream: str) -> Tuple[Optional[Tuple[float, float]], Optional[Box]]:
+        """(iris centre, ROI) of the stream's latest frame, for drawing the marker elsewhere."""
+        track = self._tracks.get(stream)
+        if track is None:
+            return None, None
+        return track.iris, track.roi
 
     def process(
         self,
         frame_bgr: Optional[np.ndarray],
         *,
         source: str,
+        stream: Optional[str] = None,
         draw_debug: bool = True,
     ) -> Tuple[float, float, bool, Optional[np.ndarray]]:
         """
@@ -78,6 +220,7 @@ class EyeProcessor:
         Args:
             frame_bgr: OpenCV BGR frame.
             source: "pi" or "pc" (affects normalization range).
+            stream: Tracking key for this camera (e.g. "pi-2"); defaults to `source`.
             draw_debug: If True, draws a marker at iris center.
 
         Returns:
@@ -87,40 +230,173 @@ class EyeProcessor:
             return 0.5, 0.5, False, None
 
         h, w = frame_bgr.shape[:2]
+        key = stream or source
+        track = self._tracks.get(key)
+        if track is None:
+            hybrid = HybridTracker() if config.EYE_HYBRID_TRACKING else None
+            gate = MotionGate() if config.EYE_MOTION_GATE else None
+            track = self._tracks[key] = _FaceTrack(hybrid=hybrid, gate=gate)
 
-        # ---- Convert to MediaPipe Image ----
-        rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(
-            image_format=mp.ImageFormat.SRGB,
-            data=rgb,
-        )
+        pts_px: Optional[np.ndarray] = None  # EYE_POINTS in full-frame pixels, shape (N, 2)
+        gray = None
+        if track.hybrid is not None or track.gate is not None:
+            gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+
+        # ---- Static eye region: reuse the last result ----
+        static = False
+        if track.gate is not None and track.has_result:
+            static = track.gate.is_static(gray)
+            if static:
+                pts_px = track.last_pts
+
+        # ---- Between keyframes: optical flow on the eye region ----
+        if not static and track.hybrid is not None and not track.hybrid.needs_keyframe():
+            pts_px = track.hybrid.track(gray)
 
-        # ---- Face landmark detection ----
-        result = self._detector.detect(mp_image)
+        # ---- Keyframe: face landmark detection (ROI first, full frame on a miss) ----
+        if pts_px is None and not static:
+            landmarks = None
+            box: Box = (0, 0, w, h)
+            if track.roi is not None:
+                box = track.roi
+                landmarks = self._detect(frame_bgr, box, key, track)
+                if landmarks is None:
+                    track.roi = None
+                    box = (0, 0, w, h)
+            if landmarks is None:
+                landmarks = self._detect(frame_bgr, box, key, track)
+
+            if landmarks is not None:
+                x0, y0, x1, y1 = box
+                # Box-normalized -> full-frame pixels for all landmarks at once.
+                lm_px = landmarks * np.array([x1 - x0, y1 - y0], dtype=np.float32)
+                lm_px += np.array([x0, y0], dtype=np.float32)
+                if self._roi_tracking:
+                    track.roi = self._next_roi(lm_px, track.roi, w, h)
+                pts_px = lm_px[_EYE_IDX]
+            if track.hybrid is not None:
+                track.hybrid.reset(gray, pts_px)
+
+        if track.gate is not None and not static:
+            track.gate.update(gray, self._gate_box(pts_px, w, h))
+            track.last_pts = pts_px
+            track.has_result = True
 
         target_x, target_y = 0.5, 0.5
         detected = False
-        debug_frame = frame_bgr.copy() if draw_debug else None
+        track.iris = None
 
-        if result.face_landmarks:
+        if pts_px is not None:
             detected = True
-            landmarks = result.face_landmarks[0]
+            target_x, target_y = self._gaze_from_points(pts_px, w, h, source, track.head)
+            track.iris = (float(pts_px[0, 0]), float(pts_px[0, 1]))
 
+        debug_frame = draw_debug_marker(frame_bgr, track.iris, track.roi) if draw_debug else None
+        return target_x, target_y, detected, debug_frame
+
+    def _gaze_from_points(
+        self, pts_px: np.ndarray, w: int, h: int, source: str, head: Tuple[float, float] = (0.0, 0.0)
+    ) -> Tuple[float, float]:
+        """Normalized gaze from the tracked eye points (see EYE_GAZE_FEATURE)."""
+        if self._feature == "eye":
+            fx, fy = eye_feature(pts_px)
+            if self._head_pose:
+                fx += config.EYE_HEAD_YAW_GAIN * head[0]
+                fy += config.EYE_HEAD_PITCH_GAIN * head[1]
+            pt_x, pt_y = fx, fy
+            r = self._range_feature
+        else:
             # Iris center landmark (same index as before)
-            pt = landmarks[config.IRIS_LANDMARK_INDEX]
+            pt_x = float(pts_px[0, 0]) / w
+            pt_y = float(pts_px[0, 1]) / h
 
             # Select normalization range
             r = self._range_pi if source == "pi" else self._range_pc
 
-            # Normalize to [0, 1]
-            norm_x = (pt.x - r.x_min) / (r.x_max - r.x_min)
-            norm_y = (pt.y - r.y_min) / (r.y_max - r.y_min)
+        # Normalize to [0, 1]
+        norm_x = (pt_x - r.x_min) / (r.x_max - r.x_min)
+        norm_y = (pt_y - r.y_min) / (r.y_max - r.y_min)
 
-            target_x = max(0.0, min(1.0, norm_x))
-            target_y = max(0.0, min(1.0, norm_y))
+        return max(0.0, min(1.0, norm_x)), max(0.0, min(1.0, norm_y))
 
-            if debug_frame is not None:
-                cx, cy = int(pt.x * w), int(pt.y * h)
-                cv2.circle(debug_frame, (cx, cy), 4, (0, 255, 0), -1)
+    # ---------------- Internals ----------------
+    @staticmethod
+    def _gate_box(pts_px: Optional[np.ndarray], w: int, h: int) -> Optional[Box]:
+        """Eye region around the tracked points for the motion gate; None = whole frame."""
+        if pts_px is None:
+            return None
+        x0, y0 = pts_px.min(axis=0)
+        x1, y1 = pts_px.max(axis=0)
+        pad = max(x1 - x0, y1 - y0) * config.HYBRID_CROP_PADDING
+        return (
+            max(0, int(x0 - pad)),
+            max(0, int(y0 - pad)),
+            min(w, int(x1 + pad) + 1),
+            min(h, int(y1 + pad) + 1),
+        )
 
-        return target_x, target_y, detected, debug_frame
+    def _detect(self, frame_bgr: np.ndarray, box: Box, stream: str, track: _FaceTrack) -> Optional[np.ndarray]:
+        """Run the landmarker on `box` of the frame. Returns (478, 2) box-normalized landmarks or None."""
+        x0, y0, x1, y1 = box
+        crop = frame_bgr[y0:y1, x0:x1]
+        full = box == (0, 0, frame_bgr.shape[1], frame_bgr.shape[0])
+        if not full:
+            long_side = max(x1 - x0, y1 - y0)
+            if long_side > config.EYE_ROI_MAX_SIDE:
+                scale = config.EYE_ROI_MAX_SIDE / long_side
+                crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        # ---- Convert to MediaPipe Image ----
+        rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        mp_image = mp.Image(
+            image_format=mp.ImageFormat.SRGB,
+            data=rgb,
+        )
+
+        if self._video and not (self._roi_tracking and full):
+            detector = self._detectors.get(stream)
+            if detector is not None and track.video_box != box:
+                # Crop moved: the previous-frame prior would land in the wrong place.
+                detector.close()
+                detector = None
+            if detector is None:
+                detector = self._detectors[stream] = self._create_detector(video=True)
+                track.video_box = box
+            # VIDEO mode needs strictly increasing timestamps per landmarker.
+            ts_ms = max(int(time.perf_counter() * 1000), track.last_ts_ms + 1)
+            track.last_ts_ms = ts_ms
+            result = detector.detect_for_video(mp_image, ts_ms)
+        else:
+            if self._image_detector is None:
+                self._image_detector = self._create_detector(video=False)
+            result = self._image_detector.detect(mp_image)
+
+        if not result.face_landmarks:
+            return None
+        if self._head_pose and result.facial_transformation_matrixes:
+            track.head = head_angles(np.asarray(result.facial_transformation_matrixes[0]))
+        return landmarks_array(result.face_landmarks[0])
+
+    @staticmethod
+    def _next_roi(lm_px: np.ndarray, roi: Optional[Box], w: int, h: int) -> Optional[Box]:
+        """Face box + margin for the next frame; keeps `roi` while the face stays well inside it."""
+        (fx0, fy0), (fx1, fy1) = lm_px.min(axis=0), lm_px.max(axis=0)
+        fx0, fy0, fx1, fy1 = float(fx0), float(fy0), float(fx1), float(fy1)
+        face = max(fx1 - fx0, fy1 - fy0)
+        if face < 8:
+            return None
+
+        if roi is not None:
+            rx0, ry0, rx1, ry1 = roi
+            slack = face * config.EYE_ROI_MARGIN * 0.5
+            inside = fx0 - rx0 > slack and rx1 - fx1 > slack and fy0 - ry0 > slack and ry1 - fy1 > slack
+            if inside and (rx1 - rx0) < face * (1.0 + 4.0 * config.EYE_ROI_MARGIN):
+                return roi
+
+        half = face * (0.5 + config.EYE_ROI_MARGIN)
+        cx, cy = (fx0 + fx1) / 2.0, (fy0 + fy1) / 2.0
+        nx0, ny0 = max(0, int(cx - half)), max(0, int(cy - half))
+        nx1, ny1 = min(w, int(cx + half)), min(h, int(cy + half))
+        if nx1 - nx0 < 16 or ny1 - ny0 < 16:
+            return None
+        return nx0, ny0, nx1, ny1
@@ -0,0 +1,157 @@
+"""pc_app/backend/history.py
+Fixed-capacity history of gaze samples in a NumPy structured array.
+
+Every sample the overlay consumes is one `HISTORY_DTYPE` record: capture
+time, source, raw (fused, uncalibrated) gaze, calibrated gaze, the smoothed
+point drawn on screen and the source confidence. The source id is stored
+as bytes (b"pi-1", b"fused", ...), so exported files are self-describing.
+
+The ring buffer is "mirrored": record k lives at `k % capacity` and again at
+`k % capacity + capacity`, so any run of up to `capacity` consecutive
+records is one contiguous slice. Appends are O(1) (two record writes), and
+`latest()` / `between()` return views into the buffer without copying.
+Views alias live storage: a record they show is overwritten `capacity`
+appends later, so copy what you keep longer.
+
+`between()` uses `searchsorted` on the time column, which requires appends
+in non-decreasing time order (older samples are rejected).
+
+`export()` snapshots the buffer on the calling thread (one memcpy) and
+writes it on a short-lived background thread, as a `.npy` file or a
+memory-mapped one; `load_history()` maps such a file back read-only.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import config
+
+HISTORY_DTYPE = np.dtype(
+    [
+        ("t", "<f8"),           # capture time, PC perf_counter clock
+        ("source", "S12"),      # source id, ASCII
+        ("raw", "<f4", (2,)),   # fused gaze before calibration
+        ("calibrated", "<f4", (2,)),
+        ("smoothed", "<f4", (2,)),  # filtered point drawn on screen
+        ("confidence", "<f4"),
+    ]
+)
+
+
+class GazeHistory:
+    """Thread-safe mirrored ring buffer of `HISTORY_DTYPE` records (see module docstring)."""
+
+    def __init__(self, capacity: int = config.HISTORY_CAPACITY) -> None:
+        self.capacity = max(1, int(capacity))
+        self._buf = np.zeros(2 * self.capacity, dtype=HISTORY_DTYPE)
+        self._record = np.zeros((), dtype=HISTORY_DTYPE)
+        self._lock = threading.Lock()
+        self._total = 0  # records ever appended
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
+
+    @property
+    def total(self) -> int:
+        """Records appended since creation (including overwritten ones)."""
+        return self._total
+
+    def append(
+        self,
+        t: float,
+        source: str,
+        raw: Tuple[float, float],
+        calibrated: Tuple[float, float],
+        smoothed: Tuple[float, float],
+        confidence: float = 1.0,
+    ) -> bool:
+        """Add one sample. False (nothing stored) if it is older than the newest record."""
+        rec = self._record
+        with self._lock:
+            if self._total and t < self._buf[self._tail(self._total - 1)]["t"]:
+                return False
+            rec["t"] = t
+            rec["source"] = source.encode("ascii", "replace")
+            rec["raw"] = raw
+            rec["calibrated"] = calibrated
+            rec["smoothed"] = smoothed
+            rec["confidence"] = confidence
+            i = self._total % self.capacity
+            self._buf[i] = rec
+            self._buf[i + self.capacity] = rec
+            self._total += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._total = 0
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """View of the newest `n` records (all retained ones by default), oldest first."""
+        with self._lock:
+            return self._window(n)
+
+    def between(self, t0: float, t1: float, source: Optional[str] = None) -> np.ndarray:
+        """Records with t0 <= t <= t1, oldest first.
+
+        A view, unless `source` is given: selecting one source is a boolean-mask copy.
+        """
+        with self._lock:
+            window = self._window(None)
+            times = window["t"]
+            out = window[int(np.searchsorted(times, t0, side="left")) : int(np.searchsorted(times, t1, side="right"))]
+        if source is not None:
+            out = out[out["source"] == source.encode("ascii", "replace")]
+        return out
+
+    def snapshot(self) -> np.ndarray:
+        """Independent copy of the retained records."""
+        with self._lock:
+            return self._window(None).copy()
+
+    def export(self, path: str, memmap: bool = False) -> threading.Thread:
+        """Write the retained records to `path` (.npy) on a background thread and return it.
+
+        Only the snapshot copy happens on the calling thread. With `memmap`,
+        the file is created with `np.lib.format.open_memmap` and filled
+        through the mapping (the same .npy format, written without an
+        intermediate file buffer).
+        """
+        data = self.snapshot()
+        thread = threading.Thread(target=_write_npy, args=(path, data, memmap), name="history-export", daemon=True)
+        thread.start()
+        return thread
+
+    def _tail(self, k: int) -> int:
+        return k % self.capacity
+
+    def _window(self, n: Optional[int]) -> np.ndarray:
+        size = len(self) if n is None else max(0, min(int(n), len(self)))
+        start = self._tail(self._total - size)
+        return self._buf[start : start + size]
+
+
+def _write_npy(path: str, data: np.ndarray, memmap: bool) -> None:
+    tmp = path + ".tmp"
+    try:
+        if memmap:
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=data.dtype, shape=data.shape)
+            out[...] = data
+            out.flush()
+            del out
+        else:
+            with open(tmp, "wb") as f:
+                np.save(f, data)
+        os.replace(tmp, path)
+        print(f"[History] Exported {len(data)} samples to {path}")
+    except OSError as e:
+        print(f"[History] Could not export {path}: {e}")
+
+
+def load_history(path: str, mmap: bool = True) -> np.ndarray:
+    """Records from an exported file; memory-mapped read-only by default."""
+    return np.load(path, mmap_mode="r" if mmap else None)
@@ -0,0 +1,100 @@
+"""pc_app/backend/hybrid_tracker.py
+Sparse landmark inference with optical-flow eye tracking in between.
+
+Full Face Landmarker inference runs only on keyframes. On the frames in
+between, the iris, eye-corner and eyelid points from the last keyframe are
+tracked with pyramidal Lucas-Kanade on a small grayscale crop around the
+eyes. A forward-backward check measures tracking error.
+
+The keyframe interval K adapts per stream:
+- large motion or rising tracking error halves K (down to HYBRID_K_MIN),
+- calm, well-tracked frames let it grow by one (up to HYBRID_K_MAX),
+- a lost track (failed point or error above HYBRID_LOST_ERROR_PX) forces a
+  keyframe on the same frame.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+# Tracked landmarks: iris centres first (index 0 drives the legacy gaze output),
+# then eye corners (outer/inner, right eye then left eye) and upper/lower lids.
+EYE_POINTS = (config.IRIS_LANDMARK_INDEX, 473, 33, 133, 362, 263, 159, 145, 386, 374)
+
+_LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+
+
+class HybridTracker:
+    """Keyframe scheduler + LK point tracker for one camera stream."""
+
+    def __init__(self) -> None:
+        self.k = config.HYBRID_K_MAX
+        self._since_key = 0
+        self._prev_crop: Optional[np.ndarray] = None
+        self._box: Optional[Tuple[int, int, int, int]] = None
+        self._pts: Optional[np.ndarray] = None  # (N, 1, 2) float32, crop pixels
+        self.tracked = 0
+        self.keyframes = 0
+
+    def needs_keyframe(self) -> bool:
+        return self._pts is None or self._since_key >= self.k
+
+    def reset(self, gray: np.ndarray, pts_px: Optional[np.ndarray]) -> None:
+        """Start tracking from keyframe points (full-frame pixels, shape (N, 2)); None = no face."""
+        self.keyframes += 1
+        self._since_key = 0
+        if pts_px is None:
+            self._pts = None
+            self._prev_crop = None
+            return
+
+        h, w = gray.shape[:2]
+        x0, y0 = pts_px.min(axis=0)
+        x1, y1 = pts_px.max(axis=0)
+        pad = max(x1 - x0, y1 - y0) * config.HYBRID_CROP_PADDING + _LK_PARAMS["winSize"][0]
+        bx0, by0 = max(0, int(x0 - pad)), max(0, int(y0 - pad))
+        bx1, by1 = min(w, int(x1 + pad) + 1), min(h, int(y1 + pad) + 1)
+        self._box = (bx0, by0, bx1, by1)
+        self._prev_crop = gray[by0:by1, bx0:bx1].copy()
+        self._pts = (pts_px - (bx0, by0)).astype(np.float32).reshape(-1, 1, 2)
+
+    def track(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Advance the points to `gray`. Returns (N, 2) full-frame pixels, or None when lost."""
+        if self._pts is None or self._prev_crop is None or self._box is None:
+            return None
+        bx0, by0, bx1, by1 = self._box
+        crop = gray[by0:by1, bx0:bx1]
+        if crop.shape != self._prev_crop.shape:
+            self._pts = None
+            return None
+
+        nxt, st, _ = cv2.calcOpticalFlowPyrLK(self._prev_crop, crop, self._pts, None, **_LK_PARAMS)
+        back, st_back, _ = cv2.calcOpticalFlowPyrLK(crop, self._prev_crop, nxt, None, **_LK_PARAMS)
+        ok = (st.ravel() == 1) & (st_back.ravel() == 1)
+        fb_error = float(np.median(np.linalg.norm((back - self._pts).reshape(-1, 2), axis=1)))
+
+        if not ok.all() or fb_error > config.HYBRID_LOST_ERROR_PX:
+            self.k = max(config.HYBRID_K_MIN, self.k // 2)
+            self._pts = None
+            return None
+
+        motion = float(np.median(np.linalg.norm((nxt - self._pts).reshape(-1, 2), axis=1)))
+        if motion > config.HYBRID_MOTION_PX or fb_error > config.HYBRID_LOST_ERROR_PX * 0.5:
+            self.k = max(config.HYBRID_K_MIN, self.k // 2)
+        elif self.k < config.HYBRID_K_MAX:
+            self.k += 1
+
+        self._prev_crop = crop.copy()
+        self._pts = nxt
+        self._since_key += 1
+        self.tracked += 1
+        return nxt.reshape(-1, 2) + (bx0, by0)
@@ -0,0 +1,304 @@
+"""pc_app/backend/inference.py
+The one decode + inference backend for every camera head in the process.
+
+    submit_jpeg()  -> [jpeg mailbox] -> decoder -> [frame mailbox] -> inference
+    submit_frame() --------------------------------^
+
+Pi heads hand over JPEGs; the PC webcam hands over decoded frames. Both
+mailboxes keep only the newest frame per source, so no head can queue up
+stale frames. The frame mailbox is scheduled by weighted waiting time:
+sources whose last frame had a face get `config.INFERENCE_FACE_PRIORITY`,
+and a waiting source's claim grows until it is served.
+
+Inference backends (config.INFERENCE_BACKEND):
+- "thread": one `EyeProcessor` and one inference thread serve all sources.
+- "process": `INFERENCE_WORKERS` worker processes (see workers.py), each
+  with its own frame mailbox ("lane") and dispatch thread. A source is
+  pinned to the least-loaded lane when it is added, so its tracking state
+  lives in exactly one worker.
+
+Each Pi stage records the sample's age into `shared.latency`. When
+`config.RECORD_DIR` is set, every Pi JPEG stream is also teed to disk
+(see recording.py). Per-source throughput (fps, inference time, drops) is
+published in `shared.sources` and printed with the latency report.
+
+With `config.SHOW_DEBUG_VIEW`, the marked-up frame of the PC camera and of
+the primary Pi is rendered into a small RGB preview here, once per processed
+frame and off the UI thread.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import config
+
+from .state import SharedState, SourceStatus, source_kind
+from .slots import GazeSample
+from .eye_processor import EyeProcessor, draw_debug_marker
+from .pipeline import LatestPerSource
+from .transport import Frame, FrameMeta
+from .recording import FrameRecorder
+from .fps import FPSCounter
+from .workers import WorkerClient
+
+_STAGE_WAIT_SEC = 0.5
+_INFER_MS_ALPHA = 0.1  # EMA weight of the per-source inference time
+_CONFIDENCE_ALPHA = 0.1  # EMA weight of the per-source detection rate
+
+
+def _decode_jpeg(jpeg_bytes) -> Optional[np.ndarray]:
+    # Accepts bytes or a memoryview into a pooled buffer (no copy either way).
+    arr = np.frombuffer(jpeg_bytes, dtype=np.uint8)
+    frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+    return frame
+
+
+@dataclass
+class _Lane:
+    """One inference thread, its processor and the mailbox of the sources pinned to it."""
+
+    processor: object  # EyeProcessor or WorkerClient
+    frames: LatestPerSource[Tuple[np.ndarray, FrameMeta]] = field(default_factory=LatestPerSource)
+    forget: List[str] = field(default_factory=list)  # processor state to drop, on the lane thread
+    sources: int = 0
+
+
+class InferenceService:
+    def __init__(self, shared: SharedState, processor: Optional[EyeProcessor] = None) -> None:
+        self.shared = shared
+        self._workers: List[WorkerClient] = []
+        if processor is None and config.INFERENCE_BACKEND == "process":
+            self._workers = [WorkerClient(i) for i in range(max(1, config.INFERENCE_WORKERS))]
+            self._lanes = [_Lane(worker) for worker in self._workers]
+        else:
+            self._lanes = [_Lane(processor or EyeProcessor())]
+        self._lane_of: Dict[str, _Lane] = {}
+        self._threads: List[threading.Thread] = []
+        self._jpegs: LatestPerSource[Frame] = LatestPerSource()
+        self._fps: Dict[str, FPSCounter] = {}
+        self._last_seq: Dict[str, int] = {}
+        self._lost: Dict[str, int] = {}
+        self._last_report = time.perf_counter()
+        self._recorders: Dict[str, FrameRecorder] = {}
+        self._forget_lock = threading.Lock()
+        self._infer_ms: Dict[str, float] = {}
+        self._confidence: Dict[str, float] = {}  # recent detection rate per source
+        self._processed: Dict[str, int] = {}
+
+    def start(self) -> None:
+        for worker in self._workers:
+            worker.start()
+        if self._workers:
+            print(f"[Backend] Started {len(self._workers)} inference worker process(es).")
+        self._threads = [threading.Thread(target=self._decode_loop, name="decode", daemon=True)]
+        for i, lane in enumerate(self._lanes):
+            self._threads.append(
+                threading.Thread(target=self._inference_loop, args=(lane,), name=f"inference-{i}", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        """Stop worker processes (after `shared.running` went False)."""
+        for thread in self._threads:
+            thread.join(timeout=_STAGE_WAIT_SEC + config.WORKER_TIMEOUT_SEC)
+        for worker in self._workers:
+            worker.close()
+
+    # ---------------- Producer API (any thread) ----------------
+    def submit_jpeg(self, source: str, jpeg: Frame) -> None:
+        """Hand over a received JPEG. Never blocks; replaces an undecoded older one."""
+        meta = jpeg.meta
+        latency = self.shared.latency
+        latency.record("recv", meta.capture_ts, meta.recv_ts)
+        if meta.version >= 2:
+            latency.record_encode(meta.encode_ms)
+            last = self._last_seq.get(source)
+            if last is not None and meta.seq > last + 1:
+                gap = meta.seq - last - 1
+                self._lost[source] = self._lost.get(source, 0) + gap
+                latency.count_frames(lost=gap)
+            self._last_seq[source] = meta.seq
+
+        recorder = self._recorders.get(source)
+        if recorder is not None:
+            recorder.write(jpeg)
+
+        stale = self._jpegs.put(source, jpeg)
+        if stale is not None:
+            stale.release()
+            latency.count_frames(dropped=1)
+
+    def submit_frame(self, source: str, frame: np.ndarray, meta: FrameMeta) -> None:
+        """Hand over an already decoded BGR frame. Never blocks; replaces an unprocessed older one."""
+        self._lane(source).frames.put(source, (frame, meta))
+
+    def has_pending(self, source: str) -> bool:
+        """True while a submitted JPEG from `source` has not been taken by the decoder."""
+        return self._jpegs.has_pending(source)
+
+    def add_source(self, source: str) -> None:
+        if config.RECORD_DIR and source_kind(source) == "pi":
+            self._recorders[source] = FrameRecorder.for_source(config.RECORD_DIR, source)
+        lane = min(self._lanes, key=lambda l: l.sources)
+        lane.sources += 1
+        self._lane_of[source] = lane
+        with self.shared.lock:
+            self.shared.sources[source] = SourceStatus()
+
+    def remove_source(self, source: str) -> None:
+        jpeg = self._jpegs.discard(source)
+        if jpeg is not None:
+            jpeg.release()
+        lane = self._lane_of.pop(source, None)
+        if lane is not None:
+            lane.sources -= 1
+        else:
+            lane = self._lanes[0]
+        lane.frames.discard(source)
+        self._fps.pop(source, None)
+        self._last_seq.pop(source, None)
+        self._lost.pop(source, None)
+        self._infer_ms.pop(source, None)
+        self._confidence.pop(source, None)
+        self._processed.pop(source, None)
+        with self._forget_lock:
+            lane.forget.append(source)
+        recorder = self._recorders.pop(source, None)
+        if recorder is not None:
+            threading.Thread(target=recorder.close, name="recorder-close", daemon=True).start()
+        with self.shared.lock:
+            self.shared.sources.pop(source, None)
+
+    # ---------------- Stages ----------------
+    def _decode_loop(self) -> None:
+        while self.shared.running:
+            item = self._jpegs.get(timeout=_STAGE_WAIT_SEC)
+            if item is None:
+                continue
+            source, jpeg = item
+            meta = jpeg.meta
+            try:
+                frame = _decode_jpeg(jpeg.view)
+            finally:
+                jpeg.release()
+            if frame is None:
+                continue
+            self.shared.latency.record("decode", meta.capture_ts)
+            if self._lane(source).frames.put(source, (frame, meta)) is not None:
+                self.shared.latency.count_frames(dropped=1)
+
+    def _inference_loop(self, lane: _Lane) -> None:
+        while self.shared.running:
+            item = lane.frames.get(timeout=_STAGE_WAIT_SEC)
+            self._drop_forgotten(lane)
+            if item is None:
+                continue
+            source, (frame, meta) = item
+
+            kind = source_kind(source)
+            t0 = time.perf_counter()
+            tx, ty, detected, _ = lane.processor.process(frame, source=kind, stream=source, draw_debug=False)
+            infer_ms = (time.perf_counter() - t0) * 1000.0
+            debug_frame = None
+            if config.SHOW_DEBUG_VIEW and (source == "pc" or source == self.shared.pi_primary):
+                # Only these two get a preview (see _publish). The frame is ours
+                # alone: mark it in place rather than copying it.
+                debug_frame = draw_debug_marker(frame, *lane.processor.debug_marker(source), copy=False)
+            if kind == "pi":
+                self.shared.latency.record("inference", meta.capture_ts)
+            lane.frames.set_priority(source, config.INFERENCE_FACE_PRIORITY if detected else 1.0)
+            self._account(source, infer_ms, detected)
+            self._publish(lane, source, tx, ty, detected, debug_frame, meta.capture_ts)
+            self._maybe_report()
+
+    def _lane(self, source: str) -> _Lane:
+        return self._lane_of.get(source) or self._lanes[0]
+
+    def _account(self, source: str, infer_ms: float, detected: bool) -> None:
+        self._processed[source] = self._processed.get(source, 0) + 1
+        prev = self._infer_ms.get(source)
+        self._infer_ms[source] = infer_ms if prev is None else prev + _INFER_MS_ALPHA * (infer_ms - prev)
+        conf = self._confidence.get(source, 1.0)
+        self._confidence[source] = conf + _CONFIDENCE_ALPHA * (float(detected) - conf)
+
+    def _drop_forgotten(self, lane: _Lane) -> None:
+        if not lane.forget:
+            return
+        with self._forget_lock:
+            gone, lane.forget = lane.forget, []
+        for source in gone:
+            lane.processor.forget(source)
+
+    def _maybe_report(self) -> None:
+        if config.LATENCY_REPORT_SEC <= 0:
+            return
+        now = time.perf_counter()
+        if now - self._last_report >= config.LATENCY_REPORT_SEC:
+            self._last_report = now
+            print(f"[Backend] Pi latency {self.shared.latency.report()}")
+            with self.shared.lock:
+                rows = [
+                    f"{source} {st.fps} fps {st.infer_ms:.1f} ms dropped {st.dropped} skip {st.skip_ratio:.0%}"
+                    for source, st in self.shared.sources.items()
+                ]
+            if rows:
+                print(f"[Backend] Sources: {' | '.join(rows)}")
+
+    def _publish(
+        self,
+        lane: _Lane,
+        source: str,
+        tx: float,
+        ty: float,
+        detected: bool,
+        debug_frame: Optional[np.ndarray],
+        capture_ts: float,
+    ) -> None:
+        fps = self._fps.setdefault(source, FPSCounter()).tick()
+        dropped = self._jpegs.dropped.get(source, 0) + lane.frames.dropped.get(source, 0)
+
+        with self.shared.lock:
+            status = self.shared.sources.get(source)
+            if status is None:
+                # Source disconnected while its last frame was in flight.
+                return
+            primary = source == self.shared.pi_primary
+            if fps is not None:
+                status.fps = fps
+                status.dropped = dropped
+                status.lost = self._lost.get(source, 0)
+                status.skip_ratio = lane.processor.skip_ratio(source)
+                status.infer_ms = self._infer_ms.get(source, 0.0)
+                status.processed = self._processed.get(source, 0)
+                if source == "pc":
+                    self.shared.pc_fps = status.fps
+                    self.shared.pc_skip_ratio = status.skip_ratio
+                elif primary:
+                    self.shared.pi_fps = status.fps
+                    self.shared.pi_dropped = status.dropped
+                    self.shared.pi_skip_ratio = status.skip_ratio
+
+        # Samples and frames are published outside the lock.
+        if detected:
+            sample = GazeSample(tx, ty, True, capture_ts, self._confidence.get(source, 1.0))
+        else:
+            last = status.gaze.read()[1]
+            sample = GazeSample(last.x, last.y, False, capture_ts, self._confidence.get(source, 0.0))
+        status.gaze.publish(sample)
+        if source == "pc":
+            self.shared.pc_gaze.publish(sample)
+            if debug_frame is not None:
+                self.shared.pc_preview.publish(debug_frame)
+            self.shared.ui_wakeup.signal()
+        elif primary:
+            self.shared.pi_gaze.publish(sample)
+            if debug_frame is not None:
+                self.shared.pi_preview.publish(debug_frame)
+            self.shared.ui_wakeup.signal()
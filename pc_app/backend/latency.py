@@ -0,0 +1,111 @@
+"""pc_app/backend/latency.py
+End-to-end latency accounting for gaze samples.
+
+Every stage records the time elapsed since the frame was captured on the Pi
+(or received, for protocol v1 / the PC webcam), so each histogram answers
+"how old is a sample by the time it leaves this stage?":
+
+    recv -> decode -> inference -> ui
+
+Histograms use fixed log-spaced buckets: O(1) record, no per-sample storage.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+STAGES = ("recv", "decode", "inference", "ui")
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of millisecond values (~6% bucket resolution)."""
+
+    def __init__(self, min_ms: float = 0.1, max_ms: float = 10_000.0, buckets_per_decade: int = 40) -> None:
+        self._min_ms = min_ms
+        self._scale = buckets_per_decade
+        self._n = int(math.ceil(math.log10(max_ms / min_ms) * buckets_per_decade)) + 1
+        self._counts: List[int] = [0] * self._n
+        self.count = 0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        if ms <= self._min_ms:
+            idx = 0
+        else:
+            idx = min(self._n - 1, int(math.log10(ms / self._min_ms) * self._scale))
+        self._counts[idx] += 1
+        self.count += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th percentile (0 if empty)."""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for idx, c in enumerate(self._counts):
+            seen += c
+            if seen >= rank and c:
+                return min(self.max_ms, self._min_ms * 10 ** ((idx + 1) / self._scale))
+        return self.max_ms
+
+    def reset(self) -> None:
+        self._counts = [0] * self._n
+        self.count = 0
+        self.max_ms = 0.0
+
+
+class PipelineLatency:
+    """Thread-safe set of per-stage histograms plus frame counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hist: Dict[str, LatencyHistogram] = {s: LatencyHistogram() for s in STAGES}
+        self.encode = LatencyHistogram()
+        self.dropped = 0  # replaced by a newer frame before inference
+        self.lost = 0     # sequence-number gaps (never reached the PC)
+
+    def record(self, stage: str, capture_ts: float, now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.perf_counter()
+        ms = (now - capture_ts) * 1000.0
+        with self._lock:
+            self._hist[stage].record(ms)
+
+    def record_encode(self, ms: float) -> None:
+        with self._lock:
+            self.encode.record(ms)
+
+    def count_frames(self, dropped: int = 0, lost: int = 0) -> None:
+        with self._lock:
+            self.dropped += dropped
+            self.lost += lost
+
+    def percentile(self, stage: str, q: float) -> float:
+        with self._lock:
+            return self._hist[stage].percentile(q)
+
+    def summary(self) -> Dict[str, Tuple[float, float, float]]:
+        """{stage: (p50, p95, p99)} in milliseconds."""
+        with self._lock:
+            out = {s: (h.percentile(50), h.percentile(95), h.percentile(99)) for s, h in self._hist.items()}
+            out["encode"] = (self.encode.percentile(50), self.encode.percentile(95), self.encode.percentile(99))
+        return out
+
+    def report(self) -> str:
+        parts = [f"{stage} {p50:.0f}/{p95:.0f}/{p99:.0f}" for stage, (p50, p95, p99) in self.summary().items()]
+        with self._lock:
+            counts = f"dropped {self.dropped} lost {self.lost}"
+        return "p50/p95/p99 ms: " + ", ".join(parts) + f" | {counts}"
+
+    def reset(self) -> None:
+        with self._lock:
+            for h in self._hist.values():
+                h.reset()
+            self.encode.reset()
+            self.dropped = 0
+            self.lost = 0
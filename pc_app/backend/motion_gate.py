@@ -0,0 +1,69 @@
+"""pc_app/backend/motion_gate.py
+Cheap frame-differencing gate in front of landmark inference.
+
+The eye region (or the whole frame when no face is known) is downscaled to
+a tiny grayscale patch and compared with the patch of the last frame that
+was actually processed. Below `config.MOTION_GATE_THRESHOLD` mean absolute
+difference, the caller reuses its previous result. Comparing against the
+last processed frame (not the previous one) means slow drift still adds
+up to a refresh, and `MOTION_GATE_MAX_SKIP` bounds how long a result can
+be reused. The reference region is where the eyes were on that processed
+frame, so a head moving the eyes out of it registers as motion.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+
+
+class MotionGate:
+    def __init__(self) -> None:
+        self._ref: Optional[np.ndarray] = None
+        self._box: Optional[Tuple[int, int, int, int]] = None  # region of the reference patch
+        self._patch = np.empty((config.MOTION_GATE_SIZE[1], config.MOTION_GATE_SIZE[0]), dtype=np.uint8)
+        self._diff = np.empty_like(self._patch)
+        self._consecutive = 0
+        self.frames = 0
+        self.skipped = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def is_static(self, gray: np.ndarray) -> bool:
+        """True if the reference region barely changed since the last processed frame."""
+        self.frames += 1
+        if self._ref is None or self._consecutive >= config.MOTION_GATE_MAX_SKIP:
+            return False
+        if not self._extract(gray, self._box):
+            return False
+        cv2.absdiff(self._patch, self._ref, dst=self._diff)
+        if float(self._diff.mean()) >= config.MOTION_GATE_THRESHOLD:
+            return False
+        self._consecutive += 1
+        self.skipped += 1
+        return True
+
+    def update(self, gray: np.ndarray, box: Optional[Tuple[int, int, int, int]]) -> None:
+        """Take `box` of a processed frame (x0, y0, x1, y1; None = whole frame) as the new reference."""
+        self._consecutive = 0
+        if not self._extract(gray, box):
+            self._ref = None
+            return
+        self._box = box
+        if self._ref is None:
+            self._ref = self._patch.copy()
+        else:
+            np.copyto(self._ref, self._patch)
+
+    def _extract(self, gray: np.ndarray, box: Optional[Tuple[int, int, int, int]]) -> bool:
+        region = gray if box is None else gray[box[1] : box[3], box[0] : box[2]]
+        if region.size == 0:
+            return False
+        cv2.resize(region, config.MOTION_GATE_SIZE, dst=self._patch, interpolation=cv2.INTER_AREA)
+        return True
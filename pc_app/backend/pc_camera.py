@@ -1,22 +1,29 @@
 """pc_app/backend/pc_camera.py
-Captures frames from the Windows PC webcam and updates SharedState.
+Captures frames from the Windows PC webcam and feeds them to the shared
+`InferenceService` as source "pc".
 Only runs when `shared.pi_connected` is True.
 """
 
 from __future__ import annotations
 
 import time
+from typing import Optional
+
 import cv2
 import config
 
-from .state import SharedState
-from .eye_processor import EyeProcessor
-from .fps import FPSCounter
+from .state import SharedState, clear_slots
+from .inference import InferenceService
+from .transport import FrameMeta
+
+SOURCE = "pc"
 
 
-def run_pc_camera(shared: SharedState) -> None:
-    processor = EyeProcessor()
-    fps = FPSCounter()
+def run_pc_camera(shared: SharedState, service: Optional[InferenceService] = None) -> None:
+    """Thread entry: webcam capture. Pass the app's `service` so both cameras share one model."""
+    if service is None:
+        service = InferenceService(shared)
+        service.start()
     cap = None
 
     print("[Backend] PC camera thread ready (waiting for Pi trigger)...")
@@ -31,9 +38,9 @@ def run_pc_camera(shared: SharedState) -> None:
                 print("[Backend] Pi disconnected -> stopping PC camera.")
                 cap.release()
                 cap = None
-                with shared.lock:
-                    shared.pc_frame = None
-                    shared.pc_has_face = False
+                service.remove_source(SOURCE)
+                clear_slots(shared.pc_gaze, shared.pc_preview)
+                shared.ui_wakeup.signal()
             time.sleep(0.5)
             continue
 
@@ -44,29 +51,20 @@ def run_pc_camera(shared: SharedState) -> None:
                 cap = cv2.VideoCapture(0)
             if not cap.isOpened():
                 print("[Backend] Failed to open PC camera.")
+                cap = None
                 time.sleep(2.0)
                 continue
+            service.add_source(SOURCE)
 
         ret, frame = cap.read()
         if not ret:
             time.sleep(0.1)
             continue
+        now = time.perf_counter()
 
         frame = cv2.flip(frame, 1)
-
-        tx, ty, detected, debug_frame = processor.process(frame, source="pc", draw_debug=True)
-
-        with shared.lock:
-            shared.pc_has_face = detected
-            if detected:
-                shared.pc_target_x = tx
-                shared.pc_target_y = ty
-            shared.pc_frame = debug_frame
-
-        maybe_fps = fps.tick()
-        if maybe_fps is not None:
-            with shared.lock:
-                shared.pc_fps = maybe_fps
+        service.submit_frame(SOURCE, frame, FrameMeta(capture_ts=now, recv_ts=now))
 
     if cap is not None:
         cap.release()
+        service.remove_source(SOURCE)
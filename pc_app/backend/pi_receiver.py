@@ -1,121 +1,125 @@
 """pc_app/backend/pi_receiver.py
-Receives JPEG frames from Raspberry Pi via TCP and updates SharedState.
+Receives JPEG frames from one or more Raspberry Pi heads via TCP and feeds
+them to the shared `InferenceService`.
+
+An asyncio server accepts up to `config.MAX_PI_CLIENTS` concurrent streams.
+Each connection reads into its own buffer pool and is tagged with a source id
+("pi-1", "pi-2", ...). Connections never wait on inference: the service
+keeps only the newest frame per source, so a slow or bursty client cannot
+stall the others.
 """
 
 from __future__ import annotations
 
-import socket
-import time
-from typing import Optional, Tuple
+import asyncio
+import itertools
+from typing import Dict, Optional
 
-import cv2
-import numpy as np
 import config
 
-from .state import SharedState
-from .eye_processor import EyeProcessor
-from .transport import recv_jpeg_frame
-from .fps import FPSCounter
-
-
-def _decode_jpeg(jpeg_bytes: bytes) -> Optional[np.ndarray]:
-    arr = np.frombuffer(jpeg_bytes, dtype=np.uint8)
-    frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    return frame
-
-
-def run_pi_receiver(shared: SharedState) -> None:
-    """Thread entry: TCP server waiting for Pi connection and receiving frames."""
-    processor = EyeProcessor()
-    fps = FPSCounter()
-
-    server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
+from .state import SharedState, clear_slots
+from .inference import InferenceService
+from .transport import BufferPool, Frame, FrameProtocol
+
+_POLL_RUNNING_SEC = 0.5
+
+
+class _PiServer:
+    def __init__(self, shared: SharedState, service: InferenceService) -> None:
+        self.shared = shared
+        self.service = service
+        self._ids = itertools.count(1)
+        self._connections: Dict[str, asyncio.BaseTransport] = {}
+
+    def make_protocol(self) -> asyncio.BufferedProtocol:
+        return _PiConnection(self)
+
+    def on_connect(self, transport: asyncio.BaseTransport) -> Optional[str]:
+        addr = transport.get_extra_info("peername")
+        if len(self._connections) >= config.MAX_PI_CLIENTS:
+            print(f"[Backend] Rejecting Pi {addr}: {config.MAX_PI_CLIENTS} already connected.")
+            transport.close()
+            return None
+
+        source = f"pi-{next(self._ids)}"
+        self._connections[source] = transport
+        self.service.add_source(source)
+        with self.shared.lock:
+            self.shared.pi_connected = True
+            if self.shared.pi_primary is None:
+                self.shared.pi_primary = source
+        self.shared.ui_wakeup.signal()
+        print(f"[Backend] Pi connected from: {addr} (source {source})")
+        return source
+
+    def on_disconnect(self, source: str) -> None:
+        self._connections.pop(source, None)
+        self.service.remove_source(source)
+        with self.shared.lock:
+            was_primary = self.shared.pi_primary == source
+            if was_primary:
+                # Promote the longest-connected remaining head.
+                self.shared.pi_primary = next(iter(self._connections), None)
+            self.shared.pi_connected = bool(self._connections)
+        if was_primary:
+            clear_slots(self.shared.pi_gaze, self.shared.pi_preview)
+        self.shared.ui_wakeup.signal()
+        print(f"[Backend] Pi disconnected (source {source}).")
+
+    def close_all(self) -> None:
+        for transport in list(self._connections.values()):
+            transport.close()
+
+
+class _PiConnection(FrameProtocol):
+    def __init__(self, server: _PiServer) -> None:
+        super().__init__(self._on_frame, self._on_close, BufferPool())
+        self._server = server
+        self._source: Optional[str] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        super().connection_made(transport)
+        self._source = self._server.on_connect(transport)
+
+    def _on_frame(self, frame: Frame) -> None:
+        if self._source is None:
+            frame.release()
+            return
+        self._server.service.submit_jpeg(self._source, frame)
+
+    def _on_close(self, exc: Optional[Exception]) -> None:
+        if self._source is not None:
+            self._server.on_disconnect(self._source)
+            self._source = None
+
+
+async def _serve(shared: SharedState, service: InferenceService) -> None:
+    loop = asyncio.get_running_loop()
+    server = _PiServer(shared, service)
     try:
-        server_sock.bind((config.TCP_IP, config.TCP_PORT))
-        server_sock.listen(1)
-        print(f"[Backend] Waiting for Pi connection on port {config.TCP_PORT}...")
+        listener = await loop.create_server(
+            server.make_protocol, config.TCP_IP, config.TCP_PORT, reuse_address=True
+        )
     except Exception as e:
         print(f"[Backend] Bind error: {e}")
         return
 
-    conn: Optional[socket.socket] = None
-
-    while shared.running:
-        if conn is None:
-            # accept
-            server_sock.settimeout(1.0)
-            try:
-                conn, addr = server_sock.accept()
-                print(f"[Backend] Pi connected from: {addr}")
-                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                conn.settimeout(5.0)
-                with shared.lock:
-                    shared.pi_connected = True
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"[Backend] Accept error: {e}")
-                continue
-
-        try:
-            jpeg = recv_jpeg_frame(conn)
-            if not jpeg:
-                raise ConnectionResetError()
-
-            frame = _decode_jpeg(jpeg)
-            if frame is None:
-                continue
-
-            # Throttle processing
-            # Keep it simple: process every N frames by counting at receiver level
-            # (To avoid storing counter in shared, store local)
-            run_pi_receiver._frame_count = getattr(run_pi_receiver, "_frame_count", 0) + 1  # type: ignore[attr-defined]
-            if run_pi_receiver._frame_count % config.PROCESS_EVERY_N_FRAMES != 0:  # type: ignore[attr-defined]
-                continue
-
-            tx, ty, detected, debug_frame = processor.process(frame, source="pi", draw_debug=True)
-
-            with shared.lock:
-                shared.pi_has_face = detected
-                if detected:
-                    shared.pi_target_x = tx
-                    shared.pi_target_y = ty
-                shared.pi_frame = debug_frame
-
-            maybe_fps = fps.tick()
-            if maybe_fps is not None:
-                with shared.lock:
-                    shared.pi_fps = maybe_fps
-
-        except (ConnectionResetError, BrokenPipeError, socket.timeout):
-            print("[Backend] Pi disconnected.")
-            if conn:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-            conn = None
-            with shared.lock:
-                shared.pi_connected = False
-        except Exception as e:
-            print(f"[Backend] Pi stream error: {e}")
-            if conn:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-            conn = None
-            with shared.lock:
-                shared.pi_connected = False
-
-    if conn:
-        try:
-            conn.close()
-        except Exception:
-            pass
+    print(f"[Backend] Waiting for Pi connections on port {config.TCP_PORT}...")
     try:
-        server_sock.close()
-    except Exception:
-        pass
+        while shared.running:
+            await asyncio.sleep(_POLL_RUNNING_SEC)
+    finally:
+        listener.close()
+        server.close_all()
+        await listener.wait_closed()
+
+
+def run_pi_receiver(shared: SharedState, service: Optional[InferenceService] = None) -> None:
+    """Thread entry: asyncio TCP server for Pi connections.
+
+    `service` lets benchmarks supply their own (already started) backend.
+    """
+    if service is None:
+        service = InferenceService(shared)
+        service.start()
+    asyncio.run(_serve(shared, service))
@@ -0,0 +1,126 @@
+"""pc_app/backend/pipeline.py
+Latest-frame-wins hand-off between pipeline stages.
+
+A stage that falls behind never builds up a queue: putting a new item into a
+`LatestSlot` replaces whatever the consumer has not picked up yet, and the
+replaced item is counted as a drop. Latency between stages is therefore
+bounded by one item.
+
+`LatestPerSource` multiplexes several producers onto one consumer. Sources
+are picked by weighted waiting time (priority x seconds pending), so a
+higher-priority source goes first while a waiting low-priority one ages
+until it is served; with equal priorities that is plain arrival order.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LatestSlot(Generic[T]):
+    """Single-item mailbox: the producer overwrites, the consumer blocks."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._item: Optional[T] = None
+        self._has_item = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item: T) -> Optional[T]:
+        """Publish `item`. Returns the stale item it replaced (or None)."""
+        with self._cond:
+            stale = self._item if self._has_item else None
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self.put_count += 1
+            self._cond.notify()
+        return stale
+
+    def get(self, timeout: Optional[float] = None) -> Optional[T]:
+        """Take the newest item, waiting up to `timeout`. Returns None on timeout."""
+        with self._cond:
+            if not self._has_item:
+                self._cond.wait(timeout)
+                if not self._has_item:
+                    return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def clear(self) -> Optional[T]:
+        """Discard a pending item without counting it as a drop."""
+        with self._cond:
+            stale = self._item if self._has_item else None
+            self._item = None
+            self._has_item = False
+            return stale
+
+
+class LatestPerSource(Generic[T]):
+    """Keyed `LatestSlot`: one pending item per source, served by weighted wait.
+
+    A source that already has a pending item keeps its waiting time when the
+    item is replaced, so a fast source cannot starve a slow one.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._items: Dict[str, T] = {}
+        self._since: Dict[str, float] = {}  # when the source's pending item first arrived
+        self._priority: Dict[str, float] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def set_priority(self, source: str, priority: float) -> None:
+        """Scheduling weight for `source` (default 1.0)."""
+        with self._cond:
+            self._priority[source] = priority
+
+    def put(self, source: str, item: T) -> Optional[T]:
+        """Publish `item` for `source`. Returns the stale item it replaced (or None)."""
+        with self._cond:
+            stale = self._items.get(source)
+            if stale is not None:
+                self.dropped[source] = self.dropped.get(source, 0) + 1
+            else:
+                self._since[source] = time.perf_counter()
+            self._items[source] = item
+            self._cond.notify()
+        return stale
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, T]]:
+        """Take the newest item of the source with the highest weighted wait. None on timeout."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+                if not self._items:
+                    return None
+            if len(self._items) == 1:
+                source = next(iter(self._items))
+            else:
+                now = time.perf_counter()
+                source = max(
+                    self._items,
+                    key=lambda s: self._priority.get(s, 1.0) * (now - self._since[s]),
+                )
+            del self._since[source]
+            return source, self._items.pop(source)
+
+    def has_pending(self, source: str) -> bool:
+        with self._cond:
+            return source in self._items
+
+    def discard(self, source: str) -> Optional[T]:
+        """Drop a source's pending item (e.g. on disconnect) without counting it."""
+        with self._cond:
+            self.dropped.pop(source, None)
+            self._priority.pop(source, None)
+            self._since.pop(source, None)
+            return self._items.pop(source, None)
@@ -0,0 +1,246 @@
+"""pc_app/backend/recording.py
+Record-and-replay of Pi frame streams, for reproducible offline runs.
+
+Recording (enabled by `config.RECORD_DIR`): every received JPEG is appended
+to `<source>-<time>.gzrec`, which is itself a valid protocol v1 stream
+(4-byte length + JPEG). A sidecar `.gzrec.idx` holds one fixed-size
+`INDEX_DTYPE` record per frame (payload offset, length, seq, timestamps).
+Both files are append-only; a torn last index record is ignored on load.
+
+Replay memory-maps the data file and serves frames either
+- over TCP to a running PC app (acts as a protocol v2 Pi client), or
+- directly into an `InferenceService` (`run_replay_receiver`, a drop-in
+  for `run_pi_receiver`), with no sockets at all.
+
+Pacing: `speed=1` is real time, `speed=N` is N times faster, `speed=0` is as
+fast as possible.
+
+CLI:
+    python -m pc_app.backend.recording replay FILE.gzrec [--speed 2] [--host 127.0.0.1] [--port 4242] [--loop]
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import config
+
+from .state import SharedState
+from .transport import Frame, FrameMeta, pack_clock_offset, pack_frame_header
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", "<u8"),      # payload start in the data file
+        ("length", "<u4"),
+        ("seq", "<i8"),         # -1 for protocol v1 frames
+        ("capture_ts", "<f8"),  # PC perf_counter clock
+        ("recv_ts", "<f8"),
+        ("encode_ms", "<f4"),
+    ]
+)
+DATA_SUFFIX = ".gzrec"
+INDEX_SUFFIX = ".gzrec.idx"
+
+
+class FrameRecorder:
+    """Tees frames to disk on a background thread (the caller never blocks on I/O)."""
+
+    def __init__(self, path: str, max_pending: int = 256) -> None:
+        self.path = path
+        self._queue: "queue.Queue[Optional[Tuple[bytes, FrameMeta]]]" = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.skipped = 0  # writer fell behind; frames not recorded
+        self._thread = threading.Thread(target=self._writer, name="recorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_source(cls, directory: str, source: str) -> "FrameRecorder":
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return cls(os.path.join(directory, f"{source}-{stamp}{DATA_SUFFIX}"))
+
+    def write(self, frame: Frame) -> None:
+        # Copy out of the pooled buffer: it is reused as soon as the frame is decoded.
+        try:
+            self._queue.put_nowait((bytes(frame.view), frame.meta))
+        except queue.Full:
+            self.skipped += 1
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _writer(self) -> None:
+        index_path = self.path[: -len(DATA_SUFFIX)] + INDEX_SUFFIX
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        with open(self.path, "ab") as data_f, open(index_path, "ab") as index_f:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                payload, meta = item
+                data_f.write(pack_frame_header(len(payload)))
+                record["offset"] = data_f.tell()
+                data_f.write(payload)
+                record["length"] = len(payload)
+                record["seq"] = meta.seq
+                record["capture_ts"] = meta.capture_ts
+                record["recv_ts"] = meta.recv_ts
+                record["encode_ms"] = meta.encode_ms
+                index_f.write(record.tobytes())
+                self.written += 1
+                if self._queue.empty():
+                    data_f.flush()
+                    index_f.flush()
+        print(f"[Recorder] Closed {self.path} ({self.written} frames, {self.skipped} skipped).")
+
+
+class FrameRecording:
+    """Read-only, memory-mapped view of a `.gzrec` file and its index."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        index_path = path[: -len(DATA_SUFFIX)] + INDEX_SUFFIX
+        raw = np.fromfile(index_path, dtype=np.uint8)
+        usable = raw.size - raw.size % INDEX_DTYPE.itemsize
+        self.index = raw[:usable].view(INDEX_DTYPE)
+
+        self._file = open(path, "rb")
+        # A source that disconnected before its first frame leaves an empty file,
+        # which cannot be mapped: it is an empty recording.
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        # Drop records pointing past the end of a truncated data file.
+        ends = self.index["offset"] + self.index["length"]
+        self.index = self.index[ends <= size]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def payload(self, i: int) -> memoryview:
+        """Zero-copy view of frame `i`'s JPEG bytes."""
+        rec = self.index[i]
+        start = int(rec["offset"])
+        return memoryview(self._mmap)[start : start + int(rec["length"])]
+
+    def paced(self, speed: float = 1.0, loop: bool = False) -> Iterator[Tuple[int, memoryview]]:
+        """Yield (i, payload) at the recorded frame rate scaled by `speed` (0 = no pacing)."""
+        if len(self) == 0:
+            return
+        times = self.index["capture_ts"]
+        while True:
+            start_wall = time.perf_counter()
+            for i in range(len(self)):
+                if speed > 0:
+                    due = start_wall + (times[i] - times[0]) / speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield i, self.payload(i)
+            if not loop:
+                return
+
+    def meta_at(self, i: int, now: float) -> FrameMeta:
+        """Frame metadata re-based to `now`, keeping the recorded capture->recv delay."""
+        rec = self.index[i]
+        network = float(rec["recv_ts"] - rec["capture_ts"])
+        seq = int(rec["seq"])
+        return FrameMeta(
+            version=2 if seq >= 0 else 1,
+            seq=seq if seq >= 0 else -1,
+            capture_ts=now - network,
+            encode_ms=float(rec["encode_ms"]),
+            recv_ts=now,
+        )
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # payload views still alive; the mapping goes away with them
+        self._file.close()
+
+
+def replay_over_tcp(path: str, host: str, port: int, speed: float = 1.0, loop: bool = False) -> None:
+    """Act as a v2 Pi client and stream the recording to a PC receiver."""
+    rec = FrameRecording(path)
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # Same machine, same perf_counter clock: no handshake needed.
+    sock.sendall(pack_clock_offset(0.0, 0.0))
+    print(f"[Replay] {len(rec)} frames -> {host}:{port} (speed {speed or 'max'})")
+    try:
+        sent = 0
+        for i, payload in rec.paced(speed, loop):
+            meta = rec.meta_at(i, time.perf_counter())
+            header = pack_frame_header(len(payload), sent, meta.capture_ts, meta.encode_ms)
+            sock.sendall(header)
+            sock.sendall(payload)
+            sent += 1
+        print(f"[Replay] Done ({sent} frames).")
+    finally:
+        sock.close()
+        rec.close()
+
+
+def run_replay_receiver(shared: SharedState, service=None) -> None:
+    """Thread entry: replay `config.REPLAY_FILE` straight into the inference service."""
+    from .inference import InferenceService
+
+    rec = FrameRecording(config.REPLAY_FILE)
+    if service is None:
+        service = InferenceService(shared)
+        service.start()
+    source = "pi-replay"
+    service.add_source(source)
+    with shared.lock:
+        shared.pi_connected = True
+        shared.pi_primary = source
+    shared.ui_wakeup.signal()
+    print(f"[Replay] {len(rec)} frames from {config.REPLAY_FILE} (speed {config.REPLAY_SPEED or 'max'})")
+
+    try:
+        for i, payload in rec.paced(config.REPLAY_SPEED, loop=True):
+            if not shared.running:
+                break
+            if config.REPLAY_SPEED <= 0:
+                # Unpaced: feed as fast as the decoder takes frames instead of flooding drops.
+                while service.has_pending(source) and shared.running:
+                    time.sleep(0.0005)
+            meta = rec.meta_at(i, time.perf_counter())
+            service.submit_jpeg(source, Frame(payload, len(payload), None, meta))  # type: ignore[arg-type]
+    finally:
+        service.remove_source(source)
+        with shared.lock:
+            shared.pi_connected = False
+            shared.pi_primary = None
+        shared.ui_wakeup.signal()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded Pi frame stream.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay", help="stream a .gzrec file to a PC receiver over TCP")
+    rp.add_argument("file")
+    rp.add_argument("--host", default="127.0.0.1")
+    rp.add_argument("--port", type=int, default=config.TCP_PORT)
+    rp.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N times faster, 0 = max")
+    rp.add_argument("--loop", action="store_true")
+    args = parser.parse_args()
+
+    if args.cmd == "replay":
+        replay_over_tcp(args.file, args.host, args.port, args.speed, args.loop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""pc_app/backend/slots.py
+Versioned, double-buffered publication slots for backend -> UI hand-off.
+
+A writer fills the back buffer and then bumps the generation counter; a
+reader takes `(generation, item)` without any lock, seqlock style: read the
+generation, read the buffer it points to, and retry if the generation moved
+on meanwhile. Readers compare generations to skip unchanged items instead
+of copying them.
+
+Published items are treated as immutable: a writer hands over a fresh
+object (or a buffer it will not touch again until two more publishes), and
+readers never modify what they get.
+
+`PreviewSlot` publishes small RGB previews of debug frames. They are
+rendered by the writer into a rotation of preallocated buffers, so the UI
+receives display-ready pixels and nothing is allocated per frame.
+
+`UIWakeup` tells a consumer that something was published. Backend threads
+only set a flag and an event; they never call into the consumer (a
+cross-thread Tk call would block them until the UI loop is free). One
+notifier thread waits on the event and makes the call instead, so nothing
+runs while no data arrives. Signals coalesce until the consumer
+acknowledges, so a burst of samples costs one wake-up.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+import cv2
+import numpy as np
+
+T = TypeVar("T")
+
+PREVIEW_SIZE = (320, 240)  # (w, h) of debug-view previews
+
+
+@dataclass(frozen=True)
+class GazeSample:
+    """One tracking result as published to the UI."""
+
+    x: float = 0.5            # last known target position, kept while no face is seen
+    y: float = 0.5
+    has_face: bool = False
+    capture_ts: float = 0.0   # perf_counter() on the PC clock (0 = unknown)
+    confidence: float = 1.0   # source's recent detection rate (0-1), used to weight fusion
+
+
+class VersionedSlot(Generic[T]):
+    """Latest-value slot with a generation counter and lock-free reads."""
+
+    def __init__(self, initial: T) -> None:
+        self._buffers: List[T] = [initial, initial]
+        self._generation = 0
+        self._write_lock = threading.Lock()  # serializes writers only
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def publish(self, item: T) -> int:
+        """Make `item` the current value. Returns its generation."""
+        with self._write_lock:
+            gen = self._generation + 1
+            self._buffers[gen & 1] = item
+            self._generation = gen  # publish
+            return gen
+
+    def read(self) -> Tuple[int, T]:
+        """(generation, current value), consistent even while a writer is publishing."""
+        while True:
+            gen = self._generation
+            item = self._buffers[gen & 1]
+            if self._generation == gen:
+                return gen, item
+
+    def read_if_newer(self, seen: int) -> Optional[Tuple[int, T]]:
+        """Like `read`, but None when the generation is still `seen` (nothing new)."""
+        if self._generation == seen:
+            return None
+        return self.read()
+
+
+class PreviewSlot:
+    """`VersionedSlot` of RGB previews rendered into rotating preallocated buffers.
+
+    With three buffers, the one a reader got is not written again until two
+    more previews were published; readers can check `still_valid(gen)`
+    after using it.
+    """
+
+    def __init__(self, size: Tuple[int, int] = PREVIEW_SIZE, buffers: int = 3) -> None:
+        w, h = size
+        self.size = size
+        self._buffers = [np.zeros((h, w, 3), dtype=np.uint8) for _ in range(buffers)]
+        self._scratch = np.zeros((h, w, 3), dtype=np.uint8)
+        self._next = 0
+        self._slot: VersionedSlot[Optional[np.ndarray]] = VersionedSlot(None)
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._slot.generation
+
+    def publish(self, frame_bgr: Optional[np.ndarray]) -> int:
+        """Render `frame_bgr` (any size, BGR) as the next preview; None clears it."""
+        with self._lock:
+            if frame_bgr is None:
+                return self._slot.publish(None)
+            buf = self._buffers[self._next % len(self._buffers)]
+            self._next += 1
+            cv2.resize(frame_bgr, self.size, dst=self._scratch, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._scratch, cv2.COLOR_BGR2RGB, dst=buf)
+            return self._slot.publish(buf)
+
+    def read(self) -> Tuple[int, Optional[np.ndarray]]:
+        return self._slot.read()
+
+    def read_if_newer(self, seen: int) -> Optional[Tuple[int, Optional[np.ndarray]]]:
+        return self._slot.read_if_newer(seen)
+
+    def still_valid(self, gen: int) -> bool:
+        """False if the buffer read at `gen` may have been overwritten since."""
+        return self._slot.generation < gen + len(self._buffers) - 1
+
+
+class UIWakeup:
+    """Coalescing "new data" signal from backend threads to the UI thread (signal() never blocks)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()  # only guards the flag; never held across a call out
+        self._event = threading.Event()
+        self._callback: Optional[Callable[[], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pending = False
+        self._delivered = False  # the consumer was called for the current pending wake-up
+        self.signals = 0     # wake-ups raised
+        self.coalesced = 0   # signals absorbed by a pending wake-up
+
+    @property
+    def pending(self) -> bool:
+        """Consumer side: something was published since the last `acknowledge()`."""
+        return self._pending
+
+    def connect(self, callback: Optional[Callable[[], None]]) -> None:
+        """Set the function that wakes the consumer; it is called on the notifier thread."""
+        self._callback = callback
+        if callback is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._notify, name="ui-wakeup", daemon=True)
+            self._thread.start()
+        self._event.set()  # deliver a wake-up raised before connecting
+
+    def signal(self) -> None:
+        with self._lock:
+            if self._pending:
+                self.coalesced += 1
+                return
+            self._pending = True
+            self.signals += 1
+        self._event.set()
+
+    def acknowledge(self) -> None:
+        """Consumer side: state was (about to be) read, deliver the next signal."""
+        with self._lock:
+            self._pending = False
+            self._delivered = False
+
+    def _notify(self) -> None:
+        while True:
+            self._event.wait()
+            self._event.clear()
+            callback = self._callback
+            with self._lock:
+                if callback is None or not self._pending or self._delivered:
+                    continue
+                self._delivered = True
+            try:
+                callback()
+            except Exception:
+                # Consumer not running (yet, or any more). Stay pending: its next
+                # own tick acknowledges and re-arms.
+                pass
@@ -1,12 +1,49 @@
 """pc_app/backend/state.py
 Thread-safe shared state for backend threads and UI thread.
+
+Gaze samples and debug previews go through versioned slots (see slots.py):
+writers publish without taking `lock`, and readers check the generation
+to skip unchanged data instead of copying it. Everything else is small
+scalars behind `lock`.
 """
 
 from __future__ import annotations
 import threading
 from dataclasses import dataclass, field
-from typing import Optional
-import numpy as np
+from typing import Dict, Optional
+
+from .history import GazeHistory
+from .latency import PipelineLatency
+from .slots import GazeSample, PreviewSlot, UIWakeup, VersionedSlot
+
+
+def _gaze_slot() -> VersionedSlot[GazeSample]:
+    return VersionedSlot(GazeSample())
+
+
+def source_kind(source_id: str) -> str:
+    """'pi-2' -> 'pi', 'pc' -> 'pc' (selects the normalization range)."""
+    return source_id.partition("-")[0]
+
+
+@dataclass
+class SourceStatus:
+    """Latest tracking result and throughput for one camera head (a Pi connection or the PC webcam)."""
+
+    gaze: VersionedSlot[GazeSample] = field(default_factory=_gaze_slot)
+    fps: int = 0
+    dropped: int = 0
+    lost: int = 0             # sequence gaps (protocol v2 only)
+    skip_ratio: float = 0.0   # frames answered by the motion gate
+    infer_ms: float = 0.0     # smoothed inference time per frame
+    processed: int = 0        # frames through inference since the source was added
+
+
+def clear_slots(gaze: VersionedSlot[GazeSample], preview: PreviewSlot) -> None:
+    """Publish "no face, no frame" for a camera that went away (keeps the last position)."""
+    last = gaze.read()[1]
+    gaze.publish(GazeSample(last.x, last.y, False))
+    preview.publish(None)
 
 
 @dataclass
@@ -16,25 +53,39 @@ class SharedState:
     - PC webcam thread
     - UI thread (Tkinter)
 
-    All reads/writes must be protected with `lock`.
+    All reads/writes must be protected with `lock`, except the versioned
+    slots (`*_gaze`, `*_preview`, `SourceStatus.gaze`), which are lock-free.
+    Published previews are read-only for consumers.
     """
 
     lock: threading.Lock = field(default_factory=threading.Lock)
     running: bool = True
 
+    # ---- UI wake-up: signalled after publishing anything the overlay shows ----
+    ui_wakeup: UIWakeup = field(default_factory=UIWakeup)
+
     # ---- Connection Status ----
     pi_connected: bool = False
+    pi_primary: Optional[str] = None  # source id mirrored into the pi_* fields below
+
+    # ---- Per-source results (every active camera head: "pi-N" and "pc") ----
+    sources: Dict[str, SourceStatus] = field(default_factory=dict)
 
     # ---- Raspberry Pi Tracking Data ----
-    pi_frame: Optional[np.ndarray] = None   # debug frame
-    pi_has_face: bool = False
-    pi_target_x: float = 0.5
-    pi_target_y: float = 0.5
+    pi_gaze: VersionedSlot[GazeSample] = field(default_factory=_gaze_slot)
+    pi_preview: PreviewSlot = field(default_factory=PreviewSlot)  # debug view, RGB 320x240
     pi_fps: int = 0
+    pi_dropped: int = 0   # frames replaced by newer ones before inference
+    pi_skip_ratio: float = 0.0  # frames answered by the motion gate
+
+    # ---- Pi pipeline latency (capture -> recv -> decode -> inference -> ui) ----
+    latency: PipelineLatency = field(default_factory=PipelineLatency)
+
+    # ---- Gaze history (appended by the UI thread: raw/calibrated/smoothed per fused sample) ----
+    history: GazeHistory = field(default_factory=GazeHistory)
 
     # ---- PC Webcam Tracking Data ----
-    pc_frame: Optional[np.ndarray] = None
-    pc_has_face: bool = False
-    pc_target_x: float = 0.5
-    pc_target_y: float = 0.5
+    pc_gaze: VersionedSlot[GazeSample] = field(default_factory=_gaze_slot)
+    pc_preview: PreviewSlot = field(default_factory=PreviewSlot)
     pc_fps: int = 0
+    pc_skip_ratio: float = 0.0
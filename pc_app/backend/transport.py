@@ -1,16 +1,126 @@
 """pc_app/backend/transport.py
 TCP framing helpers for receiving JPEG frames.
 
-Protocol:
+Protocol v1 (old Pi images):
 - 4-byte big-endian unsigned length
 - followed by JPEG bytes
+
+Protocol v2 (must match pi_app/protocol.py):
+- 4-byte prefix: b"GZ", version (=2), message type
+- FRAME:        seq u32, capture_ts f64, encode_ms f32, length u32, then JPEG
+- CLOCK_PING:   t0 f64                  (Pi -> PC)
+- CLOCK_PONG:   t0 f64, t1 f64, t2 f64  (PC -> Pi, answered immediately)
+- CLOCK_OFFSET: offset f64, rtt f64     (Pi -> PC, result of the handshake)
+
+Timestamps are `time.perf_counter()` seconds on the sender's clock; the Pi
+estimates `offset = pc_clock - pi_clock` NTP-style and reports it, so the PC
+can express capture times on its own clock. A v1 length never starts with
+b"GZ" (MAX_JPEG_BYTES < 16 MB keeps the top byte zero), so both versions are
+accepted on the same port.
+
+`FrameReader` (blocking sockets) and `FrameProtocol` (asyncio) are the
+hot-path readers: they receive straight into pooled `bytearray`s, so a frame
+is never copied between the kernel and `cv2.imdecode`. `recv_exact` /
+`recv_jpeg_frame` are the original allocate-per-frame v1 helpers, kept for
+simple callers and for benchmarking.
 """
 
+from __future__ import annotations
+
+import asyncio
 import socket
 import struct
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 import config
 
+_LEN_HEADER = struct.Struct(">L")
+
+MAGIC = b"GZ"
+PROTOCOL_VERSION = 2
+MSG_FRAME = 1
+MSG_CLOCK_PING = 2
+MSG_CLOCK_PONG = 3
+MSG_CLOCK_OFFSET = 4
+
+V2_PREFIX = struct.Struct(">2sBB")
+V2_FRAME = struct.Struct(">IdfI")
+V2_CLOCK_PING = struct.Struct(">d")
+V2_CLOCK_PONG = struct.Struct(">ddd")
+V2_CLOCK_OFFSET = struct.Struct(">dd")
+
+# Bodies the PC accepts (PONG only travels PC -> Pi).
+_V2_BODIES: Dict[int, struct.Struct] = {
+    MSG_FRAME: V2_FRAME,
+    MSG_CLOCK_PING: V2_CLOCK_PING,
+    MSG_CLOCK_OFFSET: V2_CLOCK_OFFSET,
+}
+_MAX_BODY = max(st.size for st in _V2_BODIES.values())
+
+
+@dataclass
+class FrameMeta:
+    """Per-frame timing, all on the PC's `time.perf_counter()` clock."""
+
+    version: int = 1
+    seq: int = -1            # -1 for v1 frames
+    capture_ts: float = 0.0  # v1: same as recv_ts
+    encode_ms: float = 0.0
+    recv_ts: float = 0.0
+
+
+class ClockSync:
+    """Per-connection clock state; answers pings and records the Pi's offset."""
+
+    def __init__(self) -> None:
+        self.offset = 0.0  # pc_clock - pi_clock
+        self.rtt = 0.0
+        self.synced = False
+
+    def pong(self, t0: float, t1: float) -> bytes:
+        return V2_PREFIX.pack(MAGIC, PROTOCOL_VERSION, MSG_CLOCK_PONG) + V2_CLOCK_PONG.pack(
+            t0, t1, time.perf_counter()
+        )
+
+    def set_offset(self, offset: float, rtt: float) -> None:
+        self.offset = offset
+        self.rtt = rtt
+        self.synced = True
+
+    def frame_meta(self, seq: int, capture_ts: float, encode_ms: float, recv_ts: float) -> FrameMeta:
+        capture = capture_ts + self.offset if self.synced else recv_ts
+        # Never report a capture time in the future (offset estimate error).
+        return FrameMeta(PROTOCOL_VERSION, seq, min(capture, recv_ts), encode_ms, recv_ts)
+
+
+def classify_prefix(prefix) -> Optional[Tuple[int, int]]:
+    """First 4 bytes of a message -> (version, msg_type), or None if invalid."""
+    if prefix[0] != MAGIC[0] or prefix[1] != MAGIC[1]:
+        return 1, MSG_FRAME
+    _, version, msg_type = V2_PREFIX.unpack_from(prefix)
+    if version != PROTOCOL_VERSION or msg_type not in _V2_BODIES:
+        return None
+    return version, msg_type
+
+
+def pack_frame_header(length: int, seq: int = -1, capture_ts: float = 0.0, encode_ms: float = 0.0) -> bytes:
+    """Sender side (replay / tests): v2 header, or v1 when `seq` is negative."""
+    if seq < 0:
+        return _LEN_HEADER.pack(length)
+    return V2_PREFIX.pack(MAGIC, PROTOCOL_VERSION, MSG_FRAME) + V2_FRAME.pack(
+        seq & 0xFFFFFFFF, capture_ts, encode_ms, length
+    )
+
+
+def pack_clock_offset(offset: float, rtt: float) -> bytes:
+    return V2_PREFIX.pack(MAGIC, PROTOCOL_VERSION, MSG_CLOCK_OFFSET) + V2_CLOCK_OFFSET.pack(offset, rtt)
+
+
+def _valid_size(msg_size: int) -> bool:
+    return 0 < msg_size <= config.MAX_JPEG_BYTES
+
 
 def recv_exact(sock: socket.socket, n_bytes: int) -> Optional[bytes]:
     data = b""
@@ -40,3 +150,244 @@ def recv_jpeg_frame(sock: socket.socket) -> Optional[bytes]:
 
     frame_data = recv_exact(sock, msg_size)
     return frame_data
+
+
+def recv_into_exact(sock: socket.socket, view: memoryview) -> bool:
+    """Fill `view` completely from `sock`. Returns False on EOF/error."""
+    n_bytes = len(view)
+    got = 0
+    while got < n_bytes:
+        try:
+            n = sock.recv_into(view[got:], n_bytes - got)
+            if n == 0:
+                return False
+            got += n
+        except socket.timeout:
+            continue
+        except OSError:
+            return False
+    return True
+
+
+class BufferPool:
+    """Reusable receive buffers shared between the reader and its consumers.
+
+    `acquire` never blocks: when every buffer is in use (or too small) a new
+    one is allocated and counted in `misses`, so steady-state streaming runs
+    without per-frame allocations.
+    """
+
+    def __init__(self, count: int = config.RECV_POOL_BUFFERS, size: int = config.RECV_POOL_BUFFER_BYTES) -> None:
+        self._lock = threading.Lock()
+        self._count = count
+        self._free: List[bytearray] = [bytearray(size) for _ in range(count)]
+        self.misses = 0
+
+    def acquire(self, min_size: int) -> bytearray:
+        with self._lock:
+            for i, buf in enumerate(self._free):
+                if len(buf) >= min_size:
+                    return self._free.pop(i)
+            if self._free:
+                # Drop an undersized buffer; its replacement is returned to the pool later.
+                self._free.pop()
+            self.misses += 1
+        return bytearray(min_size)
+
+    def release(self, buf: bytearray) -> None:
+        with self._lock:
+            if len(self._free) < self._count:
+                self._free.append(buf)
+
+
+class Frame:
+    """A received payload living in a pooled buffer. Call `release()` when done.
+
+    `buf` may also be any other buffer (e.g. an mmap slice) with `pool=None`.
+    """
+
+    __slots__ = ("buf", "size", "meta", "_pool")
+
+    def __init__(
+        self, buf: bytearray, size: int, pool: Optional[BufferPool], meta: Optional[FrameMeta] = None
+    ) -> None:
+        self.buf = buf
+        self.size = size
+        self.meta = meta or FrameMeta()
+        self._pool = pool
+
+    @property
+    def view(self) -> memoryview:
+        """Zero-copy view of the payload (valid until `release()`)."""
+        return memoryview(self.buf)[: self.size]
+
+    def release(self) -> None:
+        if self._pool is not None:
+            self._pool.release(self.buf)
+            self._pool = None
+
+
+class FrameReader:
+    """Blocking v1/v2 frame reader built on `recv_into` and a `BufferPool`.
+
+    Clock pings are answered inline; `read_frame` only returns frames.
+    """
+
+    def __init__(self, sock: socket.socket, pool: Optional[BufferPool] = None) -> None:
+        self._sock = sock
+        self._pool = pool or BufferPool()
+        self._prefix = bytearray(V2_PREFIX.size)
+        self._prefix_view = memoryview(self._prefix)
+        self._body = bytearray(_MAX_BODY)
+        self._body_view = memoryview(self._body)
+        self.clock = ClockSync()
+
+    @property
+    def pool(self) -> BufferPool:
+        return self._pool
+
+    def read_frame(self) -> Optional[Frame]:
+        """Read one frame. Returns None on EOF, socket error or protocol error."""
+        while True:
+            if not recv_into_exact(self._sock, self._prefix_view):
+                return None
+            recv_ts = time.perf_counter()
+            kind = classify_prefix(self._prefix)
+            if kind is None:
+                return None
+            version, msg_type = kind
+
+            if version == 1:
+                msg_size = _LEN_HEADER.unpack_from(self._prefix)[0]
+                meta = FrameMeta(capture_ts=recv_ts, recv_ts=recv_ts)
+            else:
+                body = _V2_BODIES[msg_type]
+                if not recv_into_exact(self._sock, self._body_view[: body.size]):
+                    return None
+                values = body.unpack_from(self._body)
+                if msg_type == MSG_CLOCK_PING:
+                    try:
+                        self._sock.sendall(self.clock.pong(values[0], recv_ts))
+                    except OSError:
+                        return None
+                    continue
+                if msg_type == MSG_CLOCK_OFFSET:
+                    self.clock.set_offset(*values)
+                    continue
+                seq, capture_ts, encode_ms, msg_size = values
+                meta = self.clock.frame_meta(seq, capture_ts, encode_ms, recv_ts)
+
+            if not _valid_size(msg_size):
+                return None
+            buf = self._pool.acquire(msg_size)
+            if not recv_into_exact(self._sock, memoryview(buf)[:msg_size]):
+                self._pool.release(buf)
+                return None
+            return Frame(buf, msg_size, self._pool, meta)
+
+
+class FrameProtocol(asyncio.BufferedProtocol):
+    """asyncio counterpart of `FrameReader`: the event loop reads directly
+    into the header buffers or a pooled payload buffer (no intermediate bytes).
+
+    `on_frame` runs on the event loop thread and must not block; ownership of
+    the `Frame` passes to it.
+    """
+
+    _PREFIX, _BODY, _PAYLOAD = range(3)
+
+    def __init__(
+        self,
+        on_frame: Callable[[Frame], None],
+        on_close: Callable[[Optional[Exception]], None],
+        pool: Optional[BufferPool] = None,
+    ) -> None:
+        self._on_frame = on_frame
+        self._on_close = on_close
+        self._pool = pool or BufferPool()
+        self._prefix = bytearray(V2_PREFIX.size)
+        self._prefix_view = memoryview(self._prefix)
+        self._body = bytearray(_MAX_BODY)
+        self._body_view = memoryview(self._body)
+        self._state = self._PREFIX
+        self._target = self._prefix_view
+        self._filled = 0
+        self._msg_type = MSG_FRAME
+        self._recv_ts = 0.0
+        self._payload: Optional[bytearray] = None
+        self._payload_size = 0
+        self._meta: Optional[FrameMeta] = None
+        self.clock = ClockSync()
+        self.transport: Optional[asyncio.Transport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self._target[self._filled :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._filled += nbytes
+        if self._filled < len(self._target):
+            return
+        self._filled = 0
+
+        if self._state == self._PREFIX:
+            self._recv_ts = time.perf_counter()
+            kind = classify_prefix(self._prefix)
+            if kind is None:
+                self._abort()
+                return
+            version, self._msg_type = kind
+            if version == 1:
+                size = _LEN_HEADER.unpack_from(self._prefix)[0]
+                self._start_payload(size, FrameMeta(capture_ts=self._recv_ts, recv_ts=self._recv_ts))
+            else:
+                self._state = self._BODY
+                self._target = self._body_view[: _V2_BODIES[self._msg_type].size]
+        elif self._state == self._BODY:
+            values = _V2_BODIES[self._msg_type].unpack_from(self._body)
+            if self._msg_type == MSG_FRAME:
+                seq, capture_ts, encode_ms, size = values
+                self._start_payload(size, self.clock.frame_meta(seq, capture_ts, encode_ms, self._recv_ts))
+                return
+            if self._msg_type == MSG_CLOCK_PING:
+                if self.transport is not None:
+                    self.transport.write(self.clock.pong(values[0], self._recv_ts))
+            elif self._msg_type == MSG_CLOCK_OFFSET:
+                self.clock.set_offset(*values)
+            self._expect_prefix()
+        else:
+            frame = Frame(self._payload, self._payload_size, self._pool, self._meta)
+            self._payload = None
+            self._meta = None
+            self._expect_prefix()
+            self._on_frame(frame)
+
+    def _start_payload(self, size: int, meta: FrameMeta) -> None:
+        if not _valid_size(size):
+            self._abort()
+            return
+        self._payload = self._pool.acquire(size)
+        self._payload_size = size
+        self._meta = meta
+        self._state = self._PAYLOAD
+        self._target = memoryview(self._payload)[:size]
+
+    def _expect_prefix(self) -> None:
+        self._state = self._PREFIX
+        self._target = self._prefix_view
+
+    def _abort(self) -> None:
+        self._expect_prefix()
+        if self.transport is not None:
+            self.transport.close()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self._payload is not None:
+            self._pool.release(self._payload)
+            self._payload = None
+        self._on_close(exc)
@@ -0,0 +1,279 @@
+"""pc_app/backend/workers.py
+Out-of-process `EyeProcessor` workers (config.INFERENCE_BACKEND = "process").
+
+Each worker process owns its own EyeProcessor and one shared-memory block:
+
+    [SLOT_DTYPE x WORKER_RING_SLOTS][frame slot 0][frame slot 1]...
+
+Requests are written into ring slot `seq % WORKER_RING_SLOTS`: the parent
+copies the BGR frame into the slot, fills the header and publishes it by
+writing `seq` last, then rings the request semaphore. The worker processes
+the frame in place (no pickling), writes the result fields and publishes
+them by writing `res_seq` last. The semaphores only carry wake-ups; the data
+itself is never behind a lock, and a result is accepted only when its
+`res_seq` matches, so a late answer to a timed-out request is ignored.
+A slot is reused only once its previous request has been answered; if the
+worker is still busy with it after WORKER_TIMEOUT_SEC, the new frame is
+dropped instead (and a forget is retried with the next request).
+
+`WorkerClient` has the same `process()` / `forget()` / `skip_ratio()` /
+`debug_marker()` surface as EyeProcessor, so the InferenceService drives either one. The
+debug marker is drawn in the parent, on the parent's own copy of the frame.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import config
+
+from .eye_processor import draw_debug_marker
+from .state import source_kind
+
+OP_PROCESS = 1
+OP_FORGET = 2
+
+SLOT_DTYPE = np.dtype(
+    [
+        ("seq", "<i8"),        # request id, written last by the parent (-1 = empty)
+        ("op", "<i4"),
+        ("height", "<i4"),
+        ("width", "<i4"),
+        ("stream", "S16"),
+        ("res_seq", "<i8"),    # id of the answered request, written last by the worker
+        ("x", "<f8"),
+        ("y", "<f8"),
+        ("detected", "<i4"),
+        ("iris", "<f4", (2,)),  # NaN = no face
+        ("roi", "<i4", (4,)),   # -1 = no ROI
+        ("skip", "<f4"),        # stream's motion-gate skip ratio
+    ],
+    align=True,
+)
+
+_IDLE_WAIT_SEC = 0.5
+_STARTUP_SEC = 60.0  # importing MediaPipe and loading the model in a fresh process
+
+
+def _layout(slots: int) -> int:
+    """Byte offset of frame slot 0 (after the headers, 64-byte aligned)."""
+    return (SLOT_DTYPE.itemsize * slots + 63) // 64 * 64
+
+
+class WorkerClient:
+    """Parent-side handle of one worker process. Use from a single thread."""
+
+    def __init__(self, index: int) -> None:
+        ctx = mp.get_context("spawn")
+        self.index = index
+        self._slots = config.WORKER_RING_SLOTS
+        self._slot_bytes = config.WORKER_SLOT_BYTES
+        self._data_offset = _layout(self._slots)
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self._data_offset + self._slots * self._slot_bytes
+        )
+        self._header = np.ndarray((self._slots,), dtype=SLOT_DTYPE, buffer=self._shm.buf)
+        self._header["seq"] = -1
+        self._header["res_seq"] = -1
+        self._req = ctx.Semaphore(0)
+        self._res = ctx.Semaphore(0)
+        self._stop = ctx.Event()
+        self._ready = ctx.Event()
+        self._proc = ctx.Process(
+            target=_worker_main,
+            args=(self._shm.name, self._slots, self._slot_bytes, self._req, self._res, self._stop, self._ready),
+            name=f"gaze-worker-{index}",
+            daemon=True,
+        )
+        self._seq = 0
+        self._skip: Dict[str, float] = {}
+        self._markers: Dict[str, Tuple[Optional[Tuple[float, float]], Optional[Tuple[int, int, int, int]]]] = {}
+        self._warned_size = False
+        self._unsent_forgets: Dict[str, None] = {}  # forgets whose slot was still busy (ordered)
+        self.timeouts = 0
+
+    def start(self) -> None:
+        self._proc.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._req.release()
+        self._proc.join(timeout=2.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        del self._header
+        self._shm.close()
+        self._shm.unlink()
+
+    # ---------------- EyeProcessor surface ----------------
+    def process(
+        self,
+        frame_bgr: Optional[np.ndarray],
+        *,
+        source: str,
+        stream: Optional[str] = None,
+        draw_debug: bool = True,
+    ) -> Tuple[float, float, bool, Optional[np.ndarray]]:
+        if frame_bgr is None:
+            return 0.5, 0.5, False, None
+        key = stream or source
+        if frame_bgr.nbytes > self._slot_bytes or frame_bgr.ndim != 3:
+            if not self._warned_size:
+                print(f"[Worker] Frame {frame_bgr.shape} does not fit a {self._slot_bytes} byte slot; skipped.")
+                self._warned_size = True
+            return 0.5, 0.5, False, frame_bgr.copy() if draw_debug else None
+
+        if not self._proc.is_alive() or (not self._ready.is_set() and not self._wait_ready()):
+            self._lost_frame("is not running")
+            return 0.5, 0.5, False, frame_bgr.copy() if draw_debug else None
+
+        self._send_forgets()
+        h, w = frame_bgr.shape[:2]
+        claim = self._claim() if not self._unsent_forgets else None
+        if claim is None:
+            self._lost_frame("is still busy with an earlier frame")
+            return 0.5, 0.5, False, frame_bgr.copy() if draw_debug else None
+        seq, k = claim
+        view = np.ndarray((h, w, 3), dtype=np.uint8, buffer=self._shm.buf, offset=self._slot_offset(k))
+        np.copyto(view, frame_bgr)
+        del view
+        self._publish(k, seq, OP_PROCESS, key, h, w)
+
+        if not self._wait(k, seq):
+            self._lost_frame(f"gave no result within {config.WORKER_TIMEOUT_SEC}s")
+            return 0.5, 0.5, False, frame_bgr.copy() if draw_debug else None
+
+        rec = self._header[k]
+        detected = bool(rec["detected"])
+        self._skip[key] = float(rec["skip"])
+        iris = None if np.isnan(rec["iris"][0]) else (float(rec["iris"][0]), float(rec["iris"][1]))
+        roi = None if rec["roi"][0] < 0 else tuple(int(v) for v in rec["roi"])
+        self._markers[key] = (iris, roi)
+        debug_frame = draw_debug_marker(frame_bgr, iris, roi) if draw_debug else None
+        return float(rec["x"]), float(rec["y"]), detected, debug_frame
+
+    def forget(self, stream: str) -> None:
+        """Drop the worker's state for `stream` (asynchronous; ordered with later frames)."""
+        self._skip.pop(stream, None)
+        self._markers.pop(stream, None)
+        self._unsent_forgets[stream] = None
+        self._send_forgets()
+
+    def skip_ratio(self, stream: str) -> float:
+        return self._skip.get(stream, 0.0)
+
+    def debug_marker(self, stream: str):
+        return self._markers.get(stream, (None, None))
+
+    def _wait_ready(self) -> bool:
+        deadline = time.perf_counter() + _STARTUP_SEC
+        while not self._ready.wait(_IDLE_WAIT_SEC):
+            if not self._proc.is_alive() or time.perf_counter() > deadline:
+                return False
+        return True
+
+    def _lost_frame(self, why: str) -> None:
+        self.timeouts += 1
+        if self.timeouts == 1 or self.timeouts % 100 == 0:
+            print(f"[Worker] gaze-worker-{self.index} {why} ({self.timeouts} frames lost).")
+
+    # ---------------- Ring ----------------
+    def _slot_offset(self, k: int) -> int:
+        return self._data_offset + k * self._slot_bytes
+
+    def _claim(self) -> Optional[Tuple[int, int]]:
+        """Next request id and its slot, once the request that used the slot before is answered.
+
+        None if that request is still unanswered after WORKER_TIMEOUT_SEC: the
+        worker may be reading the slot, so it must not be overwritten. The id
+        is not consumed then (the worker expects ids in order).
+        """
+        seq = self._seq
+        k = seq % self._slots
+        deadline = time.perf_counter() + config.WORKER_TIMEOUT_SEC
+        while self._header["res_seq"][k] < seq - self._slots:
+            if time.perf_counter() >= deadline or not self._proc.is_alive():
+                return None
+            time.sleep(0.0005)
+        self._seq += 1
+        return seq, k
+
+    def _send_forgets(self) -> None:
+        while self._unsent_forgets:
+            stream = next(iter(self._unsent_forgets))
+            claim = self._claim()
+            if claim is None:
+                return
+            del self._unsent_forgets[stream]
+            self._publish(claim[1], claim[0], OP_FORGET, stream, 0, 0)
+
+    def _publish(self, k: int, seq: int, op: int, stream: str, h: int, w: int) -> None:
+        hdr = self._header
+        hdr["op"][k] = op
+        hdr["height"][k] = h
+        hdr["width"][k] = w
+        hdr["stream"][k] = stream.encode()[:16]
+        hdr["seq"][k] = seq  # publish
+        self._req.release()
+
+    def _wait(self, k: int, seq: int) -> bool:
+        deadline = time.perf_counter() + config.WORKER_TIMEOUT_SEC
+        while self._header["res_seq"][k] != seq:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._proc.is_alive():
+                return False
+            # Stale wake-ups (answers to timed-out requests) just loop again.
+            self._res.acquire(timeout=min(remaining, _IDLE_WAIT_SEC))
+        return True
+
+
+# ---------------- Worker process ----------------
+def _worker_main(shm_name: str, slots: int, slot_bytes: int, req, res, stop, ready) -> None:
+    from .eye_processor import EyeProcessor
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    header = np.ndarray((slots,), dtype=SLOT_DTYPE, buffer=shm.buf)
+    data_offset = _layout(slots)
+    processor = EyeProcessor()
+    ready.set()
+    parent = mp.parent_process()
+    next_seq = 0
+
+    try:
+        while not stop.is_set():
+            if not req.acquire(timeout=_IDLE_WAIT_SEC):
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+            k = next_seq % slots
+            if header["seq"][k] != next_seq:
+                continue  # wake-up without a published request (shutdown)
+            seq = next_seq
+            next_seq += 1
+            stream = header["stream"][k].decode()
+
+            if header["op"][k] == OP_FORGET:
+                processor.forget(stream)
+                header["res_seq"][k] = seq
+                continue
+
+            h, w = int(header["height"][k]), int(header["width"][k])
+            frame = np.ndarray((h, w, 3), dtype=np.uint8, buffer=shm.buf, offset=data_offset + k * slot_bytes)
+            x, y, detected, _ = processor.process(frame, source=source_kind(stream), stream=stream, draw_debug=False)
+            del frame
+            iris, roi = processor.debug_marker(stream)
+            header["x"][k] = x
+            header["y"][k] = y
+            header["detected"][k] = int(detected)
+            header["iris"][k] = iris if iris is not None else (np.nan, np.nan)
+            header["roi"][k] = roi if roi is not None else (-1, -1, -1, -1)
+            header["skip"][k] = processor.skip_ratio(stream)
+            header["res_seq"][k] = seq  # publish the id we dequeued, never a re-read of `seq`
+            res.release()
+    finally:
+        del header
+        shm.close()
@@ -0,0 +1,3 @@
+"""pc_app/bench
+Standalone benchmarks for the gaze pipeline (no camera or Pi required).
+"""
@@ -0,0 +1,57 @@
+"""pc_app/bench/__main__.py
+Benchmark CLI for the gaze pipeline.
+
+Usage:
+    python -m pc_app.bench                                  # all cases, synthetic frames
+    python -m pc_app.bench decode eye_processor -n 500
+    python -m pc_app.bench --recording session.gzrec        # recorded Pi frames
+    python -m pc_app.bench --json out.json --compare base.json
+    python -m pc_app.bench filters --recording s.gzrec  # gaze filter lag vs jitter
+
+Latency columns are per-operation percentiles in microseconds; for the
+loopback case they are capture->inference sample age. `--json` stores the
+results together with the commit and library versions, and `--compare`
+prints the change against such a file, so runs can be compared across
+commits on the same machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from pc_app.bench.cases import CASES
+from pc_app.bench.common import compare, print_table, recorded_jpegs, save_json, synthetic_jpegs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", help=f"any of: {', '.join(CASES)} (default: all)")
+    parser.add_argument("-n", type=int, default=300, help="operations per case")
+    parser.add_argument("--recording", help=".gzrec file to use instead of synthetic frames")
+    parser.add_argument("--fps", type=float, default=30.0, help="loopback send rate (0 = unpaced)")
+    parser.add_argument("--no-model", action="store_true", help="replace EyeProcessor with a no-op")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="previous --json file to compare against")
+    args = parser.parse_args()
+    unknown = sorted(set(args.cases) - set(CASES))
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    jpegs = recorded_jpegs(args.recording) if args.recording else []
+    source = args.recording
+    if not jpegs:
+        if args.recording:
+            print(f"[Bench] No frames in {args.recording}; using synthetic ones.")
+        jpegs, source = synthetic_jpegs(), "synthetic 640x480"
+    print(f"[Bench] {len(jpegs)} frames ({source}), n={args.n}")
+
+    results = [CASES[name](jpegs, args.n, args) for name in (args.cases or list(CASES))]
+    print_table(results)
+    if args.json:
+        save_json(args.json, results)
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
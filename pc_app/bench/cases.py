@@ -0,0 +1,305 @@
+"""pc_app/bench/cases.py
+Benchmark cases. Each takes (jpegs, n, args) and returns a BenchResult.
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import config
+from pc_app.backend.inference import InferenceService, _decode_jpeg
+from pc_app.backend.state import SharedState
+from pc_app.backend.transport import FrameReader, pack_clock_offset, pack_frame_header
+from pc_app.bench.common import BenchResult, GazeTrace, recorded_gaze_trace, synthetic_gaze_trace, time_calls
+from pc_app.bench.transport import _loopback_pair
+
+Case = Callable[[List[bytes], int, argparse.Namespace], BenchResult]
+
+
+def _decoded(jpegs: List[bytes]) -> List[np.ndarray]:
+    return [f for f in (_decode_jpeg(j) for j in jpegs) if f is not None]
+
+
+def _make_processor(args: argparse.Namespace):
+    if args.no_model:
+        return _NullProcessor()
+    from pc_app.backend.eye_processor import EyeProcessor
+
+    return EyeProcessor()
+
+
+class _NullProcessor:
+    """Stand-in for EyeProcessor (--no-model): measures pipeline overhead only."""
+
+    def process(self, frame_bgr, *, source: str, stream=None, draw_debug: bool = True):
+        return 0.5, 0.5, False, frame_bgr if draw_debug else None
+
+    def forget(self, stream: str) -> None:
+        pass
+
+    def skip_ratio(self, stream: str) -> float:
+        return 0.0
+
+    def debug_marker(self, stream: str):
+        return None, None
+
+
+class _CountingProcessor:
+    def __init__(self, inner) -> None:
+        self._inner = inner
+        self.calls = 0
+
+    def process(self, frame_bgr, *, source: str, stream=None, draw_debug: bool = True):
+        self.calls += 1
+        return self._inner.process(frame_bgr, source=source, stream=stream, draw_debug=draw_debug)
+
+    def forget(self, stream: str) -> None:
+        self._inner.forget(stream)
+
+    def skip_ratio(self, stream: str) -> float:
+        return self._inner.skip_ratio(stream)
+
+    def debug_marker(self, stream: str):
+        return self._inner.debug_marker(stream)
+
+
+def bench_transport(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    messages = [pack_frame_header(len(j), i, time.perf_counter(), 0.0) + j for i, j in enumerate(jpegs)]
+    client, conn = _loopback_pair()
+
+    def send() -> None:
+        try:
+            for i in range(n):
+                client.sendall(messages[i % len(messages)])
+        finally:
+            client.close()
+
+    reader = FrameReader(conn)
+    samples = []
+    sender = threading.Thread(target=send, daemon=True)
+    t_start = time.perf_counter()
+    sender.start()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        frame = reader.read_frame()
+        samples.append(time.perf_counter() - t0)
+        if frame is None:
+            break
+        frame.release()
+    elapsed = time.perf_counter() - t_start
+    sender.join()
+    conn.close()
+
+    result = BenchResult.from_samples("transport.framing", samples, elapsed)
+    result.extra["MB/s"] = sum(len(messages[i % len(messages)]) for i in range(result.ops)) / elapsed / 1e6
+    result.extra["pool_misses"] = float(reader.pool.misses)
+    return result
+
+
+def bench_decode(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    views = [memoryview(j) for j in jpegs]
+    return time_calls("decode.imdecode", lambda i: _decode_jpeg(views[i % len(views)]), n)
+
+
+def bench_eye_processor(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    try:
+        processor = _make_processor(args)
+    except Exception as e:
+        return BenchResult("eye_processor.process", skipped=f"EyeProcessor unavailable ({e})")
+    frames = _decoded(jpegs)
+    name = "eye_processor.process" + (" [no-model]" if args.no_model else "")
+    return time_calls(name, lambda i: processor.process(frames[i % len(frames)], source="pi", draw_debug=True), n)
+
+
+def bench_fusion(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    from pc_app.ui.calibration import Calibrator
+    from pc_app.ui.dwell import DwellTrigger
+    from pc_app.backend.slots import GazeSample, VersionedSlot
+    from pc_app.ui.filters import make_filter
+    from pc_app.ui.fusion import GazeFusion
+
+    rng = np.random.default_rng(1)
+    trace = np.clip(0.5 + np.cumsum(rng.normal(0, 0.01, (n + 116, 4)), axis=0), 0, 1).tolist()
+    slots = {"pi-1": VersionedSlot(GazeSample()), "pc": VersionedSlot(GazeSample())}
+    calibrator = Calibrator(calib_file="__bench_calibration__.json")
+    fusion = GazeFusion()
+    dwell = DwellTrigger()
+    gaze_filter = make_filter()
+
+    def step(i: int) -> None:
+        a, b, c, d = trace[i % len(trace)]
+        t = 1.0 + i / 30.0  # the pc sample lags the Pi one by 20 ms and misses every 7th frame
+        slots["pi-1"].publish(GazeSample(a, b, True, t, 0.9))
+        slots["pc"].publish(GazeSample(c, d, i % 7 != 0, t - 0.02, 0.7))
+        fused = fusion.update(slots, t + 0.06)
+        if fused is not None:
+            gaze_filter.update(*calibrator.map(fused.x, fused.y), fused.t, t + 0.06)
+        x, y = gaze_filter.value(t + 0.06)
+        dwell.update(x, y, face_detected=fusion.has_face(t + 0.06), t=t + 0.06)
+
+    return time_calls("ui.fuse+map+filter+dwell", step, n, warmup=100)
+
+
+_SCREEN_PX = np.array([1920.0, 1080.0])
+_FIXATION_SPEED = 0.05  # screens/s below which the reference counts as fixating
+
+
+def _replay_filter(gaze_filter, trace: GazeTrace, tick: float = config.FRAME_DELAY_MS / 1000.0):
+    """Drive a filter like GhostUI does: each redraw feeds the latest arrived sample, then draws."""
+    ticks = np.arange(trace.arrive[0], trace.arrive[-1], tick)
+    latest = np.searchsorted(trace.arrive, ticks, side="right") - 1
+    out = np.empty((len(ticks), 2))
+    samples = []
+    clock = time.perf_counter
+    fed = -1
+    for k, now in enumerate(ticks):
+        t0 = clock()
+        i = latest[k]
+        if i != fed:
+            gaze_filter.update(trace.xy[i, 0], trace.xy[i, 1], trace.t[i], now)
+            fed = i
+        out[k] = gaze_filter.value(now)
+        samples.append(clock() - t0)
+    return ticks, out, samples
+
+
+def _lag_jitter(trace: GazeTrace, ticks: np.ndarray, out: np.ndarray) -> Dict[str, float]:
+    """Lag: time shift that best aligns the drawn dot with where the user looked.
+    Jitter: RMS redraw-to-redraw motion (px) while the user fixates.
+    Error: RMS distance (px) between the dot and the current gaze."""
+    shifts = np.arange(-0.1, 0.4, 0.002)
+    cost = [np.mean(np.sum((out - trace.reference(ticks - d)) ** 2, axis=1)) for d in shifts]
+    ref = trace.reference(ticks)
+    # Settled fixation: the reference stays within _FIXATION_SPEED over the last 300 ms and the next 100 ms.
+    here = trace.reference(ticks[1:])
+    fix = np.ones(len(here), dtype=bool)
+    for d in (-0.3, -0.2, -0.1, 0.1):
+        fix &= np.linalg.norm(trace.reference(ticks[1:] + d) - here, axis=1) < _FIXATION_SPEED * abs(d)
+    steps = np.diff(out, axis=0) * _SCREEN_PX
+    return {
+        "lag ms": float(shifts[int(np.argmin(cost))] * 1000.0),
+        "jitter px": float(np.sqrt(np.mean(np.sum(steps[fix] ** 2, axis=1)))) if fix.any() else 0.0,
+        "err px": float(np.sqrt(np.mean(np.sum(((out - ref) * _SCREEN_PX) ** 2, axis=1)))),
+    }
+
+
+def bench_filters(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    """Lag vs jitter of every gaze filter on a recorded (--recording) or synthetic trace."""
+    from pc_app.ui.filters import FILTERS
+
+    trace = None
+    if args.recording:
+        try:
+            trace = recorded_gaze_trace(args.recording, _make_processor(args), limit=max(n, 300))
+        except Exception as e:
+            print(f"[Bench] No gaze trace from {args.recording} ({e}); using a synthetic one.")
+        if trace is not None and len(trace.t) < 30:
+            print(f"[Bench] Only {len(trace.t)} face samples in {args.recording}; using a synthetic one.")
+            trace = None
+    if trace is None:
+        trace = synthetic_gaze_trace()
+
+    extra: Dict[str, float] = {"samples": float(len(trace.t))}
+    timings: List[float] = []
+    for name, cls in FILTERS.items():
+        ticks, out, samples = _replay_filter(cls(), trace)
+        if name == config.GAZE_FILTER:
+            timings = samples
+        for key, value in _lag_jitter(trace, ticks, out).items():
+            extra[f"{name} {key}"] = value
+    result = BenchResult.from_samples(f"ui.filters [{trace.name}, {config.GAZE_FILTER}]", timings)
+    result.extra = extra
+    return result
+
+
+def bench_loopback(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    """Full path: v2 client -> asyncio receiver -> decode -> inference, over 127.0.0.1."""
+    from pc_app.backend.pi_receiver import run_pi_receiver
+
+    try:
+        processor = _CountingProcessor(_make_processor(args))
+    except Exception as e:
+        return BenchResult("pipeline.loopback", skipped=f"EyeProcessor unavailable ({e})")
+
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    saved = (config.TCP_IP, config.TCP_PORT, config.LATENCY_REPORT_SEC, config.RECORD_DIR)
+    config.TCP_IP, config.TCP_PORT, config.LATENCY_REPORT_SEC, config.RECORD_DIR = "127.0.0.1", port, 0, ""
+
+    shared = SharedState()
+    service = InferenceService(shared, processor)  # type: ignore[arg-type]
+    service.start()
+    server = threading.Thread(target=run_pi_receiver, args=(shared, service), daemon=True)
+    server.start()
+    try:
+        sock = None
+        deadline = time.perf_counter() + 5.0
+        while sock is None:
+            try:
+                sock = socket.create_connection(("127.0.0.1", port), timeout=1.0)
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise
+                time.sleep(0.05)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(pack_clock_offset(0.0, 0.0))
+
+        interval = 1.0 / args.fps if args.fps > 0 else 0.0
+        t_start = time.perf_counter()
+        for i in range(n):
+            if interval:
+                delay = t_start + i * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            jpeg = jpegs[i % len(jpegs)]
+            sock.sendall(pack_frame_header(len(jpeg), i, time.perf_counter(), 0.0))
+            sock.sendall(jpeg)
+        time.sleep(0.3)  # let the last frame drain
+        elapsed = time.perf_counter() - t_start
+        sock.close()
+    finally:
+        shared.running = False
+        server.join(timeout=2.0)
+        config.TCP_IP, config.TCP_PORT, config.LATENCY_REPORT_SEC, config.RECORD_DIR = saved
+
+    p50, p95, p99 = shared.latency.summary()["inference"]
+    name = "pipeline.loopback" + (" [no-model]" if args.no_model else "")
+    result = BenchResult(name, processor.calls, elapsed, p50 * 1e3, p95 * 1e3, p99 * 1e3)
+    result.extra["sent"] = float(n)
+    result.extra["dropped"] = float(shared.latency.dropped)
+    return result
+
+
+def bench_heatmap(jpegs: List[bytes], n: int, args: argparse.Namespace) -> BenchResult:
+    from pc_app.ui.heatmap import AttentionHeatmap
+
+    heatmap = AttentionHeatmap(1920, 1080)
+    rng = np.random.default_rng(2)
+    points = rng.random((4096, 2)).tolist()
+
+    def step(i: int) -> None:
+        x, y = points[i % len(points)]
+        heatmap.add(x, y, i / 60.0)  # 60 Hz; every HEATMAP_BATCH-th call pays for the splat
+
+    result = time_calls("ui.heatmap.add", step, n, warmup=100)
+    result.extra["grid cells"] = float(heatmap.grid.size)
+    return result
+
+
+CASES: Dict[str, Case] = {
+    "transport": bench_transport,
+    "decode": bench_decode,
+    "eye_processor": bench_eye_processor,
+    "fusion": bench_fusion,
+    "filters": bench_filters,
+    "heatmap": bench_heatmap,
+    "loopback": bench_loopback,
+}
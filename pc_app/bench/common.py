@@ -0,0 +1,202 @@
+"""pc_app/bench/common.py
+Shared helpers for the benchmark cases: timing, frame sources, reporting.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int = 0
+    seconds: float = 0.0
+    p50_us: float = 0.0
+    p95_us: float = 0.0
+    p99_us: float = 0.0
+    extra: Dict[str, float] = field(default_factory=dict)
+    skipped: str = ""
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.seconds if self.seconds > 0 else 0.0
+
+    @classmethod
+    def from_samples(cls, name: str, samples_s: List[float], seconds: Optional[float] = None) -> "BenchResult":
+        arr = np.asarray(samples_s, dtype=np.float64) * 1e6
+        p50, p95, p99 = np.percentile(arr, [50, 95, 99]) if arr.size else (0.0, 0.0, 0.0)
+        total = float(arr.sum() / 1e6) if seconds is None else seconds
+        return cls(name, int(arr.size), total, float(p50), float(p95), float(p99))
+
+
+def time_calls(name: str, fn: Callable[[int], None], n: int, warmup: int = 10) -> BenchResult:
+    """Call fn(i) n times after `warmup` calls; per-call latency percentiles."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    clock = time.perf_counter
+    for i in range(n):
+        t0 = clock()
+        fn(i)
+        samples.append(clock() - t0)
+    return BenchResult.from_samples(name, samples)
+
+
+def synthetic_jpegs(count: int = 30, size=(640, 480), quality: int = 70, seed: int = 0) -> List[bytes]:
+    """Deterministic camera-like frames: smooth gradient, a bright blob and sensor noise."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    out = []
+    for i in range(count):
+        cx = w * (0.3 + 0.4 * i / max(1, count - 1))
+        blob = 120.0 * np.exp(-(((xx - cx) ** 2) + ((yy - h / 2) ** 2)) / (2 * (w / 8) ** 2))
+        base = 40.0 + 60.0 * xx / w + blob
+        img = np.clip(base[..., None] + rng.normal(0, 6, (h, w, 3)), 0, 255).astype(np.uint8)
+        ok, enc = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if ok:
+            out.append(enc.tobytes())
+    return out
+
+
+def recorded_jpegs(path: str, limit: int = 300) -> List[bytes]:
+    from pc_app.backend.recording import FrameRecording
+
+    rec = FrameRecording(path)
+    try:
+        return [bytes(rec.payload(i)) for i in range(min(limit, len(rec)))]
+    finally:
+        rec.close()
+
+
+@dataclass
+class GazeTrace:
+    """Calibrated gaze samples as the UI receives them, plus the true gaze if known."""
+
+    name: str
+    t: np.ndarray                            # capture time of each sample (s)
+    arrive: np.ndarray                       # time it reaches the UI (s), non-decreasing
+    xy: np.ndarray                           # (n, 2) measured gaze, normalized screen coords
+    truth_t: Optional[np.ndarray] = None     # dense true gaze (synthetic traces only)
+    truth_xy: Optional[np.ndarray] = None
+
+    def reference(self, times: np.ndarray) -> np.ndarray:
+        """Where the user looked at `times`: the true gaze, else the measured samples."""
+        src_t, src = (self.truth_t, self.truth_xy) if self.truth_t is not None else (self.t, self.xy)
+        return np.stack([np.interp(times, src_t, src[:, 0]), np.interp(times, src_t, src[:, 1])], axis=1)
+
+
+def synthetic_gaze_trace(
+    seconds: float = 60.0, rate: float = 30.0, latency_ms: float = 60.0, noise: float = 0.01, seed: int = 0
+) -> GazeTrace:
+    """Fixations joined by minimum-jerk saccades, with some smooth pursuit; noisy, delayed samples."""
+    rng = np.random.default_rng(seed)
+    step = 0.001
+    pos = np.array([0.5, 0.5])
+    segments = []
+    total = 0
+    while total * step < seconds:
+        if rng.random() < 0.2:
+            k = int(rng.uniform(0.5, 1.5) / step)
+            seg = np.clip(pos + np.outer(np.arange(1, k + 1) * step, rng.normal(0.0, 0.3, 2)), 0.05, 0.95)
+        else:
+            target = rng.uniform(0.1, 0.9, 2)
+            s = np.arange(1, int(rng.uniform(0.03, 0.06) / step) + 1, dtype=np.float64)
+            s /= s[-1]
+            s = 10 * s ** 3 - 15 * s ** 4 + 6 * s ** 5
+            hold = np.repeat(target[None], int(rng.uniform(0.3, 0.9) / step), axis=0)
+            seg = np.vstack([pos + np.outer(s, target - pos), hold])
+        segments.append(seg)
+        pos = seg[-1]
+        total += len(seg)
+    truth_xy = np.vstack(segments)
+    truth_t = np.arange(len(truth_xy)) * step
+
+    t = np.arange(0.0, truth_t[-1], 1.0 / rate)
+    xy = np.stack([np.interp(t, truth_t, truth_xy[:, 0]), np.interp(t, truth_t, truth_xy[:, 1])], axis=1)
+    xy += rng.normal(0.0, noise, xy.shape)
+    arrive = np.maximum.accumulate(t + latency_ms / 1000.0 + rng.exponential(0.01, len(t)))
+    return GazeTrace("synthetic", t, arrive, xy, truth_t, truth_xy)
+
+
+def recorded_gaze_trace(path: str, processor, limit: int = 3000) -> GazeTrace:
+    """Run `processor` over a .gzrec; samples keep their recorded capture->recv delay plus inference time."""
+    from pc_app.backend.recording import FrameRecording
+    from pc_app.ui.calibration import Calibrator
+
+    calibrator = Calibrator()
+    rec = FrameRecording(path)
+    t, arrive, xy = [], [], []
+    try:
+        for i in range(min(limit, len(rec))):
+            frame = cv2.imdecode(np.frombuffer(rec.payload(i), dtype=np.uint8), cv2.IMREAD_COLOR)
+            t0 = time.perf_counter()
+            x, y, ok, _ = processor.process(frame, source="pi", draw_debug=False)
+            infer = time.perf_counter() - t0
+            if ok:
+                idx = rec.index[i]
+                t.append(float(idx["capture_ts"]))
+                arrive.append(float(idx["recv_ts"]) + infer)
+                xy.append(calibrator.map(x, y))
+    finally:
+        rec.close()
+    arr_t = np.asarray(t, dtype=np.float64)
+    return GazeTrace(path, arr_t, np.maximum.accumulate(np.asarray(arrive, dtype=np.float64)), np.asarray(xy, dtype=np.float64).reshape(-1, 2))
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+    }
+
+
+def print_table(results: List[BenchResult]) -> None:
+    print(f"{'case':<36}{'ops/s':>12}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}")
+    for r in results:
+        if r.skipped:
+            print(f"{r.name:<36}  skipped: {r.skipped}")
+            continue
+        print(f"{r.name:<36}{r.ops_per_sec:>12.1f}{r.p50_us:>12.1f}{r.p95_us:>12.1f}{r.p99_us:>12.1f}")
+        for k, v in r.extra.items():
+            print(f"{'':<36}  {k}: {v:.3f}")
+
+
+def save_json(path: str, results: List[BenchResult]) -> None:
+    data = {"env": environment(), "results": [asdict(r) for r in results]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def compare(path: str, results: List[BenchResult]) -> None:
+    """Print p50 / throughput change against a previous --json run."""
+    with open(path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    before = {r["name"]: r for r in base["results"] if not r.get("skipped")}
+    print(f"\nvs {path} (commit {base['env'].get('commit', '?')}):")
+    for r in results:
+        b = before.get(r.name)
+        if b is None or r.skipped or not b["p50_us"]:
+            continue
+        b_ops = b["ops"] / b["seconds"] if b["seconds"] else 0.0
+        d_p50 = (r.p50_us / b["p50_us"] - 1.0) * 100.0
+        d_ops = (r.ops_per_sec / b_ops - 1.0) * 100.0 if b_ops else 0.0
+        print(f"  {r.name:<26} p50 {d_p50:+6.1f}%   ops/s {d_ops:+6.1f}%")
@@ -0,0 +1,120 @@
+"""pc_app/bench/transport.py
+Loopback microbenchmark: legacy `recv_jpeg_frame` vs pooled `FrameReader`.
+
+Usage:
+    python -m pc_app.bench.transport --frames 2000 --size 120000 --chunk 1460
+
+`--chunk` makes the sender write each frame in small pieces, like a Wi-Fi
+link delivering MTU-sized segments; that is where `data += chunk` turns
+quadratic.
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import struct
+import threading
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+
+from pc_app.backend.transport import BufferPool, FrameReader, recv_jpeg_frame
+
+# Created up front so the preallocated buffers are not counted as per-frame allocations.
+_POOL = BufferPool()
+
+
+def _loopback_pair() -> Tuple[socket.socket, socket.socket]:
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    client = socket.create_connection(server.getsockname())
+    conn, _ = server.accept()
+    server.close()
+    for s in (client, conn):
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return client, conn
+
+
+def _sender(sock: socket.socket, message: bytes, frames: int, chunk: int) -> None:
+    view = memoryview(message)
+    try:
+        for _ in range(frames):
+            for off in range(0, len(view), chunk):
+                sock.sendall(view[off : off + chunk])
+    finally:
+        sock.close()
+
+
+def _run(
+    read_all: Callable[[socket.socket, int], int], payload_size: int, frames: int, chunk: int, trace: bool
+) -> Tuple[float, int, int]:
+    """Returns (seconds, bytes received, peak traced bytes)."""
+    payload = np.random.default_rng(0).integers(0, 256, payload_size, dtype=np.uint8).tobytes()
+    message = struct.pack(">L", len(payload)) + payload
+
+    client, conn = _loopback_pair()
+    sender = threading.Thread(target=_sender, args=(client, message, frames, chunk), daemon=True)
+
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    sender.start()
+    received = read_all(conn, frames)
+    elapsed = time.perf_counter() - t0
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    sender.join()
+    conn.close()
+    return elapsed, received, peak
+
+
+def _read_legacy(conn: socket.socket, frames: int) -> int:
+    total = 0
+    for _ in range(frames):
+        data = recv_jpeg_frame(conn)
+        if data is None:
+            break
+        # What _decode_jpeg hands to cv2.imdecode
+        total += np.frombuffer(data, dtype=np.uint8).size
+    return total
+
+
+def _read_pooled(conn: socket.socket, frames: int) -> int:
+    reader = FrameReader(conn, _POOL)
+    total = 0
+    for _ in range(frames):
+        frame = reader.read_frame()
+        if frame is None:
+            break
+        total += np.frombuffer(frame.view, dtype=np.uint8).size
+        frame.release()
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=120_000, help="payload bytes per frame")
+    parser.add_argument("--chunk", type=int, default=1460, help="sender write size in bytes")
+    args = parser.parse_args()
+
+    print(f"[Bench] transport: {args.frames} frames x {args.size} bytes over loopback (chunk {args.chunk})")
+    for name, fn in (("recv_jpeg_frame", _read_legacy), ("FrameReader", _read_pooled)):
+        print(f"  {name}")
+        elapsed, received, _ = _run(fn, args.size, args.frames, args.chunk, trace=False)
+        _, _, peak = _run(fn, args.size, args.frames, args.chunk, trace=True)
+        mb_s = received / elapsed / 1e6
+        fps = args.frames / elapsed
+        print(f"    {mb_s:8.1f} MB/s  {fps:8.0f} frames/s  peak alloc {peak / 1024:8.1f} KiB")
+    print(f"  FrameReader pool misses: {_POOL.misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,20 +14,86 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")  # e.g., setx GEMINI_API_KEY "Y
 
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
+# Screenshot sent with a request (pc_app/ai/capture.py): region around the fixation, compressed
+AI_CONTEXT_MARGIN_PX = 480       # capture this far around the gaze point (0 = full screen)
+AI_MAX_IMAGE_SIDE = 1024         # downscale so the longer side is at most this
+AI_IMAGE_FORMAT = "JPEG"         # "JPEG" or "WEBP"
+AI_IMAGE_QUALITY = 85            # starting quality, lowered until the budget is met
+AI_IMAGE_MAX_BYTES = 150_000     # encoded size budget per request
+
+# Request queue (pc_app/ai/controller.py): one worker, the latest trigger wins
+AI_CANCEL_DISTANCE = 0.1         # a new fixation this far (screen fraction) cancels the pending request
+
+# Answer cache keyed by a perceptual hash of the capture (pc_app/ai/cache.py)
+AI_CACHE = True
+AI_CACHE_SIZE = 128              # entries (least recently used evicted first)
+AI_CACHE_TTL_SEC = 600.0         # answers older than this are asked again (0 = never expire)
+AI_CACHE_MAX_DISTANCE = 24       # Hamming distance (of 256 hash bits) still counted as the same screen
+AI_CACHE_GAZE_CELL_PX = 64       # a hit also needs the gaze in the same cell of this size (image pixels)
+AI_CACHE_FILE = os.getenv("GAZE_AI_CACHE_FILE", "")  # persist answers as JSON here (empty = memory only)
+
 # ================= Network =================
 TCP_IP = "0.0.0.0"      # Listen on all interfaces
 TCP_PORT = 4242
+MAX_PI_CLIENTS = 4      # concurrent Pi camera heads
+LATENCY_REPORT_SEC = 10.0  # print Pi pipeline latency percentiles (0 = off)
+
+# ================= Record / Replay =================
+# Tee every Pi stream to <dir>/<source>-<time>.gzrec (empty = off)
+RECORD_DIR = os.getenv("GAZE_RECORD_DIR", "")
+# Replay a .gzrec file instead of listening for Pis (empty = live)
+REPLAY_FILE = os.getenv("GAZE_REPLAY_FILE", "")
+REPLAY_SPEED = float(os.getenv("GAZE_REPLAY_SPEED", "1.0"))  # 0 = as fast as possible
+# Gaze sample history kept in memory (GazeHistory in pc_app/backend/history.py)
+HISTORY_CAPACITY = 36_000          # samples (~20 min of fused 30 FPS gaze)
+# Export the history to <dir>/gaze-<time>.npy on exit (empty = off)
+HISTORY_EXPORT_DIR = os.getenv("GAZE_HISTORY_DIR", "")
 RECV_BUFFER_SIZE = 65536
 MAX_JPEG_BYTES = 5_000_000
+RECV_POOL_BUFFERS = 4               # reader + slot + decoder + spare
+RECV_POOL_BUFFER_BYTES = 256 * 1024  # grows on demand for larger JPEGs
 
 # ================= Camera Selection =================
 PC_CAMERA_ID = 0        # Try 0, if fails try 1
 
 # ================= MediaPipe / Tracking =================
-PROCESS_EVERY_N_FRAMES = 2
 CONFIDENCE = 0.5
 IRIS_LANDMARK_INDEX = 468
 
+# Landmarker running mode: "video" tracks between frames (per camera stream),
+# "image" runs a cold full-frame detection on every frame.
+EYE_RUNNING_MODE = "video"
+EYE_ROI_TRACKING = True   # crop to the previous face box (video mode only)
+EYE_ROI_MARGIN = 0.4      # padding around the face box, fraction of face size
+EYE_ROI_MAX_SIDE = 256    # downscale the crop so its long side is at most this (px)
+
+# Hybrid tracking: landmarker every K frames, Lucas-Kanade eye tracking in between
+EYE_HYBRID_TRACKING = True
+HYBRID_K_MIN = 2            # keyframe interval bounds (K adapts to motion/error)
+HYBRID_K_MAX = 6
+HYBRID_MOTION_PX = 2.5      # median point motion per frame that shortens K
+HYBRID_LOST_ERROR_PX = 1.5  # forward-backward error that drops the track
+HYBRID_CROP_PADDING = 0.5   # eye-region crop padding, fraction of the eye span
+
+# Shared inference scheduling: a source whose last frame had a face is served
+# first, with its waiting time weighted by this factor (others weigh 1.0)
+INFERENCE_FACE_PRIORITY = 2.0
+
+# Inference backend: "thread" runs EyeProcessor inside this process; "process"
+# runs it in worker processes fed through shared memory, keeping MediaPipe and
+# OpenCV work off the UI process's GIL. Each stream sticks to one worker.
+INFERENCE_BACKEND = os.getenv("GAZE_INFERENCE_BACKEND", "thread")
+INFERENCE_WORKERS = 2
+WORKER_RING_SLOTS = 2                 # frame slots per worker
+WORKER_SLOT_BYTES = 1920 * 1080 * 3   # largest BGR frame a slot can hold
+WORKER_TIMEOUT_SEC = 2.0              # give up on a result after this long
+
+# Motion gate: reuse the last result while the (downscaled, grayscale) eye region is static
+EYE_MOTION_GATE = True
+MOTION_GATE_SIZE = (64, 32)      # patch the eye region is reduced to (w, h)
+MOTION_GATE_THRESHOLD = 2.0      # mean absolute difference (0-255) below which a frame is static
+MOTION_GATE_MAX_SKIP = 15        # refresh after this many consecutive skipped frames
+
 # Normalization ranges (tune per device angle)
 # NOTE: These are raw MediaPipe landmark coords in normalized space.
 PI_X_MIN, PI_X_MAX = 0.10, 0.90
@@ -36,24 +102,86 @@ PI_Y_MIN, PI_Y_MAX = 0.40, 0.60
 PC_X_MIN, PC_X_MAX = 0.20, 0.80
 PC_Y_MIN, PC_Y_MAX = 0.42, 0.58
 
+# Gaze feature: "eye" = both irises relative to their eye corners and lids
+# (head translation/roll invariant), "iris" = legacy iris position in the
+# camera frame against the ranges above. Recalibrate after switching.
+EYE_GAZE_FEATURE = os.getenv("GAZE_EYE_FEATURE", "eye")
+EYE_FEATURE_X_MIN, EYE_FEATURE_X_MAX = 0.30, 0.70
+EYE_FEATURE_Y_MIN, EYE_FEATURE_Y_MAX = 0.00, 1.00
+# Add head yaw/pitch (facial transformation matrix, keyframes only) to the
+# "eye" feature; gains are feature units per radian, negate to flip
+EYE_HEAD_POSE = False
+EYE_HEAD_YAW_GAIN = 0.5
+EYE_HEAD_PITCH_GAIN = 0.5
+
 # ================= UI Settings =================
-SMOOTHING_FACTOR = 0.08
 DOT_RADIUS = 12
-FRAME_DELAY_MS = 16  # ~60 FPS
+FRAME_DELAY_MS = 16  # ~60 FPS, only while the dot/indicators are animating
+IDLE_TICK_MS = 250   # redraw cadence with no new samples and nothing animating
+
+# Gaze filter between calibration and the dot (pc_app/ui/filters.py):
+# "exponential" (legacy glide), "one_euro" or "kalman"
+GAZE_FILTER = os.getenv("GAZE_FILTER", "kalman")
+SMOOTHING_FACTOR = 0.08        # exponential: fraction of the distance covered per 16 ms frame
+GAZE_PREDICT = True            # one_euro/kalman: extrapolate the last sample by its measured age
+GAZE_PREDICT_MAX_MS = 150.0    # never extrapolate further ahead than this
+GAZE_PREDICT_MIN_SPEED = 0.3   # screens/s of estimated speed treated as noise (not extrapolated)
+ONE_EURO_MIN_CUTOFF = 0.5      # Hz; lower = steadier fixations
+ONE_EURO_BETA = 10.0           # cutoff increase per screen/s of gaze speed; higher = less lag
+ONE_EURO_D_CUTOFF = 1.0        # Hz; smoothing of the speed estimate
+KALMAN_ACCEL_NOISE = 0.5       # white-acceleration spectral density (screens^2/s^3)
+KALMAN_MEASUREMENT_NOISE = 0.01  # sample noise std (fraction of the screen)
+KALMAN_SACCADE_SIGMA = 5.0     # innovation (std devs) treated as a saccade jump (0 = off)
+
+# Multi-camera fusion (pc_app/ui/fusion.py)
+FUSION_STALE_MS = 250.0            # ignore a source whose last face sample is older than this
+FUSION_MAX_EXTRAPOLATE_MS = 100.0  # bring older sources forward by at most this much
+FUSION_HISTORY = 8                 # timestamped samples kept per source
+FUSION_NOISE_VAR = 1e-4            # starting noise variance per source (raw gaze units^2)
+FUSION_VARIANCE_ALPHA = 0.1        # EMA rate of the per-source noise estimate
+FUSION_DRIFT = 0.5                 # uncertainty growth while bridging a time gap (raw units/s)
 
 # Grid Settings
 GRID_ROWS = 8
 GRID_COLS = 8
 GRID_ALPHA = 0.3
 
+# Attention heatmap overlay (pc_app/ui/heatmap.py): H toggles it, E exports PNG + NPY
+HEATMAP_DOWNSAMPLE = 16           # screen pixels per heatmap cell (per axis)
+HEATMAP_SIGMA_PX = 48.0           # Gaussian splat radius, screen pixels
+HEATMAP_HALF_LIFE_SEC = 60.0      # attention fades by half over this long (0 = never)
+HEATMAP_BATCH = 32                # gaze points splatted together
+HEATMAP_REFRESH_MS = 500          # overlay redraw cadence while shown
+HEATMAP_EXPORT_DIR = os.getenv("GAZE_HEATMAP_DIR", "heatmaps")
+
 # Dwell Trigger
 DWELL_THRESHOLD = 2.0
 TRIGGER_COOLDOWN = 3.0
 
+# Fixation detection feeding the dwell trigger (FixationDetector in pc_app/ui/fixation.py)
+FIXATION_METHOD = os.getenv("GAZE_FIXATION", "idt")  # "idt" (dispersion) or "ivt" (velocity)
+FIXATION_DISPERSION = 0.05        # I-DT: max x range + y range of a fixation (screen fraction)
+FIXATION_VELOCITY = 0.5           # I-VT: max gaze speed inside a fixation (screens/s)
+FIXATION_MIN_SEC = 0.1            # a steady run becomes a fixation after this long
+
 # Calibration
 CALIBRATION_FILE = "calibration.json"
-CALIBRATION_DWELL_SEC = 2.0
-CALIBRATION_BUFFER = 0.02
+CALIBRATION_POINTS = 9            # targets: 9 (3x3) or 16 (4x4)
+CALIBRATION_MARGIN = 0.05         # target grid inset from the screen edges (fraction)
+CALIBRATION_SETTLE_SEC = 0.6      # per target: wait for the eyes to land before sampling
+CALIBRATION_DWELL_SEC = 1.5       # per target: then collect samples for this long
+CALIBRATION_OUTLIER_MAD = 3.0     # drop samples this many robust std devs from the target's median
+CALIBRATION_RESIDUAL_SIGMA = 2.5  # refit without samples whose error exceeds this many RMS
+CALIBRATION_BUFFER = 0.02         # legacy four-corner min/max calibration only
+
+# Online recalibration from dwell fixations (OnlineRecalibrator in pc_app/ui/calibration.py)
+ONLINE_RECALIBRATION = True
+RECAL_FORGETTING = 0.98        # RLS forgetting factor per fixation (1 = never forget)
+RECAL_PRIOR_VAR = 1.0          # trust in the existing fit (smaller = slower updates)
+RECAL_MIN_SAMPLES = 8          # fused samples needed from one fixation
+RECAL_MAX_DISPERSION = 0.01    # max per-axis std of the fixation's raw samples
+RECAL_MAX_ERROR = 0.08         # ignore fixations the current mapping misses by more (screen fraction)
+RECAL_SAVE_SEC = 10.0          # at most one background profile save per this interval
 
 # Debugging
 SHOW_DEBUG_VIEW = True  # Set to False for production
@@ -2,13 +2,15 @@
 Windows PC entrypoint for Ghost Gaze.
 
 Starts:
-- Backend threads (Pi receiver + PC camera)
+- The shared inference service (one model for every camera)
+- Backend threads (Pi receiver, or a recorded stream replay, + PC camera)
 - UI overlay (Tkinter)
 """
 
 import threading
 
-from pc_app.backend import SharedState, run_pi_receiver, run_pc_camera
+import config
+from pc_app.backend import InferenceService, SharedState, run_pi_receiver, run_pc_camera, run_replay_receiver
 from pc_app.ui import GhostUI
 
 
@@ -16,8 +18,11 @@ def main() -> None:
     shared = SharedState()
 
     print("[Main] Starting backend threads...")
-    t1 = threading.Thread(target=run_pi_receiver, args=(shared,), daemon=True)
-    t2 = threading.Thread(target=run_pc_camera, args=(shared,), daemon=True)
+    service = InferenceService(shared)
+    service.start()
+    pi_source = run_replay_receiver if config.REPLAY_FILE else run_pi_receiver
+    t1 = threading.Thread(target=pi_source, args=(shared, service), daemon=True)
+    t2 = threading.Thread(target=run_pc_camera, args=(shared, service), daemon=True)
     t1.start()
     t2.start()
 
@@ -29,6 +34,7 @@ def main() -> None:
         pass
     finally:
         shared.running = False
+        service.close()
         print("[Main] Exiting...")
 
 
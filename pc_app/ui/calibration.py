@@ -1,15 +1,68 @@
 """pc_app/ui/calibration.py
 Calibration mapping (raw gaze -> normalized screen coords) with persistence.
+
+A calibration shows a 3x3 or 4x4 grid of targets (CALIBRATION_POINTS) and
+collects every fused sample per target. Per target, samples further than
+CALIBRATION_OUTLIER_MAD robust deviations from the median are dropped;
+a 2nd-order polynomial per screen axis,
+
+    s = c0 + c1*x + c2*y + c3*x^2 + c4*x*y + c5*y^2,
+
+is then fitted to all remaining samples with least squares, samples with
+large residuals are rejected once and the fit is repeated. With fewer than
+six usable targets an affine map (c0..c2) is fitted instead.
+
+Profiles without coefficients (the legacy four-corner min/max bounds) still
+load and map as before.
+
+`OnlineRecalibrator` keeps the fit current between full calibrations: each
+steady fixation on a UI element at a known position (the dwell indicator,
+which stays put while the dwell completes) becomes one more correspondence,
+folded into the coefficients by recursive least squares with forgetting.
+That is O(terms^2) per fixation, and the profile is saved in the background.
 """
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 import json
 import os
+import threading
+import time
+
+import numpy as np
 
 import config
 
+_POLY_TERMS = 6
+_AFFINE_TERMS = 3
+_MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+
+
+def calibration_targets(points: int = config.CALIBRATION_POINTS, margin: float = config.CALIBRATION_MARGIN) -> List[Tuple[float, float]]:
+    """Row-major square grid of `points` targets (9 or 16) in normalized screen coords."""
+    side = max(2, int(round(points ** 0.5)))
+    ticks = np.linspace(margin, 1.0 - margin, side)
+    return [(float(x), float(y)) for y in ticks for x in ticks]
+
+
+def _features(raw: np.ndarray, terms: int) -> np.ndarray:
+    """(n, 2) raw gaze -> (n, terms) design matrix."""
+    x, y = raw[:, 0], raw[:, 1]
+    cols = [np.ones_like(x), x, y, x * x, x * y, y * y]
+    return np.stack(cols[:terms], axis=1)
+
+
+def _reject_outliers(samples: np.ndarray, k: float) -> np.ndarray:
+    """Samples within k robust standard deviations of the per-target median."""
+    if len(samples) < 4:
+        return samples
+    dist = np.linalg.norm(samples - np.median(samples, axis=0), axis=1)
+    spread = _MAD_SCALE * np.median(dist)
+    if spread <= 0.0:
+        return samples
+    return samples[dist <= k * spread]
+
 
 @dataclass
 class Calibrator:
@@ -19,17 +72,83 @@ class Calibrator:
     y_min: float = 0.35
     y_max: float = 0.60
     points: List[Tuple[float, float]] = field(default_factory=list)
+    coeffs: Optional[np.ndarray] = None  # (terms, 2) polynomial/affine fit; None = min/max bounds
+    feature: str = config.EYE_GAZE_FEATURE  # gaze feature the profile was made with
+    residual: float = 0.0                # RMS fit error of the current profile (screen fraction)
 
     def __post_init__(self) -> None:
+        self._rows: Optional[Tuple[Tuple[float, ...], Tuple[float, ...]]] = None
+        # Background saves and flush() may overlap: writes are serialized, and a
+        # snapshot older than the one already on disk is not written.
+        self._save_lock = threading.Lock()
+        self._save_seq = 0
+        self._saved_seq = 0
         self.load()
 
+    # ---------------- Mapping ----------------
     def map(self, raw_x: float, raw_y: float) -> Tuple[float, float]:
-        """Map raw normalized gaze values into [0, 1] range using calibration bounds."""
+        """Map raw normalized gaze values into [0, 1] range using the calibration."""
+        if self._rows is not None:
+            (a0, a1, a2, a3, a4, a5), (b0, b1, b2, b3, b4, b5) = self._rows
+            xx, xy, yy = raw_x * raw_x, raw_x * raw_y, raw_y * raw_y
+            norm_x = a0 + a1 * raw_x + a2 * raw_y + a3 * xx + a4 * xy + a5 * yy
+            norm_y = b0 + b1 * raw_x + b2 * raw_y + b3 * xx + b4 * xy + b5 * yy
+            return self._clip01(norm_x), self._clip01(norm_y)
         norm_x = (raw_x - self.x_min) / (self.x_max - self.x_min)
         norm_y = (raw_y - self.y_min) / (self.y_max - self.y_min)
         return self._clip01(norm_x), self._clip01(norm_y)
 
+    def map_batch(self, raw: np.ndarray) -> np.ndarray:
+        """Vectorized `map` for an (n, 2) array of raw gaze samples."""
+        raw = np.asarray(raw, dtype=np.float64).reshape(-1, 2)
+        if self.coeffs is not None:
+            out = _features(raw, len(self.coeffs)) @ self.coeffs
+        else:
+            lo = np.array([self.x_min, self.y_min])
+            out = (raw - lo) / (np.array([self.x_max, self.y_max]) - lo)
+        return np.clip(out, 0.0, 1.0)
+
+    # ---------------- Fitting ----------------
+    def fit(self, targets: Sequence[Tuple[float, float]], samples: Sequence[np.ndarray]) -> bool:
+        """Fit the mapping from per-target raw samples ((n_i, 2) arrays). Saves on success."""
+        raw_parts, goal_parts = [], []
+        for target, s in zip(targets, samples):
+            kept = _reject_outliers(np.asarray(s, dtype=np.float64).reshape(-1, 2), config.CALIBRATION_OUTLIER_MAD)
+            if len(kept):
+                raw_parts.append(kept)
+                goal_parts.append(np.repeat(np.asarray(target, dtype=np.float64)[None], len(kept), axis=0))
+        if len(raw_parts) < 3:
+            print(f"[Calibration] Only {len(raw_parts)} targets with samples; keeping the previous profile.")
+            return False
+        terms = _POLY_TERMS if len(raw_parts) >= _POLY_TERMS else _AFFINE_TERMS
+        raw = np.vstack(raw_parts)
+        goal = np.vstack(goal_parts)
+
+        design = _features(raw, terms)
+        coeffs = np.linalg.lstsq(design, goal, rcond=None)[0]
+        err = np.linalg.norm(design @ coeffs - goal, axis=1)
+        rms = float(np.sqrt(np.mean(err ** 2)))
+        keep = err <= config.CALIBRATION_RESIDUAL_SIGMA * rms
+        if rms > 0.0 and keep.sum() >= terms and not keep.all():
+            coeffs = np.linalg.lstsq(design[keep], goal[keep], rcond=None)[0]
+            err = np.linalg.norm(design[keep] @ coeffs - goal[keep], axis=1)
+            rms = float(np.sqrt(np.mean(err ** 2)))
+
+        self._set_coeffs(coeffs)
+        self.residual = rms
+        self.feature = config.EYE_GAZE_FEATURE
+        # Bounds of the fitted samples, so the profile stays usable as a legacy one.
+        self.x_min, self.y_min = (float(v) for v in raw.min(axis=0))
+        self.x_max, self.y_max = (float(v) for v in raw.max(axis=0))
+        print(
+            f"[Calibration] Fitted {'poly2' if terms == _POLY_TERMS else 'affine'} on {len(raw_parts)} targets, "
+            f"{int(keep.sum())}/{len(raw)} samples, RMS error {rms:.3f} of the screen"
+        )
+        self.save()
+        return True
+
     def update_from_points(self, points: List[Tuple[float, float]]) -> None:
+        """Legacy four-corner calibration: min/max bounds of one sample per corner."""
         if len(points) < 4:
             return
         xs = [p[0] for p in points]
@@ -39,13 +158,59 @@ class Calibrator:
         self.x_max = max(xs) - buf
         self.y_min = min(ys) + buf
         self.y_max = max(ys) - buf
+        self._set_coeffs(None)
         print(f"[Calibration] Updated range: X({self.x_min:.3f}-{self.x_max:.3f}), Y({self.y_min:.3f}-{self.y_max:.3f})")
         self.save()
 
-    def save(self) -> None:
+    def _set_coeffs(self, coeffs: Optional[np.ndarray]) -> None:
+        self.coeffs = coeffs
+        if coeffs is None:
+            self._rows = None
+            return
+        full = np.zeros((_POLY_TERMS, 2))
+        full[: len(coeffs)] = coeffs
+        self._rows = (tuple(float(v) for v in full[:, 0]), tuple(float(v) for v in full[:, 1]))
+
+    def poly_coeffs(self) -> np.ndarray:
+        """Current mapping as (6, 2) poly2 coefficients (bounds and affine fits included)."""
+        full = np.zeros((_POLY_TERMS, 2))
+        if self.coeffs is not None:
+            full[: len(self.coeffs)] = self.coeffs
+            return full
+        sx, sy = 1.0 / (self.x_max - self.x_min), 1.0 / (self.y_max - self.y_min)
+        full[0] = (-self.x_min * sx, -self.y_min * sy)
+        full[1, 0] = sx
+        full[2, 1] = sy
+        return full
+
+    # ---------------- Persistence ----------------
+    def save(self, background: bool = False) -> None:
+        """Write the profile; with `background`, a snapshot is written by a short-lived thread."""
         data = {"x_min": self.x_min, "x_max": self.x_max, "y_min": self.y_min, "y_max": self.y_max}
-        with open(self.calib_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        data["feature"] = config.EYE_GAZE_FEATURE
+        if self.coeffs is not None:
+            data["coeffs"] = self.coeffs.tolist()
+            data["residual"] = self.residual
+        with self._save_lock:
+            self._save_seq += 1
+            seq = self._save_seq
+        if background:
+            threading.Thread(target=self._write, args=(data, seq), name="calibration-save", daemon=True).start()
+        else:
+            self._write(data, seq)
+
+    def _write(self, data: dict, seq: int) -> None:
+        tmp = self.calib_file + ".tmp"
+        with self._save_lock:
+            if seq < self._saved_seq:
+                return  # a newer snapshot is already on disk
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.calib_file)
+                self._saved_seq = seq
+            except OSError as e:
+                print(f"[Calibration] Could not save {self.calib_file}: {e}")
 
     def load(self) -> None:
         if not os.path.exists(self.calib_file):
@@ -57,10 +222,85 @@ class Calibrator:
             self.x_max = float(data["x_max"])
             self.y_min = float(data["y_min"])
             self.y_max = float(data["y_max"])
+            coeffs = data.get("coeffs")
+            if coeffs is not None:
+                arr = np.asarray(coeffs, dtype=np.float64)
+                if arr.ndim == 2 and arr.shape[1] == 2 and len(arr) in (_AFFINE_TERMS, _POLY_TERMS):
+                    self._set_coeffs(arr)
+                    self.residual = float(data.get("residual", 0.0))
+            self.feature = str(data.get("feature", "iris"))
             print("[Calibration] Loaded existing profile.")
+            if self.feature != config.EYE_GAZE_FEATURE:
+                print(
+                    f"[Calibration] Profile was made with the {self.feature!r} gaze feature, now "
+                    f"{config.EYE_GAZE_FEATURE!r}: recalibrate (press C)."
+                )
         except Exception:
             pass
 
     @staticmethod
     def _clip01(v: float) -> float:
         return max(0.0, min(1.0, v))
+
+
+class OnlineRecalibrator:
+    """Recursive least squares updates of a Calibrator from fixations on known targets.
+
+    Each axis of the poly2 mapping is a linear model in the same features, so
+    one inverse-covariance-like matrix P (6x6) serves both. A fixation is
+    accepted only if its raw samples are tight (RECAL_MAX_DISPERSION) and the
+    current mapping already lands within RECAL_MAX_ERROR of the target, i.e.
+    the user was plausibly looking at it.
+    """
+
+    def __init__(self, calibrator: Calibrator) -> None:
+        self.calibrator = calibrator
+        self.forgetting = config.RECAL_FORGETTING
+        self.updates = 0
+        self.rejected = 0
+        self._last_save = 0.0
+        self._dirty = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Restart from the calibrator's current mapping (after a full calibration)."""
+        self._theta = self.calibrator.poly_coeffs()
+        self._p = np.eye(_POLY_TERMS) * config.RECAL_PRIOR_VAR
+
+    def add_fixation(self, target: Tuple[float, float], raw_samples: np.ndarray) -> bool:
+        """Use one fixation (raw samples while looking at `target`, normalized screen coords)."""
+        raw = np.asarray(raw_samples, dtype=np.float64).reshape(-1, 2)
+        if len(raw) < config.RECAL_MIN_SAMPLES:
+            return False
+        raw = _reject_outliers(raw, config.CALIBRATION_OUTLIER_MAD)
+        center = raw.mean(axis=0)
+        goal = np.asarray(target, dtype=np.float64)
+        mapped = self.calibrator.map_batch(center)[0]
+        if raw.std(axis=0).max() > config.RECAL_MAX_DISPERSION or np.linalg.norm(mapped - goal) > config.RECAL_MAX_ERROR:
+            self.rejected += 1
+            return False
+
+        phi = _features(center[None], _POLY_TERMS)[0]
+        p_phi = self._p @ phi
+        gain = p_phi / (self.forgetting + phi @ p_phi)
+        self._theta += np.outer(gain, goal - phi @ self._theta)
+        p = self._p - np.outer(gain, p_phi)
+        if np.trace(p) / self.forgetting < config.RECAL_PRIOR_VAR * _POLY_TERMS:
+            p /= self.forgetting  # forget only while it cannot wind up unexcited directions
+        self._p = p
+        self.calibrator._set_coeffs(self._theta.copy())
+        self.updates += 1
+        self._dirty = True
+
+        now = time.perf_counter()
+        if now - self._last_save >= config.RECAL_SAVE_SEC:
+            self._last_save = now
+            self._dirty = False
+            self.calibrator.save(background=True)
+        return True
+
+    def flush(self) -> None:
+        """Save pending updates now (on exit)."""
+        if self._dirty:
+            self._dirty = False
+            self.calibrator.save()
@@ -1,16 +1,48 @@
 """pc_app/ui/debug_view.py
 Optional debug window showing Pi and PC frames.
+
+The backend renders 320x240 RGB previews into versioned slots. Each pane
+keeps one PhotoImage and one canvas item for its lifetime; a new preview
+is pasted into the PhotoImage, and a pane whose slot generation has not
+changed is not touched at all.
 """
 
 from __future__ import annotations
 
 import tkinter as tk
 from tkinter import Toplevel
-from typing import Optional
 
-import cv2
 from PIL import Image, ImageTk
 
+from pc_app.backend.slots import PREVIEW_SIZE, PreviewSlot
+
+
+class _Pane:
+    def __init__(self, parent: tk.Widget, title: str) -> None:
+        w, h = PREVIEW_SIZE
+        frame = tk.Frame(parent, bg="#202020")
+        frame.pack(side=tk.LEFT, padx=10, pady=10)
+        tk.Label(frame, text=title, fg="white", bg="#202020").pack()
+        self.canvas = tk.Canvas(frame, width=w, height=h, bg="black", highlightthickness=0)
+        self.canvas.pack()
+        self.photo = ImageTk.PhotoImage("RGB", PREVIEW_SIZE)
+        self.item = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW, state="hidden")
+        self.generation = -1
+
+    def update(self, slot: PreviewSlot) -> None:
+        latest = slot.read_if_newer(self.generation)
+        if latest is None:
+            return
+        gen, rgb = latest
+        if rgb is None:
+            self.canvas.itemconfig(self.item, state="hidden")
+            self.generation = gen
+            return
+        self.photo.paste(Image.fromarray(rgb))
+        self.canvas.itemconfig(self.item, state="normal")
+        # If the writer lapped us mid-paste, take the next preview even if nothing newer arrives.
+        self.generation = gen if slot.still_valid(gen) else -1
+
 
 class DebugView:
     def __init__(self, root: tk.Tk) -> None:
@@ -22,44 +54,20 @@ class DebugView:
 
         self.info_label = tk.Label(self.win, text="", fg="white", bg="#202020")
         self.info_label.pack(side=tk.TOP, fill=tk.X, pady=4)
+        self._status = ("", False)
 
         body = tk.Frame(self.win, bg="#202020")
         body.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
-        left = tk.Frame(body, bg="#202020")
-        left.pack(side=tk.LEFT, padx=10, pady=10)
-        tk.Label(left, text="Raspberry Pi", fg="white", bg="#202020").pack()
-        self.pi_canvas = tk.Canvas(left, width=320, height=240, bg="black", highlightthickness=0)
-        self.pi_canvas.pack()
-
-        right = tk.Frame(body, bg="#202020")
-        right.pack(side=tk.LEFT, padx=10, pady=10)
-        tk.Label(right, text="PC Webcam", fg="white", bg="#202020").pack()
-        self.pc_canvas = tk.Canvas(right, width=320, height=240, bg="black", highlightthickness=0)
-        self.pc_canvas.pack()
-
-        self._pi_img_ref: Optional[ImageTk.PhotoImage] = None
-        self._pc_img_ref: Optional[ImageTk.PhotoImage] = None
+        self._pi = _Pane(body, "Raspberry Pi")
+        self._pc = _Pane(body, "PC Webcam")
 
     def update_status(self, text: str, ok: bool) -> None:
+        if (text, ok) == self._status:
+            return
+        self._status = (text, ok)
         self.info_label.config(text=text, fg="#00FF00" if ok else "#FFFF00")
 
-    def update_frames(self, pi_frame_bgr, pc_frame_bgr) -> None:
-        self._update_canvas(self.pi_canvas, pi_frame_bgr, is_pi=True)
-        self._update_canvas(self.pc_canvas, pc_frame_bgr, is_pi=False)
-
-    def _update_canvas(self, canvas: tk.Canvas, frame_bgr, *, is_pi: bool) -> None:
-        canvas.delete("all")
-        if frame_bgr is None:
-            return
-        try:
-            prev = cv2.resize(frame_bgr, (320, 240))
-            rgb = cv2.cvtColor(prev, cv2.COLOR_BGR2RGB)
-            img = ImageTk.PhotoImage(image=Image.fromarray(rgb))
-            canvas.create_image(0, 0, image=img, anchor=tk.NW)
-            if is_pi:
-                self._pi_img_ref = img
-            else:
-                self._pc_img_ref = img
-        except Exception:
-            pass
+    def update_frames(self, pi_slot: PreviewSlot, pc_slot: PreviewSlot) -> None:
+        self._pi.update(pi_slot)
+        self._pc.update(pc_slot)
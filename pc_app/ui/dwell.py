@@ -1,55 +1,70 @@
 """pc_app/ui/dwell.py
-Dwell-trigger state machine (grid-based).
+Dwell-trigger state machine driven by fixation events.
+
+A dwell is a fixation (see pc_app/ui/fixation.py) that lasts DWELL_THRESHOLD
+seconds; it fires at most once per TRIGGER_COOLDOWN and then restarts while
+the fixation goes on. All times come from the samples fed to `update()`
+(perf_counter seconds), so `progress()` is a pure read.
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Optional
 import time
 
 import config
+from pc_app.ui.fixation import END, START, FixationDetector, FixationEvent
 
 
 @dataclass
 class DwellTrigger:
     threshold_sec: float = config.DWELL_THRESHOLD
     cooldown_sec: float = config.TRIGGER_COOLDOWN
+    detector: FixationDetector = field(default_factory=FixationDetector)
 
-    current_cell: Optional[Tuple[int, int]] = None
+    fixation: Optional[FixationEvent] = None  # latest START/UPDATE of the ongoing fixation
     dwell_start: float = 0.0
-    last_trigger: float = 0.0
+    last_trigger: float = float("-inf")
+
+    @property
+    def active(self) -> bool:
+        """Whether a fixation (and so a dwell) is in progress."""
+        return self.fixation is not None
 
     def reset(self) -> None:
-        self.current_cell = None
+        self.detector.reset()
+        self.fixation = None
         self.dwell_start = 0.0
 
-    def update(self, x_norm: float, y_norm: float, face_detected: bool) -> bool:
-        """Update dwell state and return True if action should be triggered."""
+    def update(self, x_norm: float, y_norm: float, face_detected: bool, t: Optional[float] = None) -> bool:
+        """Feed one gaze sample taken at `t` and return True if action should be triggered."""
         if not face_detected:
             self.reset()
             return False
+        if t is None:
+            t = time.perf_counter()
+        triggered = False
+        for event in self.detector.update(x_norm, y_norm, t):
+            triggered |= self.on_event(event)
+        return triggered
 
-        col = int(x_norm * config.GRID_COLS)
-        row = int(y_norm * config.GRID_ROWS)
-        cell = (row, col)
-        now = time.time()
-
-        if cell != self.current_cell:
-            self.current_cell = cell
-            self.dwell_start = now
+    def on_event(self, event: FixationEvent) -> bool:
+        """Advance the dwell on one fixation event; True if it fires."""
+        if event.kind == END:
+            self.fixation = None
             return False
+        if event.kind == START:
+            self.dwell_start = event.start_t
+        self.fixation = event
 
-        duration = now - self.dwell_start
-        if duration >= self.threshold_sec and (now - self.last_trigger) >= self.cooldown_sec:
-            self.last_trigger = now
-            self.dwell_start = now  # restart
+        if event.t - self.dwell_start >= self.threshold_sec and event.t - self.last_trigger >= self.cooldown_sec:
+            self.last_trigger = event.t
+            self.dwell_start = event.t  # restart
             return True
-
         return False
 
     def progress(self) -> float:
-        """0..1 progress of dwell timer (for UI indicator)."""
-        if self.current_cell is None:
+        """0..1 progress of dwell timer as of the last sample (for UI indicator)."""
+        if self.fixation is None:
             return 0.0
-        now = time.time()
-        return max(0.0, min(1.0, (now - self.dwell_start) / max(0.001, self.threshold_sec)))
+        return max(0.0, min(1.0, (self.fixation.t - self.dwell_start) / max(0.001, self.threshold_sec)))
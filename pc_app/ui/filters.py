@@ -0,0 +1,231 @@
+"""pc_app/ui/filters.py
+Gaze filters between `Calibrator.map` and the dot.
+
+A filter is fed calibrated samples with their capture time and asked for
+the position to draw at any later moment:
+
+    filt.update(x, y, t, now)   # new sample captured at `t`, seen by the UI at `now`
+    x, y = filt.value(now)      # position to draw at `now` (no side effects)
+
+All times are `time.perf_counter()` seconds. Because `value()` knows how
+old the last sample is, the One Euro and Kalman filters can extrapolate it
+to the present: the dot is drawn where the gaze is estimated to be now,
+not where it was when the camera captured the frame (GAZE_PREDICT, capped
+at GAZE_PREDICT_MAX_MS).
+
+- ExponentialFilter: the legacy SMOOTHING_FACTOR glide, as a frame-rate
+  independent time constant. Ignores sample times, no prediction.
+- OneEuroFilter: speed-adaptive low-pass (Casiez et al., CHI 2012): heavy
+  smoothing while fixating, little lag during saccades.
+- KalmanFilter: constant-velocity Kalman per axis with the sample interval
+  as time step; innovations beyond KALMAN_SACCADE_SIGMA are taken as
+  saccades and jump instead of gliding.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional, Protocol, Tuple
+
+import config
+
+
+class GazeFilter(Protocol):
+    def update(self, x: float, y: float, t: float, now: float) -> None: ...
+
+    def value(self, now: float) -> Tuple[float, float]: ...
+
+    def reset(self) -> None: ...
+
+
+def _clip01(v: float) -> float:
+    return max(0.0, min(1.0, v))
+
+
+def _lead(vx: float, vy: float, h: float, min_speed: float) -> Tuple[float, float]:
+    """Extrapolation offset over `h` seconds; speeds up to `min_speed` count as noise (soft dead band)."""
+    speed = math.hypot(vx, vy)
+    if speed <= min_speed or h <= 0.0:
+        return 0.0, 0.0
+    k = h * (speed - min_speed) / speed
+    return vx * k, vy * k
+
+
+class ExponentialFilter:
+    """Legacy smoothing: glide towards the last sample with a fixed time constant."""
+
+    def __init__(self, factor: float = config.SMOOTHING_FACTOR, frame_ms: float = config.FRAME_DELAY_MS) -> None:
+        # `factor` per frame of `frame_ms` -> continuous time constant (same feel at any redraw rate).
+        self.tau = frame_ms / 1000.0 / -math.log(1.0 - factor)
+        self.reset()
+
+    def reset(self) -> None:
+        self._start = (0.5, 0.5)
+        self._target = (0.5, 0.5)
+        self._t0 = 0.0
+
+    def update(self, x: float, y: float, t: float, now: float) -> None:
+        self._start = self.value(now)
+        self._target = (x, y)
+        self._t0 = now
+
+    def value(self, now: float) -> Tuple[float, float]:
+        k = math.exp(-max(0.0, now - self._t0) / self.tau)
+        (sx, sy), (tx, ty) = self._start, self._target
+        return tx + (sx - tx) * k, ty + (sy - ty) * k
+
+
+class OneEuroFilter:
+    """One Euro filter on both axes; the cutoff follows the 2D gaze speed."""
+
+    def __init__(
+        self,
+        min_cutoff: float = config.ONE_EURO_MIN_CUTOFF,
+        beta: float = config.ONE_EURO_BETA,
+        d_cutoff: float = config.ONE_EURO_D_CUTOFF,
+        predict: bool = config.GAZE_PREDICT,
+        max_predict_ms: float = config.GAZE_PREDICT_MAX_MS,
+        predict_min_speed: float = config.GAZE_PREDICT_MIN_SPEED,
+    ) -> None:
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_predict = max_predict_ms / 1000.0 if predict else 0.0
+        self.predict_min_speed = predict_min_speed
+        self.reset()
+
+    def reset(self) -> None:
+        self._t: Optional[float] = None
+        self._x = self._y = 0.5
+        self._dx = self._dy = 0.0
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, x: float, y: float, t: float, now: float) -> None:
+        if self._t is None:
+            self._t, self._x, self._y = t, x, y
+            return
+        dt = t - self._t
+        if dt <= 0.0:
+            return  # duplicate or out-of-order sample
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        self._dy += a_d * ((y - self._y) / dt - self._dy)
+        a = self._alpha(self.min_cutoff + self.beta * math.hypot(self._dx, self._dy), dt)
+        self._x += a * (x - self._x)
+        self._y += a * (y - self._y)
+        self._t = t
+
+    def value(self, now: float) -> Tuple[float, float]:
+        if self._t is None:
+            return self._x, self._y
+        h = min(max(0.0, now - self._t), self.max_predict)
+        lx, ly = _lead(self._dx, self._dy, h, self.predict_min_speed)
+        return _clip01(self._x + lx), _clip01(self._y + ly)
+
+
+class _CVAxis:
+    """One axis of a constant-velocity Kalman filter: state (p, v), covariance [[a, b], [b, c]]."""
+
+    __slots__ = ("p", "v", "a", "b", "c")
+
+    def __init__(self, p: float, r: float) -> None:
+        self.p, self.v = p, 0.0
+        self.a, self.b, self.c = r, 0.0, 1.0
+
+    def predict(self, dt: float, q: float) -> None:
+        self.p += self.v * dt
+        a, b, c = self.a, self.b, self.c
+        self.a = a + dt * (2.0 * b + dt * c) + q * dt ** 3 / 3.0
+        self.b = b + dt * c + q * dt ** 2 / 2.0
+        self.c = c + q * dt
+
+    def innovation(self, z: float, r: float) -> Tuple[float, float]:
+        """(residual, its variance)."""
+        return z - self.p, self.a + r
+
+    def correct(self, z: float, r: float) -> None:
+        y, s = self.innovation(z, r)
+        k0, k1 = self.a / s, self.b / s
+        self.p += k0 * y
+        self.v += k1 * y
+        a, b, c = self.a, self.b, self.c
+        self.a = (1.0 - k0) * a
+        self.b = (1.0 - k0) * b
+        self.c = c - k1 * b
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter with saccade resets and forward prediction."""
+
+    def __init__(
+        self,
+        accel_noise: float = config.KALMAN_ACCEL_NOISE,
+        measurement_noise: float = config.KALMAN_MEASUREMENT_NOISE,
+        saccade_sigma: float = config.KALMAN_SACCADE_SIGMA,
+        predict: bool = config.GAZE_PREDICT,
+        max_predict_ms: float = config.GAZE_PREDICT_MAX_MS,
+        predict_min_speed: float = config.GAZE_PREDICT_MIN_SPEED,
+    ) -> None:
+        self.q = accel_noise
+        self.r = measurement_noise ** 2
+        self.saccade_sigma = saccade_sigma
+        self.max_predict = max_predict_ms / 1000.0 if predict else 0.0
+        self.predict_min_speed = predict_min_speed
+        self.saccades = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._t: Optional[float] = None
+        self._axes = (_CVAxis(0.5, self.r), _CVAxis(0.5, self.r))
+
+    def update(self, x: float, y: float, t: float, now: float) -> None:
+        if self._t is None:
+            self._t = t
+            self._axes = (_CVAxis(x, self.r), _CVAxis(y, self.r))
+            return
+        dt = t - self._t
+        if dt < 0.0:
+            return  # out-of-order sample
+        ax, ay = self._axes
+        if dt > 0.0:
+            ax.predict(dt, self.q)
+            ay.predict(dt, self.q)
+        self._t = t
+
+        (rx, sx), (ry, sy) = ax.innovation(x, self.r), ay.innovation(y, self.r)
+        if self.saccade_sigma > 0 and rx * rx / sx + ry * ry / sy > self.saccade_sigma ** 2:
+            # Ballistic jump: restart at the new fixation rather than gliding over.
+            self.saccades += 1
+            self._axes = (_CVAxis(x, self.r), _CVAxis(y, self.r))
+            return
+        ax.correct(x, self.r)
+        ay.correct(y, self.r)
+
+    def value(self, now: float) -> Tuple[float, float]:
+        ax, ay = self._axes
+        if self._t is None:
+            return ax.p, ay.p
+        h = min(max(0.0, now - self._t), self.max_predict)
+        lx, ly = _lead(ax.v, ay.v, h, self.predict_min_speed)
+        return _clip01(ax.p + lx), _clip01(ay.p + ly)
+
+
+FILTERS = {
+    "exponential": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(name: Optional[str] = None) -> GazeFilter:
+    """Filter by config name (default: config.GAZE_FILTER)."""
+    name = name or config.GAZE_FILTER
+    cls = FILTERS.get(name)
+    if cls is None:
+        print(f"[Filter] Unknown GAZE_FILTER {name!r}; using exponential.")
+        cls = ExponentialFilter
+    return cls()
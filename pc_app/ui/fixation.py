@@ -0,0 +1,182 @@
+"""pc_app/ui/fixation.py
+Online fixation detection (I-DT / I-VT) with start/update/end events.
+
+Both detectors take one (x, y, t) sample at a time, in normalized screen
+coordinates and perf_counter seconds, and cost O(1) amortized per sample:
+
+- I-DT (dispersion threshold): a sliding window whose x/y extremes are kept
+  in monotonic deques and whose centroid is kept as running sums. When a new
+  sample pushes the dispersion (x range + y range) over
+  FIXATION_DISPERSION, the window is shrunk from the front until it fits
+  again (ending a fixation in progress).
+- I-VT (velocity threshold): samples slower than FIXATION_VELOCITY (screens/s
+  from the previous sample) extend the current run; a faster one ends it.
+
+A run becomes a fixation once it lasts FIXATION_MIN_SEC: that sample emits
+"start", every further sample "update", and the sample that breaks it (or
+`reset()`) "end". Events carry the fixation's centroid, start time and
+duration.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+import config
+
+START = "start"
+UPDATE = "update"
+END = "end"
+
+
+@dataclass(frozen=True)
+class FixationEvent:
+    kind: str          # START, UPDATE or END
+    x: float           # centroid, normalized screen coords
+    y: float
+    start_t: float     # time of the fixation's first sample
+    t: float           # time of the sample that produced the event
+
+    @property
+    def duration(self) -> float:
+        return self.t - self.start_t
+
+
+class _Window:
+    """Samples of the current candidate fixation: running sums + monotonic min/max deques."""
+
+    def __init__(self) -> None:
+        self.samples: Deque[Tuple[float, float, float]] = deque()  # (t, x, y)
+        self._seq0 = 0  # sequence number of samples[0]
+        self._min_x: Deque[Tuple[int, float]] = deque()
+        self._max_x: Deque[Tuple[int, float]] = deque()
+        self._min_y: Deque[Tuple[int, float]] = deque()
+        self._max_y: Deque[Tuple[int, float]] = deque()
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def clear(self) -> None:
+        self._seq0 += len(self.samples)
+        self.samples.clear()
+        for d in (self._min_x, self._max_x, self._min_y, self._max_y):
+            d.clear()
+        self.sum_x = self.sum_y = 0.0
+
+    def push(self, t: float, x: float, y: float) -> None:
+        seq = self._seq0 + len(self.samples)
+        self.samples.append((t, x, y))
+        self.sum_x += x
+        self.sum_y += y
+        _push_mono(self._min_x, seq, x, lambda old, new: old >= new)
+        _push_mono(self._max_x, seq, x, lambda old, new: old <= new)
+        _push_mono(self._min_y, seq, y, lambda old, new: old >= new)
+        _push_mono(self._max_y, seq, y, lambda old, new: old <= new)
+
+    def pop_front(self) -> None:
+        _, x, y = self.samples.popleft()
+        self.sum_x -= x
+        self.sum_y -= y
+        for d in (self._min_x, self._max_x, self._min_y, self._max_y):
+            if d and d[0][0] == self._seq0:
+                d.popleft()
+        self._seq0 += 1
+
+    def dispersion(self) -> float:
+        if not self.samples:
+            return 0.0
+        return (self._max_x[0][1] - self._min_x[0][1]) + (self._max_y[0][1] - self._min_y[0][1])
+
+    def centroid(self) -> Tuple[float, float]:
+        n = len(self.samples)
+        return self.sum_x / n, self.sum_y / n
+
+    @property
+    def start_t(self) -> float:
+        return self.samples[0][0]
+
+
+def _push_mono(d: Deque[Tuple[int, float]], seq: int, v: float, dominated) -> None:
+    while d and dominated(d[-1][1], v):
+        d.pop()
+    d.append((seq, v))
+
+
+class FixationDetector:
+    """I-DT or I-VT fixation detection over a sliding window (see module docstring)."""
+
+    def __init__(
+        self,
+        method: str = config.FIXATION_METHOD,
+        dispersion: float = config.FIXATION_DISPERSION,
+        velocity: float = config.FIXATION_VELOCITY,
+        min_duration: float = config.FIXATION_MIN_SEC,
+    ) -> None:
+        if method not in ("idt", "ivt"):
+            print(f"[Fixation] Unknown FIXATION_METHOD {method!r}; using idt.")
+            method = "idt"
+        self.method = method
+        self.max_dispersion = dispersion
+        self.max_velocity = velocity
+        self.min_duration = min_duration
+        self._window = _Window()
+        self._last: Optional[Tuple[float, float, float]] = None  # previous sample (t, x, y)
+        self.current: Optional[FixationEvent] = None  # last START/UPDATE of the ongoing fixation
+        self.fixations = 0
+
+    @property
+    def fixating(self) -> bool:
+        return self.current is not None
+
+    def reset(self) -> List[FixationEvent]:
+        """Forget all samples; ends a fixation in progress."""
+        events = self._end()
+        self._window.clear()
+        self._last = None
+        return events
+
+    def update(self, x: float, y: float, t: float) -> List[FixationEvent]:
+        """Feed one sample; returns the events it caused (usually zero or one, END + START at most)."""
+        last = self._last
+        if last is not None and t <= last[0]:
+            return []
+        self._last = (t, x, y)
+        events: List[FixationEvent] = []
+        w = self._window
+
+        if self.method == "ivt":
+            if last is not None:
+                dt = t - last[0]
+                speed = ((x - last[1]) ** 2 + (y - last[2]) ** 2) ** 0.5 / dt
+                if speed > self.max_velocity:
+                    events += self._end()
+                    w.clear()
+            w.push(t, x, y)
+        else:
+            w.push(t, x, y)
+            if w.dispersion() > self.max_dispersion:
+                events += self._end()
+                while len(w) > 1 and w.dispersion() > self.max_dispersion:
+                    w.pop_front()
+
+        if t - w.start_t >= self.min_duration:
+            cx, cy = w.centroid()
+            if self.current is None:
+                self.fixations += 1
+                self.current = FixationEvent(START, cx, cy, w.start_t, t)
+            else:
+                self.current = FixationEvent(UPDATE, cx, cy, w.start_t, t)
+            events.append(self.current)
+        return events
+
+    def _end(self) -> List[FixationEvent]:
+        """END event for the ongoing fixation, as of its last sample."""
+        cur = self.current
+        if cur is None:
+            return []
+        self.current = None
+        return [FixationEvent(END, cur.x, cur.y, cur.start_t, cur.t)]
@@ -0,0 +1,169 @@
+"""pc_app/ui/fusion.py
+Combine per-camera gaze estimates into one raw gaze point.
+
+`GazeFusion` works on any number of sources (every `SharedState.sources`
+entry: "pi-N" heads and the PC webcam). For each source it keeps a short
+queue of timestamped face samples, as observed from the source's gaze slot,
+and on every new sample:
+
+1. drops sources whose last face sample is older than FUSION_STALE_MS,
+2. picks the common time T = newest capture time among the rest,
+3. brings every source to T: interpolation inside its queue, otherwise
+   linear extrapolation from its last two samples (at most
+   FUSION_MAX_EXTRAPOLATE_MS),
+4. averages them with inverse-variance weights: the source's noise
+   variance (from second differences of its recent samples) plus the
+   uncertainty of bridging the gap to T, scaled down by the source's
+   detection confidence.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Mapping, Optional, Tuple
+
+import config
+from pc_app.backend.slots import GazeSample, VersionedSlot
+
+
+@dataclass(frozen=True)
+class FusedGaze:
+    """One fused raw gaze point at capture time `t` (perf_counter seconds)."""
+
+    x: float
+    y: float
+    t: float
+    sources: int  # number of sources that contributed
+    confidence: float = 1.0  # weighted mean detection confidence of those sources
+
+
+class _SourceTrack:
+    def __init__(self, history: int) -> None:
+        self.samples: Deque[Tuple[float, float, float]] = deque(maxlen=history)  # (t, x, y)
+        self.generation = 0
+        self.has_face = False
+        self.confidence = 1.0
+        self.noise_var = config.FUSION_NOISE_VAR
+
+    def add(self, sample: GazeSample, stale: float) -> bool:
+        """Record a face sample. False if it is not newer than the last one."""
+        t = sample.capture_ts
+        if self.samples:
+            last_t = self.samples[-1][0]
+            if t <= last_t:
+                return False
+            if t - last_t > stale:
+                self.samples.clear()  # never interpolate across a gap
+        self.samples.append((t, sample.x, sample.y))
+        self.confidence = sample.confidence
+        if len(self.samples) >= 3:
+            (_, x0, y0), (_, x1, y1), (_, x2, y2) = self.samples[-3], self.samples[-2], self.samples[-1]
+            # Second differences cancel constant-velocity motion; Var(d2) = 6 * noise variance.
+            d2 = ((x2 - 2 * x1 + x0) ** 2 + (y2 - 2 * y1 + y0) ** 2) / 12.0
+            self.noise_var += config.FUSION_VARIANCE_ALPHA * (d2 - self.noise_var)
+        return True
+
+    def at(self, t: float) -> Tuple[float, float, float]:
+        """(x, y, seconds bridged) of this source at time t."""
+        s = self.samples
+        t_last, x_last, y_last = s[-1]
+        if len(s) == 1:
+            return x_last, y_last, abs(t - t_last)
+        if t <= t_last:
+            for i in range(len(s) - 1, 0, -1):
+                t0, x0, y0 = s[i - 1]
+                if t0 <= t:
+                    t1, x1, y1 = s[i]
+                    k = (t - t0) / (t1 - t0)
+                    return x0 + (x1 - x0) * k, y0 + (y1 - y0) * k, 0.0
+            t0, x0, y0 = s[0]
+            return x0, y0, t0 - t
+        t0, x0, y0 = s[-2]
+        h = min(t - t_last, config.FUSION_MAX_EXTRAPOLATE_MS / 1000.0)
+        k = h / (t_last - t0)
+        return x_last + (x_last - x0) * k, y_last + (y_last - y0) * k, t - t_last
+
+
+class GazeFusion:
+    """Timestamp-aligned, confidence-weighted fusion of N gaze sources."""
+
+    def __init__(
+        self,
+        stale_ms: float = config.FUSION_STALE_MS,
+        history: int = config.FUSION_HISTORY,
+        drift: float = config.FUSION_DRIFT,
+    ) -> None:
+        self.stale = stale_ms / 1000.0
+        self.history = history
+        self.drift = drift
+        self._tracks: Dict[str, _SourceTrack] = {}
+        self.last: Optional[FusedGaze] = None
+
+    def reset(self) -> None:
+        self._tracks.clear()
+        self.last = None
+
+    def update(self, slots: Mapping[str, VersionedSlot[GazeSample]], now: float) -> Optional[FusedGaze]:
+        """Read the sources' slots; a new FusedGaze if any of them had a new face sample, else None."""
+        for source in [s for s in self._tracks if s not in slots]:
+            del self._tracks[source]
+        fresh = False
+        for source, slot in slots.items():
+            track = self._tracks.get(source)
+            if track is None:
+                track = self._tracks[source] = _SourceTrack(self.history)
+            latest = slot.read_if_newer(track.generation)
+            if latest is None:
+                continue
+            track.generation, sample = latest
+            track.has_face = sample.has_face
+            if sample.has_face:
+                if not sample.capture_ts:
+                    sample = GazeSample(sample.x, sample.y, True, now, sample.confidence)
+                fresh |= track.add(sample, self.stale)
+        if not fresh:
+            return None
+        fused = self._fuse(now)
+        if fused is not None:
+            self.last = fused
+        return fused
+
+    def has_face(self, now: float) -> bool:
+        """Whether any source currently sees a face with non-stale data."""
+        return any(self._usable(track, now) for track in self._tracks.values())
+
+    def weights(self, now: float) -> Dict[str, float]:
+        """Current normalized weight per usable source (for status displays)."""
+        usable = {s: tr for s, tr in self._tracks.items() if self._usable(tr, now)}
+        if not usable:
+            return {}
+        t = max(tr.samples[-1][0] for tr in usable.values())
+        raw = {s: self._weight(tr, tr.at(t)[2]) for s, tr in usable.items()}
+        total = sum(raw.values())
+        return {s: w / total for s, w in raw.items()}
+
+    def _usable(self, track: _SourceTrack, now: float) -> bool:
+        return track.has_face and bool(track.samples) and now - track.samples[-1][0] <= self.stale
+
+    def _weight(self, track: _SourceTrack, bridged: float) -> float:
+        var = track.noise_var + (self.drift * bridged) ** 2
+        return max(track.confidence, 1e-3) / max(var, 1e-9)
+
+    def _fuse(self, now: float) -> Optional[FusedGaze]:
+        usable = [tr for tr in self._tracks.values() if self._usable(tr, now)]
+        if not usable:
+            return None
+        t = max(tr.samples[-1][0] for tr in usable)
+        sx = sy = sc = total = 0.0
+        for track in usable:
+            x, y, bridged = track.at(t)
+            w = self._weight(track, bridged)
+            sx += w * x
+            sy += w * y
+            sc += w * track.confidence
+            total += w
+        if not math.isfinite(total) or total <= 0.0:
+            return None
+        return FusedGaze(sx / total, sy / total, t, len(usable), sc / total)
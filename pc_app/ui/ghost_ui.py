@@ -2,29 +2,45 @@
 Transparent overlay UI that renders gaze dot and triggers AI via dwell.
 
 Responsibilities:
-- UI rendering (dot/grid/optional debug window)
-- Read SharedState, fuse gaze coords, smoothing
-- Orchestrate Calibration + DwellTrigger + AIController
+- UI rendering (dot/grid/optional debug window, attention heatmap on H)
+- Read SharedState, fuse every source's gaze (pc_app/ui/fusion.py),
+  filter/predict (pc_app/ui/filters.py)
+- Redraw on backend wake-ups (<<GazeSample>>); timers only while animating
+  (FRAME_DELAY_MS) or idle (IDLE_TICK_MS)
+- Orchestrate Calibration (+ online recalibration from dwell fixations)
+  + DwellTrigger + AIController
+- Record every fused sample in SharedState.history
 """
 
 from __future__ import annotations
 
+import os
 import tkinter as tk
 import time
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageTk
 
 import config
-from pc_app.backend.state import SharedState
-from pc_app.ui.calibration import Calibrator
+from pc_app.backend.state import SharedState, source_kind
+from pc_app.ui.calibration import Calibrator, OnlineRecalibrator, calibration_targets
 from pc_app.ui.dwell import DwellTrigger
+from pc_app.ui.filters import make_filter
+from pc_app.ui.fusion import FusedGaze, GazeFusion
+from pc_app.ui.heatmap import AttentionHeatmap
 from pc_app.ui.debug_view import DebugView
 from pc_app.ai import AIController
 
+_SAMPLE_EVENT = "<<GazeSample>>"
+_INDICATOR_PROGRESS = 0.25  # dwell progress at which the indicator ring appears
+
 
 class GhostUI:
     def __init__(self, shared: SharedState) -> None:
         self.shared = shared
         self.calibrator = Calibrator()
+        self.recalibrator = OnlineRecalibrator(self.calibrator) if config.ONLINE_RECALIBRATION else None
         self.dwell = DwellTrigger()
 
         self.root = tk.Tk()
@@ -49,6 +65,7 @@ class GhostUI:
             self.debug = DebugView(self.root)
 
         self.ai = AIController(self.root)
+        self._ai_gaze: Optional[Tuple[float, float]] = None  # fixation of the outstanding AI request
 
         # Calibration UI state
         self.is_calibrating = False
@@ -60,22 +77,46 @@ class GhostUI:
         self.calib_target = self.canvas.create_oval(
             0, 0, 0, 0, fill="cyan", outline="white", width=3, state="hidden"
         )
-        self.calib_coords = [(50, 50), (self.sw - 50, 50), (50, self.sh - 50), (self.sw - 50, self.sh - 50)]
+        self.calib_targets = calibration_targets()
+        self.calib_samples: List[List[Tuple[float, float]]] = []
 
-        # Smoothed cursor
+        # Fused, filtered cursor (last drawn position)
+        self.fusion = GazeFusion()
+        self.gaze_filter = make_filter()
         self.cur_x = 0.5
         self.cur_y = 0.5
+        self._last_pi_gen = 0
+        self._filtered_t = 0.0  # capture time of the last fused sample fed to the filter
 
-        # Dwell indicator
+        # Dwell indicator, and the raw samples seen while it is shown (target, samples)
         self.dwell_indicator = None
+        self._fixation: Optional[Tuple[Tuple[float, float], List[Tuple[float, float]]]] = None
+
+        # Attention heatmap (fed with the drawn dot; overlay image created on first show)
+        self.heatmap = AttentionHeatmap(self.sw, self.sh)
+        self.heatmap_visible = False
+        self._heatmap_photo: Optional[ImageTk.PhotoImage] = None
+        self._heatmap_item = None
+        self._heatmap_drawn = 0.0
+        self._heatmap_rendering = False
+        self._heatmap_ready: Optional[Image.Image] = None  # finished render, pasted by the UI thread
 
         # Bind keys
         self.root.bind("c", self.start_calibration)
         self.root.bind("C", self.start_calibration)
+        self.root.bind("h", self.toggle_heatmap)
+        self.root.bind("H", self.toggle_heatmap)
+        self.root.bind("e", self.export_heatmap)
+        self.root.bind("E", self.export_heatmap)
         self.root.bind("<Escape>", self._quit)
         self.root.focus_force()
 
-        self.root.after(config.FRAME_DELAY_MS, self._update_loop)
+        # Redraws are driven by backend samples; timers only cover animation and idle.
+        # The event is posted by UIWakeup's notifier thread, never by a backend thread.
+        self._after_id: Optional[str] = None
+        self.root.bind(_SAMPLE_EVENT, self._on_sample)
+        self.shared.ui_wakeup.connect(lambda: self.root.event_generate(_SAMPLE_EVENT, when="tail"))
+        self._schedule(config.FRAME_DELAY_MS)
         print("[UI] Ghost UI started.")
 
     # ---------------- UI Drawing ----------------
@@ -102,117 +143,240 @@ class GhostUI:
 
     # ---------------- Shared State Read ----------------
     def _read_state(self):
+        # Scalars under the lock; gaze samples from the lock-free slots (no frame copies).
         with self.shared.lock:
             active = self.shared.pi_connected
-            pi_ok = self.shared.pi_has_face
-            pc_ok = self.shared.pc_has_face
-            pi_pos = (self.shared.pi_target_x, self.shared.pi_target_y)
-            pc_pos = (self.shared.pc_target_x, self.shared.pc_target_y)
-            pi_frame = self.shared.pi_frame.copy() if self.shared.pi_frame is not None else None
-            pc_frame = self.shared.pc_frame.copy() if self.shared.pc_frame is not None else None
             pi_fps = self.shared.pi_fps
             pc_fps = self.shared.pc_fps
-        return active, pi_ok, pc_ok, pi_pos, pc_pos, pi_frame, pc_frame, pi_fps, pc_fps
-
-    def _fuse_gaze(self, pi_ok, pc_ok, pi_pos, pc_pos) -> Tuple[float, float, bool]:
-        if pi_ok and pc_ok:
-            return (pi_pos[0] + pc_pos[0]) / 2.0, (pi_pos[1] + pc_pos[1]) / 2.0, True
-        if pi_ok:
-            return pi_pos[0], pi_pos[1], True
-        if pc_ok:
-            return pc_pos[0], pc_pos[1], True
-        return self.cur_x, self.cur_y, False
+            pi_dropped = self.shared.pi_dropped
+            pi_heads = sum(1 for s in self.shared.sources if source_kind(s) == "pi")
+            skip = (self.shared.pi_skip_ratio, self.shared.pc_skip_ratio)
+            slots = {source: status.gaze for source, status in self.shared.sources.items()}
+        pi_gen, pi = self.shared.pi_gaze.read()
+        return active, slots, pi_gen, pi, pi_fps, pc_fps, pi_dropped, pi_heads, skip
 
     # ---------------- Main Loop ----------------
+    def _on_sample(self, event=None) -> None:
+        """Backend published a sample (or a connection change): redraw now."""
+        self._update_loop()
+
+    def _schedule(self, delay_ms: int) -> None:
+        """(Re)arm the single redraw timer."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(max(1, delay_ms), self._update_loop)
+
     def _update_loop(self) -> None:
         if not self.shared.running:
             return
+        # Acknowledge before reading, so anything published meanwhile wakes us again.
+        self.shared.ui_wakeup.acknowledge()
+        self._schedule(self._tick())
 
-        active, pi_ok, pc_ok, pi_pos, pc_pos, pi_frame, pc_frame, pi_fps, pc_fps = self._read_state()
+    def _tick(self) -> int:
+        """One redraw. Returns the delay (ms) until the next one is needed without new samples."""
+        active, slots, pi_gen, pi, pi_fps, pc_fps, pi_dropped, pi_heads, skip = self._read_state()
+        if self._heatmap_ready is not None:
+            self._paste_heatmap()
 
         if self.debug is not None:
             status = "Connected" if active else "Waiting for Wake Word..."
-            self.debug.update_status(f"Status: {status} | Pi FPS: {pi_fps} | PC FPS: {pc_fps}", ok=active)
-            self.debug.update_frames(pi_frame, pc_frame)
+            e2e_p95 = self.shared.latency.percentile("ui", 95)
+            self.debug.update_status(
+                f"Status: {status} | Pi heads: {pi_heads} | Pi FPS: {pi_fps} (dropped {pi_dropped}) "
+                f"| PC FPS: {pc_fps} | Pi e2e p95: {e2e_p95:.0f} ms "
+                f"| static skip Pi/PC: {skip[0]:.0%}/{skip[1]:.0%}",
+                ok=active,
+            )
+            self.debug.update_frames(self.shared.pi_preview, self.shared.pc_preview)
 
         if not active:
             # Hide dot, reset dwell state to avoid accidental trigger on reconnect
             self._draw_dot(self.cur_x, self.cur_y, visible=False)
             self.dwell.reset()
-            if self.dwell_indicator:
-                self.canvas.delete(self.dwell_indicator)
-                self.dwell_indicator = None
-            self.root.after(config.FRAME_DELAY_MS, self._update_loop)
-            return
+            self.fusion.reset()
+            self.gaze_filter.reset()
+            self._filtered_t = 0.0
+            self._clear_dwell_indicator()
+            return config.IDLE_TICK_MS
 
-        raw_x, raw_y, has_face = self._fuse_gaze(pi_ok, pc_ok, pi_pos, pc_pos)
+        now = time.perf_counter()
+        fused = self.fusion.update(slots, now)
+        has_face = self.fusion.has_face(now)
 
         if self.is_calibrating:
-            self._handle_calibration(raw_x, raw_y)
-            self.root.after(config.FRAME_DELAY_MS, self._update_loop)
-            return
-
-        # Calibration mapping + smoothing
-        target_x, target_y = self.calibrator.map(raw_x, raw_y)
-        self.cur_x += (target_x - self.cur_x) * config.SMOOTHING_FACTOR
-        self.cur_y += (target_y - self.cur_y) * config.SMOOTHING_FACTOR
+            self._handle_calibration(fused, now)
+            return config.FRAME_DELAY_MS
+
+        # Calibration mapping, then the filter (fed once per fused sample, drawn at `now`)
+        target = None
+        if fused is not None and fused.t > self._filtered_t:
+            target = self.calibrator.map(fused.x, fused.y)
+            self.gaze_filter.update(target[0], target[1], fused.t, now)
+            self._filtered_t = fused.t
+        self.cur_x, self.cur_y = self.gaze_filter.value(now)
+        if target is not None:
+            self.shared.history.append(
+                fused.t, "fused", (fused.x, fused.y), target, (self.cur_x, self.cur_y), fused.confidence
+            )
+            self.heatmap.add(self.cur_x, self.cur_y, fused.t)
 
         px, py = self._draw_dot(self.cur_x, self.cur_y, visible=True)
+        self._record_ui_latency(pi_gen, pi.capture_ts)
+        if (
+            self.heatmap_visible
+            and not self._heatmap_rendering
+            and (now - self._heatmap_drawn) * 1000.0 >= config.HEATMAP_REFRESH_MS
+        ):
+            self._draw_heatmap(now)
 
         # Dwell trigger logic (only if a face is detected somewhere)
-        triggered = self.dwell.update(self.cur_x, self.cur_y, face_detected=has_face)
-        self._update_dwell_indicator(px, py, has_face)
+        triggered = self.dwell.update(self.cur_x, self.cur_y, face_detected=has_face, t=now)
+        if fused is not None and self._fixation is not None:
+            self._fixation[1].append((fused.x, fused.y))
+        if triggered:
+            self._recalibrate_from_dwell()
+        self._update_dwell_indicator(has_face)
 
         if triggered:
             self._trigger_ai()
+        else:
+            self._cancel_ai_if_moved()
+
+        # Keep animating while the filtered dot still moves (gliding or being extrapolated).
+        next_x, next_y = self.gaze_filter.value(now + config.FRAME_DELAY_MS / 1000.0)
+        if abs(next_x - self.cur_x) * self.sw > 0.5 or abs(next_y - self.cur_y) * self.sh > 0.5:
+            return config.FRAME_DELAY_MS
+        return self._dwell_wakeup_ms(has_face)
+
+    def _dwell_wakeup_ms(self, has_face: bool) -> int:
+        """Time until the dwell indicator appears or the dwell fires (idle tick otherwise)."""
+        if not has_face or not self.dwell.active:
+            return config.IDLE_TICK_MS
+        prog = self.dwell.progress()
+        remaining = 1.0 - prog if prog >= _INDICATOR_PROGRESS else _INDICATOR_PROGRESS - prog
+        delay = int(remaining * self.dwell.threshold_sec * 1000) + 1
+        return max(config.FRAME_DELAY_MS, min(config.IDLE_TICK_MS, delay))
 
-        self.root.after(config.FRAME_DELAY_MS, self._update_loop)
+    def _record_ui_latency(self, pi_gen: int, capture_ts: float) -> None:
+        """Record capture->screen age once per new Pi sample."""
+        if capture_ts and pi_gen != self._last_pi_gen:
+            self._last_pi_gen = pi_gen
+            self.shared.latency.record("ui", capture_ts)
 
-    def _update_dwell_indicator(self, px: int, py: int, has_face: bool) -> None:
+    def _update_dwell_indicator(self, has_face: bool) -> None:
         if not has_face:
-            if self.dwell_indicator:
-                self.canvas.delete(self.dwell_indicator)
-                self.dwell_indicator = None
+            self._clear_dwell_indicator()
             return
 
         prog = self.dwell.progress()
-        if prog > 0.25 and self.dwell_indicator is None:
+        if prog > _INDICATOR_PROGRESS and self.dwell_indicator is None:
+            # Centred on the fixation, not on the (still jittering) dot
+            fixation = self.dwell.fixation
+            px, py = int(fixation.x * self.sw), int(fixation.y * self.sh)
             self.dwell_indicator = self.canvas.create_oval(px - 30, py - 30, px + 30, py + 30, outline="yellow", width=3)
+            # The ring stays put while the dwell completes: a known target for recalibration.
+            self._fixation = ((px / self.sw, py / self.sh), [])
         if prog < 0.05 and self.dwell_indicator is not None:
-            # cell changed; reset indicator
+            # fixation ended (or dwell fired and restarted); reset indicator
+            self._clear_dwell_indicator()
+
+    def _clear_dwell_indicator(self) -> None:
+        if self.dwell_indicator:
             self.canvas.delete(self.dwell_indicator)
             self.dwell_indicator = None
+        self._fixation = None
+
+    def _recalibrate_from_dwell(self) -> None:
+        """A completed dwell is a fixation on the indicator ring: feed it to the online recalibration."""
+        if self.recalibrator is None or self._fixation is None:
+            return
+        target, samples = self._fixation
+        self._fixation = None
+        if self.recalibrator.add_fixation(target, np.asarray(samples)):
+            print(f"[Calibration] Online update #{self.recalibrator.updates} at ({target[0]:.2f}, {target[1]:.2f})")
+
+    # ---------------- Heatmap ----------------
+    def toggle_heatmap(self, event=None) -> None:
+        self.heatmap_visible = not self.heatmap_visible
+        if self.heatmap_visible:
+            if not self._heatmap_rendering:
+                self._draw_heatmap(time.perf_counter())
+        elif self._heatmap_item is not None:
+            self.canvas.itemconfig(self._heatmap_item, state="hidden")
+
+    def export_heatmap(self, event=None) -> None:
+        self.heatmap.export(config.HEATMAP_EXPORT_DIR, time.perf_counter())
+
+    def _draw_heatmap(self, now: float) -> None:
+        """Start rendering the overlay image (throttled to HEATMAP_REFRESH_MS by the caller).
+
+        Colour-mapping and scaling to screen size run on a background thread;
+        the next redraw pastes the result.
+        """
+        self._heatmap_drawn = now
+        self._heatmap_rendering = True
+        self.heatmap.render_async(now, self._on_heatmap_rendered, (self.sw, self.sh))
+
+    def _on_heatmap_rendered(self, image: Image.Image) -> None:
+        """Render thread: hand the image over and wake the UI (which pastes it)."""
+        self._heatmap_ready = image
+        self._heatmap_rendering = False
+        self.shared.ui_wakeup.signal()
+
+    def _paste_heatmap(self) -> None:
+        image, self._heatmap_ready = self._heatmap_ready, None
+        if not self.heatmap_visible or image is None:
+            return
+        if self._heatmap_photo is None:
+            self._heatmap_photo = ImageTk.PhotoImage("RGB", (self.sw, self.sh))
+            self._heatmap_item = self.canvas.create_image(0, 0, anchor="nw", image=self._heatmap_photo)
+            self.canvas.tag_lower(self._heatmap_item)  # under the grid, dot and indicators
+        self._heatmap_photo.paste(image)
+        self.canvas.itemconfig(self._heatmap_item, state="normal")
 
     # ---------------- Calibration Flow ----------------
     def start_calibration(self, event=None) -> None:
         print("[Calibration] Starting calibration...")
         self.is_calibrating = True
         self.calib_step = 0
-        self.calibrator.points = []
+        self.calib_samples = [[] for _ in self.calib_targets]
         self.canvas.itemconfig(self.dot, state="hidden")
         self.canvas.itemconfig(self.calib_target, state="normal")
         self._next_calib_step()
 
     def _next_calib_step(self) -> None:
-        if self.calib_step >= 4:
+        if self.calib_step >= len(self.calib_targets):
             self.is_calibrating = False
-            self.calibrator.update_from_points(self.calibrator.points)
-            self.canvas.itemconfig(self.calib_msg, text="Done!", fill="green")
+            ok = self.calibrator.fit(self.calib_targets, [np.asarray(s) for s in self.calib_samples])
+            self.gaze_filter.reset()
+            self._filtered_t = 0.0
+            if self.recalibrator is not None:
+                self.recalibrator.reset()
+            if ok:
+                self.canvas.itemconfig(self.calib_msg, text="Done!", fill="green")
+            else:
+                self.canvas.itemconfig(self.calib_msg, text="Calibration failed (no face?)", fill="red")
             self.canvas.itemconfig(self.calib_target, state="hidden")
             self.canvas.itemconfig(self.dot, state="normal")
             self.root.after(1500, lambda: self.canvas.itemconfig(self.calib_msg, text=""))
             return
 
-        tx, ty = self.calib_coords[self.calib_step]
+        nx, ny = self.calib_targets[self.calib_step]
+        tx, ty = nx * self.sw, ny * self.sh
         self.canvas.coords(self.calib_target, tx - 20, ty - 20, tx + 20, ty + 20)
-        msg = ["Look Top-Left", "Look Top-Right", "Look Bottom-Left", "Look Bottom-Right"][self.calib_step]
+        msg = f"Look at the dot ({self.calib_step + 1}/{len(self.calib_targets)})"
         self.canvas.itemconfig(self.calib_msg, text=msg, fill="yellow")
-        self.calib_timer = time.time()
-
-    def _handle_calibration(self, raw_x: float, raw_y: float) -> None:
-        if time.time() - self.calib_timer >= config.CALIBRATION_DWELL_SEC:
-            print(f"[Calibration] Recorded step {self.calib_step}: {raw_x:.4f}, {raw_y:.4f}")
-            self.calibrator.points.append((raw_x, raw_y))
+        self.calib_timer = time.perf_counter()
+
+    def _handle_calibration(self, fused: Optional[FusedGaze], now: float) -> None:
+        """Collect every fused sample once the eyes settled on the target, then move on."""
+        elapsed = now - self.calib_timer
+        samples = self.calib_samples[self.calib_step]
+        if fused is not None and elapsed >= config.CALIBRATION_SETTLE_SEC:
+            samples.append((fused.x, fused.y))
+        if elapsed >= config.CALIBRATION_SETTLE_SEC + config.CALIBRATION_DWELL_SEC:
+            print(f"[Calibration] Target {self.calib_step + 1}/{len(self.calib_targets)}: {len(samples)} samples")
             self.calib_step += 1
             self._next_calib_step()
 
@@ -226,12 +390,32 @@ class GhostUI:
         self.canvas.itemconfig(self.dot, fill="#00FF00")
         self.root.update()
 
-        self.ai.trigger_screenshot_analysis(self._on_ai_result)
+        # Centre the capture on the fixation that fired the dwell
+        fixation = self.dwell.fixation
+        gaze = (fixation.x, fixation.y) if fixation is not None else (self.cur_x, self.cur_y)
+        self._ai_gaze = gaze
+        self.ai.trigger_screenshot_analysis(self._on_ai_result, gaze=gaze)
+
+    def _cancel_ai_if_moved(self) -> None:
+        """Drop the outstanding request once the user fixates somewhere else."""
+        if self._ai_gaze is None:
+            return
+        fixation = self.dwell.fixation
+        if fixation is None:
+            return  # saccade or blink in between: wait for where the eyes land
+        dx, dy = fixation.x - self._ai_gaze[0], fixation.y - self._ai_gaze[1]
+        if dx * dx + dy * dy > config.AI_CANCEL_DISTANCE ** 2:
+            print("[AI] Fixation moved; request cancelled.")
+            self.ai.cancel()
+            self._ai_gaze = None
+            self.canvas.itemconfig(self.dot, fill="red")
 
     def _on_ai_result(self, text: str) -> None:
+        self._ai_gaze = None
         print("\n" + "-" * 40)
         print("[Gemini result]:")
         print(text)
+        print(self.ai.timing_report())
         print("-" * 40 + "\n")
 
         self.canvas.itemconfig(self.dot, fill="red")
@@ -239,6 +423,12 @@ class GhostUI:
     def _quit(self, event=None) -> None:
         print("[System] Exiting...")
         self.shared.running = False
+        self.shared.ui_wakeup.connect(None)
+        if self.recalibrator is not None:
+            self.recalibrator.flush()
+        if config.HISTORY_EXPORT_DIR and len(self.shared.history):
+            os.makedirs(config.HISTORY_EXPORT_DIR, exist_ok=True)
+            path = os.path.join(config.HISTORY_EXPORT_DIR, f"gaze-{time.strftime('%Y%m%d-%H%M%S')}.npy")
+            self.shared.history.export(path).join(timeout=5.0)  # the process exits right below
         self.root.quit()
-        import os
         os._exit(0)
@@ -0,0 +1,165 @@
+"""pc_app/ui/heatmap.py
+Incremental attention heatmap with exponential time decay.
+
+`AttentionHeatmap` accumulates gaze points on a coarse grid (the screen
+downsampled HEATMAP_DOWNSAMPLE times per axis):
+
+- Points are buffered and splatted in batches of HEATMAP_BATCH. A Gaussian is
+  separable, so a batch of N points is one (H, N) @ (N, W) product of
+  per-axis weights: no per-point Python loop, and the cost of a sample does
+  not grow with the session length.
+- Decay is lazy. The grid is kept relative to a reference time t_ref; a point
+  seen at t is added with weight exp(+lambda * (t - t_ref)), and values at
+  `now` are the grid times exp(-lambda * (now - t_ref)). Nothing rescans the
+  grid per sample; it is rescaled once in a while (when the growth factor
+  gets large) to stay within float32 range.
+
+Rendering (for the overlay and PNG export) colour-maps the grid, blacks out
+near-zero cells (black is the overlay's transparent colour) and resizes it to
+screen size. That takes tens of milliseconds at full screen, so the overlay
+uses `render_async()`: only the grid snapshot is taken on the calling thread.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import config
+
+_RENORM_EXPONENT = 20.0  # rebase t_ref once new weights reach exp(20)
+_VISIBLE_FLOOR = 0.05    # fraction of the peak below which the overlay stays transparent
+
+
+class AttentionHeatmap:
+    """Decaying gaze-density grid over the screen (see module docstring)."""
+
+    def __init__(
+        self,
+        screen_w: int,
+        screen_h: int,
+        downsample: int = config.HEATMAP_DOWNSAMPLE,
+        sigma_px: float = config.HEATMAP_SIGMA_PX,
+        half_life: float = config.HEATMAP_HALF_LIFE_SEC,
+        batch: int = config.HEATMAP_BATCH,
+    ) -> None:
+        self.screen = (screen_w, screen_h)
+        self.shape = (max(1, math.ceil(screen_h / downsample)), max(1, math.ceil(screen_w / downsample)))
+        # Cell centres in screen pixels, per axis.
+        self._cx = ((np.arange(self.shape[1], dtype=np.float32) + 0.5) * downsample)
+        self._cy = ((np.arange(self.shape[0], dtype=np.float32) + 0.5) * downsample)
+        self._inv_2s2 = np.float32(1.0 / (2.0 * sigma_px * sigma_px))
+        self.decay = math.log(2.0) / half_life if half_life > 0 else 0.0
+
+        self.grid = np.zeros(self.shape, dtype=np.float32)
+        self.t_ref: Optional[float] = None
+        self._pending = np.zeros((max(1, batch), 3), dtype=np.float64)  # (x, y, t)
+        self._n = 0
+        self.samples = 0
+
+    def reset(self) -> None:
+        self.grid.fill(0.0)
+        self.t_ref = None
+        self._n = 0
+        self.samples = 0
+
+    def add(self, x: float, y: float, t: float) -> None:
+        """Queue one gaze point (normalized screen coords); splats when the batch is full."""
+        self._pending[self._n] = (x, y, t)
+        self._n += 1
+        if self._n == len(self._pending):
+            self.flush()
+
+    def add_batch(self, xs: np.ndarray, ys: np.ndarray, ts: np.ndarray) -> None:
+        """Splat many points at once (e.g. a `GazeHistory` range)."""
+        self.flush()
+        self._splat(np.asarray(xs, np.float64), np.asarray(ys, np.float64), np.asarray(ts, np.float64))
+
+    def flush(self) -> None:
+        if self._n:
+            p = self._pending[: self._n]
+            self._n = 0
+            self._splat(p[:, 0], p[:, 1], p[:, 2])
+
+    def values(self, now: float) -> np.ndarray:
+        """Decayed density at `now` (a new array, grid-sized)."""
+        self.flush()
+        if self.t_ref is None:
+            return np.zeros(self.shape, dtype=np.float32)
+        return self.grid * np.float32(math.exp(-self.decay * (now - self.t_ref)))
+
+    def render(self, now: float, size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """RGB image of the heatmap at `size` (screen size by default), normalized to its peak."""
+        return _colorize(self.values(now), size or self.screen)
+
+    def render_async(
+        self, now: float, on_done: Callable[[Image.Image], None], size: Optional[Tuple[int, int]] = None
+    ) -> threading.Thread:
+        """Like `render`, on a background thread that passes the image to `on_done`.
+
+        Only the decayed grid copy happens on the calling thread; `on_done`
+        runs on the render thread.
+        """
+        vals = self.values(now)
+        size = size or self.screen
+        thread = threading.Thread(
+            target=lambda: on_done(_colorize(vals, size)), name="heatmap-render", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def export(self, directory: str, now: float) -> threading.Thread:
+        """Write heatmap-<time>.npy (decayed grid) and .png (rendered) on a background thread."""
+        vals = self.values(now)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(directory, f"heatmap-{stamp}")
+
+        def write() -> None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                np.save(base + ".npy", vals)
+                _colorize(vals, self.screen).save(base + ".png")
+                print(f"[Heatmap] Exported {base}.png/.npy ({self.samples} samples)")
+            except OSError as e:
+                print(f"[Heatmap] Could not export {base}: {e}")
+
+        thread = threading.Thread(target=write, name="heatmap-export", daemon=True)
+        thread.start()
+        return thread
+
+    def _splat(self, xs: np.ndarray, ys: np.ndarray, ts: np.ndarray) -> None:
+        if len(ts) == 0:
+            return
+        t_max = float(ts.max())
+        if self.t_ref is None:
+            self.t_ref = t_max
+        elif self.decay * (t_max - self.t_ref) > _RENORM_EXPONENT:
+            self.grid *= np.float32(math.exp(-self.decay * (t_max - self.t_ref)))
+            self.t_ref = t_max
+        w = np.exp(self.decay * (ts - self.t_ref)).astype(np.float32)
+        dx = self._cx[None, :] - (xs * self.screen[0]).astype(np.float32)[:, None]
+        dy = self._cy[None, :] - (ys * self.screen[1]).astype(np.float32)[:, None]
+        gx = np.exp(-(dx * dx) * self._inv_2s2)          # (N, W)
+        gy = np.exp(-(dy * dy) * self._inv_2s2) * w[:, None]  # (N, H), weighted
+        self.grid += gy.T @ gx
+        self.samples += len(ts)
+
+
+def _colorize(vals: np.ndarray, size: Tuple[int, int]) -> Image.Image:
+    """Colour-map a density grid (peak = 1), black below _VISIBLE_FLOOR, resized to `size`."""
+    peak = float(vals.max())
+    if peak <= 0.0:
+        small = np.zeros(vals.shape + (3,), dtype=np.uint8)
+    else:
+        level = vals / peak
+        small = cv2.applyColorMap((level * 255.0).astype(np.uint8), cv2.COLORMAP_JET)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        small[level < _VISIBLE_FLOOR] = 0
+    return Image.fromarray(cv2.resize(small, size, interpolation=cv2.INTER_LINEAR))
@@ -1,11 +1,13 @@
 """pi_app/camera_streamer.py
 Picamera2 -> JPEG -> TCP streaming.
+
+Speaks protocol v2 (frame ids, capture timestamps, clock handshake) unless
+`config.PROTOCOL_VERSION` is 1, for PCs running an older build.
 """
 
 from __future__ import annotations
 
 import socket
-import struct
 import time
 
 import cv2
@@ -13,6 +15,7 @@ from picamera2 import Picamera2
 
 from .state import SystemState
 from . import config
+from . import protocol
 
 
 def run_camera_streamer(state: SystemState) -> None:
@@ -39,10 +42,19 @@ def run_camera_streamer(state: SystemState) -> None:
 
             try:
                 client.connect((config.PC_IP, config.PC_PORT))
-                print("[Camera] Connected. Streaming video...")
+                v2 = config.PROTOCOL_VERSION >= 2
+                if v2:
+                    sync = protocol.sync_clock(client)
+                    if sync is None:
+                        print("[Camera] Clock sync failed; PC will use receive times.")
+                    else:
+                        print(f"[Camera] Clock synced (offset {sync[0]:+.4f}s, rtt {sync[1] * 1000:.1f} ms).")
+                print(f"[Camera] Connected. Streaming video (protocol v{2 if v2 else 1})...")
+                seq = 0
 
                 while state.running and state.streaming:
                     frame = picam2.capture_array()
+                    capture_ts = time.perf_counter()
                     frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
 
                     ok, enc = cv2.imencode(
@@ -54,7 +66,12 @@ def run_camera_streamer(state: SystemState) -> None:
                         continue
 
                     data = enc.tobytes()
-                    header = struct.pack(">L", len(data))
+                    if v2:
+                        encode_ms = (time.perf_counter() - capture_ts) * 1000.0
+                        header = protocol.frame_header_v2(seq, capture_ts, encode_ms, len(data))
+                        seq += 1
+                    else:
+                        header = protocol.frame_header_v1(len(data))
                     client.sendall(header + data)
 
             except (BrokenPipeError, ConnectionResetError, socket.timeout) as e:
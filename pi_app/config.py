@@ -5,6 +5,7 @@ Raspberry Pi configuration.
 # Network (PC IP)
 PC_IP = "192.168.6.141"  # TODO: set to your PC IP
 PC_PORT = 4242
+PROTOCOL_VERSION = 2  # set to 1 when streaming to a PC build without v2 support
 
 # Camera
 RES_W, RES_H = 640, 480
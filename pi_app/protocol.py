@@ -0,0 +1,86 @@
+"""pi_app/protocol.py
+Wire format for the Pi -> PC frame stream (must match pc_app/backend/transport.py).
+
+v1: 4-byte big-endian length + JPEG.
+v2: b"GZ" + version + message type, then a fixed body:
+    FRAME:        seq u32, capture_ts f64, encode_ms f32, length u32, then JPEG
+    CLOCK_PING:   t0 f64
+    CLOCK_PONG:   t0 f64, t1 f64, t2 f64   (PC reply)
+    CLOCK_OFFSET: offset f64, rtt f64
+
+All timestamps are `time.perf_counter()` seconds on the sender's clock.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+import time
+from typing import Optional, Tuple
+
+MAGIC = b"GZ"
+VERSION = 2
+MSG_FRAME = 1
+MSG_CLOCK_PING = 2
+MSG_CLOCK_PONG = 3
+MSG_CLOCK_OFFSET = 4
+
+V1_HEADER = struct.Struct(">L")
+V2_PREFIX = struct.Struct(">2sBB")
+V2_FRAME = struct.Struct(">IdfI")
+V2_CLOCK_PING = struct.Struct(">d")
+V2_CLOCK_PONG = struct.Struct(">ddd")
+V2_CLOCK_OFFSET = struct.Struct(">dd")
+
+_FRAME_PREFIX = V2_PREFIX.pack(MAGIC, VERSION, MSG_FRAME)
+
+
+def frame_header_v1(length: int) -> bytes:
+    return V1_HEADER.pack(length)
+
+
+def frame_header_v2(seq: int, capture_ts: float, encode_ms: float, length: int) -> bytes:
+    return _FRAME_PREFIX + V2_FRAME.pack(seq & 0xFFFFFFFF, capture_ts, encode_ms, length)
+
+
+def _recv_exact(sock: socket.socket, n_bytes: int) -> Optional[bytes]:
+    data = bytearray()
+    while len(data) < n_bytes:
+        chunk = sock.recv(n_bytes - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def sync_clock(sock: socket.socket, rounds: int = 5) -> Optional[Tuple[float, float]]:
+    """NTP-style handshake. Returns (offset, rtt) and reports it to the PC.
+
+    offset = pc_clock - pi_clock, taken from the round with the smallest RTT.
+    Returns None if the PC does not answer (e.g. an old v1-only PC build).
+    """
+    ping_prefix = V2_PREFIX.pack(MAGIC, VERSION, MSG_CLOCK_PING)
+    reply_size = V2_PREFIX.size + V2_CLOCK_PONG.size
+    best: Optional[Tuple[float, float]] = None
+
+    for _ in range(rounds):
+        sock.sendall(ping_prefix + V2_CLOCK_PING.pack(time.perf_counter()))
+        try:
+            reply = _recv_exact(sock, reply_size)
+        except socket.timeout:
+            return None
+        t3 = time.perf_counter()
+        if reply is None:
+            return None
+        magic, version, msg_type = V2_PREFIX.unpack_from(reply)
+        if magic != MAGIC or msg_type != MSG_CLOCK_PONG:
+            return None
+        t0, t1, t2 = V2_CLOCK_PONG.unpack_from(reply, V2_PREFIX.size)
+        rtt = (t3 - t0) - (t2 - t1)
+        offset = ((t1 - t0) + (t2 - t3)) / 2.0
+        if best is None or rtt < best[1]:
+            best = (offset, rtt)
+
+    if best is not None:
+        sock.sendall(V2_PREFIX.pack(MAGIC, VERSION, MSG_CLOCK_OFFSET) + V2_CLOCK_OFFSET.pack(*best))
+    return best